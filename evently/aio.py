@@ -0,0 +1,27 @@
+"""
+Helpers for the async views.
+
+Django's async ORM methods (aget, afirst, async for, ...) run each query in the
+request's thread-sensitive executor, so they never block the event loop but
+also never overlap with each other. ``gather`` runs independent ORM calls in
+separate worker threads, each with its own database connection, and awaits
+them together so the slowest query sets the latency instead of the sum.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+def _run(func):
+    try:
+        return func()
+    finally:
+        # Worker threads are reused; release their connection the same way
+        # request_finished does for a request thread (honours CONN_MAX_AGE).
+        close_old_connections()
+
+
+async def gather(*funcs):
+    """Call each zero-argument function concurrently and return their results in order."""
+    return await asyncio.gather(*(sync_to_async(_run, thread_sensitive=False)(func) for func in funcs))
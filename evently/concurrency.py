@@ -0,0 +1,259 @@
+"""
+Adaptive concurrency limit and load shedding.
+
+ConcurrencyLimitMiddleware caps how many requests a worker process runs at
+once. The cap adapts to latency, gradient style: ``long_rtt`` is a slow
+moving average of request latency (the worker's normal) and ``short_rtt`` a
+fast one (how it is doing right now). After every request
+
+    gradient = clamp(TOLERANCE * long_rtt / short_rtt, 0.5, 1)
+    limit = limit * gradient + sqrt(limit)
+
+smoothed by SMOOTHING and clamped to MIN..MAX. While latency is normal the
+gradient is 1 and the limit grows by sqrt(limit); when SQLite writes start
+queueing behind the lock, latency rises, the gradient drops and the limit
+shrinks until requests run fast again.
+
+Requests over the limit are handled by priority (CONCURRENCY_PRIORITIES,
+keyed by URL name; unlisted writes are 'critical', unlisted reads 'normal'):
+
+- 'low' only runs while the worker is below LOW_SHARE of its limit, so
+  non-essential reads are shed first;
+- 'normal' runs below the limit and while no critical request is waiting;
+- 'critical' waits up to QUEUE_TIMEOUT seconds for a free slot, at most
+  QUEUE_SIZE of them at a time, ahead of every other request.
+
+Shed requests get an immediate 503 with Retry-After. The numbers are per
+process; stats() (served at /_concurrency/ to staff) reports them.
+"""
+import asyncio
+import math
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from .db_router import SAFE_METHODS
+
+DEFAULTS = {
+    'INITIAL': 20,
+    'MIN': 4,
+    'MAX': 200,
+    'TOLERANCE': 1.5,
+    'SMOOTHING': 0.2,
+    'LOW_SHARE': 0.5,
+    'QUEUE_SIZE': 50,
+    'QUEUE_TIMEOUT': 2.0,
+}
+
+LOW, NORMAL, CRITICAL = 'low', 'normal', 'critical'
+PRIORITIES = (LOW, NORMAL, CRITICAL)
+
+# Weights of the newest latency sample in the fast and slow averages.
+SHORT_ALPHA = 0.3
+LONG_ALPHA = 0.01
+
+
+def option(name):
+    return getattr(settings, 'CONCURRENCY_LIMIT', {}).get(name, DEFAULTS[name])
+
+
+class Limiter:
+    def __init__(self):
+        self._lock = threading.Condition()
+        self.limit = float(option('INITIAL'))
+        self.in_flight = 0
+        self.queued = 0
+        self.peak_queued = 0
+        self.short_rtt = None
+        self.long_rtt = None
+        self.admitted = dict.fromkeys(PRIORITIES, 0)
+        self.shed = dict.fromkeys(PRIORITIES, 0)
+        self.timed_out = 0
+
+    def _has_room(self, priority):
+        if priority == CRITICAL:
+            return self.in_flight < self.limit
+        if self.queued:
+            return False
+        if priority == LOW:
+            return self.in_flight < max(self.limit * option('LOW_SHARE'), 1)
+        return self.in_flight < self.limit
+
+    def _admit(self, priority):
+        self.in_flight += 1
+        self.admitted[priority] += 1
+        return time.monotonic()
+
+    def _enqueue(self):
+        if self.queued >= option('QUEUE_SIZE'):
+            return False
+        self.queued += 1
+        self.peak_queued = max(self.peak_queued, self.queued)
+        return True
+
+    def _reject(self, priority, timed_out=False):
+        self.shed[priority] += 1
+        self.timed_out += timed_out
+        return None
+
+    def acquire(self, priority):
+        """Admit a request, waiting if it is critical; returns its start time or None if shed."""
+        with self._lock:
+            if self._has_room(priority):
+                return self._admit(priority)
+            if priority != CRITICAL or not self._enqueue():
+                return self._reject(priority)
+            try:
+                admitted = self._lock.wait_for(lambda: self._has_room(CRITICAL), option('QUEUE_TIMEOUT'))
+            finally:
+                self.queued -= 1
+            return self._admit(priority) if admitted else self._reject(priority, timed_out=True)
+
+    async def aacquire(self, priority):
+        """acquire() for the event loop: a queued request polls instead of blocking a thread."""
+        with self._lock:
+            if self._has_room(priority):
+                return self._admit(priority)
+            if priority != CRITICAL or not self._enqueue():
+                return self._reject(priority)
+        deadline = time.monotonic() + option('QUEUE_TIMEOUT')
+        try:
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.005)
+                with self._lock:
+                    if self._has_room(CRITICAL):
+                        self.queued -= 1
+                        return self._admit(priority)
+            with self._lock:
+                self.queued -= 1
+                return self._reject(priority, timed_out=True)
+        except asyncio.CancelledError:
+            with self._lock:
+                self.queued -= 1
+            raise
+
+    def release(self, started):
+        latency = time.monotonic() - started
+        with self._lock:
+            self.in_flight -= 1
+            self._update(latency)
+            self._lock.notify_all()
+
+    def _update(self, latency):
+        if self.short_rtt is None:
+            self.short_rtt = self.long_rtt = latency
+            return
+        self.short_rtt += SHORT_ALPHA * (latency - self.short_rtt)
+        self.long_rtt += LONG_ALPHA * (self.short_rtt - self.long_rtt)
+        if self.long_rtt > 2 * self.short_rtt:
+            # Recovering from a slow period: let "normal" drift back down.
+            self.long_rtt *= 0.95
+        gradient = max(0.5, min(1.0, option('TOLERANCE') * self.long_rtt / max(self.short_rtt, 1e-6)))
+        target = self.limit * gradient + math.sqrt(self.limit)
+        smoothing = option('SMOOTHING')
+        limit = self.limit * (1 - smoothing) + target * smoothing
+        if self.in_flight < self.limit / 2:
+            # Mostly idle: latency says nothing about how much more we could
+            # take, so only let it lower the limit.
+            limit = min(limit, self.limit)
+        self.limit = min(max(limit, option('MIN')), option('MAX'))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'limit': round(self.limit, 2),
+                'in_flight': self.in_flight,
+                'queued': self.queued,
+                'peak_queued': self.peak_queued,
+                'admitted': dict(self.admitted),
+                'shed': dict(self.shed),
+                'queue_timeouts': self.timed_out,
+                'short_rtt_ms': round(self.short_rtt * 1000, 2) if self.short_rtt is not None else None,
+                'long_rtt_ms': round(self.long_rtt * 1000, 2) if self.long_rtt is not None else None,
+            }
+
+
+# One per worker process.
+limiter = Limiter()
+
+
+def priority_for(request):
+    name = request.resolver_match.url_name if request.resolver_match else None
+    configured = getattr(settings, 'CONCURRENCY_PRIORITIES', {}).get(name)
+    if configured:
+        return configured
+    return NORMAL if request.method in SAFE_METHODS else CRITICAL
+
+
+def overloaded():
+    response = JsonResponse({'error': 'The server is busy. Try again shortly.'}, status=503)
+    response['Retry-After'] = '1'
+    return response
+
+
+class ConcurrencyLimitMiddleware:
+    """
+    Admit each request through ``limiter`` once its view is known, and
+    release its slot when the response is ready, or for a streaming response
+    when the server closes it after sending the last chunk. Place it after
+    AuthenticationMiddleware so shed requests skip the view entirely.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            self._release(request)
+            raise
+        return self._finish(request, response)
+
+    async def __acall__(self, request):
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            self._release(request)
+            raise
+        return self._finish(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._concurrency_started = limiter.acquire(priority_for(request))
+        return overloaded() if request._concurrency_started is None else None
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        request._concurrency_started = await limiter.aacquire(priority_for(request))
+        return overloaded() if request._concurrency_started is None else None
+
+    def _finish(self, request, response):
+        if response.streaming:
+            # The rows are read from the database while the body is sent;
+            # close() runs once that is over (or the client went away).
+            response._resource_closers.append(lambda: self._release(request))
+        else:
+            self._release(request)
+        return response
+
+    def _release(self, request):
+        started = getattr(request, '_concurrency_started', None)
+        if started is not None:
+            request._concurrency_started = None
+            limiter.release(started)
+
+
+@staff_member_required
+@require_GET
+def stats_view(request):
+    return JsonResponse(limiter.stats(), status=200)
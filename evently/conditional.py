@@ -0,0 +1,48 @@
+"""
+Helpers for HTTP conditional GET.
+
+Views opt in with Django's ``condition`` decorator and an ETag function that
+reads a few cheap aggregates (row versions, counts, MAX(updated_at)) instead
+of building the response. When the client's If-None-Match still matches, the
+view body and its serialization are skipped and a 304 is returned.
+
+Async views use ``acondition`` instead, whose ETag function is a coroutine
+so it can query with the async ORM.
+"""
+import functools
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from .streaming import response_format
+
+
+def make_etag(request, *parts):
+    """
+    Build a strong ETag from ``parts``. The query string and the body format
+    negotiated from Accept are folded in, so paginated, filtered and NDJSON
+    variants of the same resource get distinct tags. Views whose format
+    depends on Accept must also send ``Vary: Accept``.
+    """
+    raw = '|'.join(
+        [request.path, request.META.get('QUERY_STRING', ''), response_format(request)]
+        + [str(part) for part in parts]
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def acondition(etag_func):
+    """``django.views.decorators.http.condition`` for async views and async ETag functions."""
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            etag = await etag_func(request, *args, **kwargs)
+            etag = quote_etag(etag) if etag is not None else None
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            if etag and request.method in ('GET', 'HEAD'):
+                response.headers.setdefault('ETag', etag)
+            return response
+        return wrapper
+    return decorator
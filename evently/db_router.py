@@ -0,0 +1,115 @@
+"""
+Primary/replica database routing.
+
+Writes always go to ``default`` (the primary). Reads go to a random alias
+from REPLICA_DATABASES only while ReplicaRoutingMiddleware has marked the
+current request as replica-safe: a GET/HEAD/OPTIONS request from a client that
+has not written recently. Everything else (unsafe methods, management
+commands, job workers, reads inside a transaction or after a write in the
+same request) reads from the primary.
+
+Read-your-writes: after a request writes, the response sets a short-lived
+signed cookie, and the client's reads stay on the primary until it expires
+(DATABASE_STICKY_SECONDS), by which time the replicas should have caught up.
+"""
+import contextvars
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+STICKY_COOKIE = 'evently_primary'
+STICKY_SALT = 'evently.db_router'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingState:
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+# A mutable object rather than a plain flag, so a write recorded inside a
+# sync_to_async() thread (which runs in a copy of the context) is seen here.
+_state = contextvars.ContextVar('evently_db_routing', default=None)
+
+
+def reading_from_replica():
+    """True if reads in the current request may be served by a replica."""
+    state = _state.get()
+    return state is not None and state.use_replica and not state.wrote and bool(replicas())
+
+
+def replicas():
+    return getattr(settings, 'REPLICA_DATABASES', [])
+
+
+def sticky_seconds():
+    return getattr(settings, 'DATABASE_STICKY_SECONDS', 5)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not reading_from_replica() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas())
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    """Decide per request whether reads may use a replica, and set the sticky cookie after writes."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state, token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(request, response, state)
+
+    async def __acall__(self, request):
+        state, token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(request, response, state)
+
+    def start(self, request):
+        use_replica = request.method in SAFE_METHODS and not self.is_sticky(request)
+        state = RoutingState(use_replica)
+        return state, _state.set(state)
+
+    def finish(self, request, response, state):
+        if state.wrote or request.method not in SAFE_METHODS:
+            response.set_signed_cookie(
+                STICKY_COOKIE, '1', salt=STICKY_SALT, max_age=sticky_seconds(),
+                httponly=True, samesite='Lax', secure=request.is_secure(),
+            )
+        return response
+
+    def is_sticky(self, request):
+        return request.get_signed_cookie(STICKY_COOKIE, default=None, salt=STICKY_SALT, max_age=sticky_seconds()) is not None
@@ -0,0 +1,142 @@
+"""
+Keyset ("cursor") pagination shared by the JSON list endpoints.
+
+A page is requested with ``?limit=N`` and continued with the opaque ``cursor``
+returned as ``next`` in the previous response. The cursor encodes the sort key
+of the last row served, so every page is a single indexed range scan no matter
+how deep it is. Requests without ``limit`` or ``cursor`` are not paginated.
+"""
+import base64
+import datetime
+import decimal
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class Page:
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+
+def is_paginated(request):
+    return 'cursor' in request.GET or 'limit' in request.GET
+
+
+def paginate(request, queryset, keys=('created_at', 'id'), descending=False):
+    """
+    Return a Page for ``queryset`` ordered by ``keys``, or None when the request
+    did not ask for pagination. Raises InvalidCursor for a malformed request.
+    """
+    if not is_paginated(request):
+        return None
+    queryset, limit = _page_queryset(request, queryset, keys, descending)
+    return _make_page(list(queryset[:limit + 1]), limit, keys)
+
+
+async def apaginate(request, queryset, keys=('created_at', 'id'), descending=False):
+    """paginate() for async views, fetching the page with the async ORM."""
+    if not is_paginated(request):
+        return None
+    queryset, limit = _page_queryset(request, queryset, keys, descending)
+    return _make_page([row async for row in queryset[:limit + 1]], limit, keys)
+
+
+def _page_queryset(request, queryset, keys, descending):
+    limit = _parse_limit(request.GET.get('limit'))
+    queryset = queryset.order_by(*[f'-{key}' if descending else key for key in keys])
+
+    cursor = request.GET.get('cursor')
+    if cursor:
+        values = decode_cursor(cursor, queryset.model, keys)
+        queryset = queryset.filter(_after(keys, values, descending))
+    return queryset, limit
+
+
+def _make_page(rows, limit, keys):
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, key) for key in keys])
+    return Page(rows, next_cursor)
+
+
+def encode_cursor(values):
+    payload = json.dumps([_dump(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, model, keys):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor.')
+    if not isinstance(raw, list) or len(raw) != len(keys):
+        raise InvalidCursor('Invalid cursor.')
+    values = []
+    for key, value in zip(keys, raw):
+        field = model._meta.get_field(key)
+        try:
+            values.append(_load(field, value))
+        except (ValueError, TypeError, decimal.InvalidOperation):
+            raise InvalidCursor('Invalid cursor.')
+    return values
+
+
+def _after(keys, values, descending):
+    # (a, b) > (x, y)  <=>  a > x OR (a = x AND b > y)
+    lookup = 'lt' if descending else 'gt'
+    condition = Q()
+    for index, key in enumerate(keys):
+        clause = Q(**{f'{key}__{lookup}': values[index]})
+        for prev_key, prev_value in zip(keys[:index], values[:index]):
+            clause &= Q(**{prev_key: prev_value})
+        condition |= clause
+    # The redundant bound on the leading key lets the database seek straight
+    # into the index instead of evaluating the OR for every row.
+    return Q(**{f'{keys[0]}__{lookup}e': values[0]}) & condition
+
+
+def _parse_limit(raw):
+    if raw in (None, ''):
+        return DEFAULT_LIMIT
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise InvalidCursor('limit must be an integer.')
+    if limit < 1:
+        raise InvalidCursor('limit must be at least 1.')
+    return min(limit, MAX_LIMIT)
+
+
+def _dump(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
+
+
+def _load(field, value):
+    internal = field.get_internal_type()
+    if internal == 'DateTimeField':
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValueError(value)
+        return parsed
+    if internal in ('AutoField', 'BigAutoField', 'IntegerField', 'PositiveIntegerField'):
+        if not isinstance(value, int):
+            raise ValueError(value)
+        return value
+    return field.to_python(value)
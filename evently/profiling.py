@@ -0,0 +1,266 @@
+"""
+Opt-in per-request profiling.
+
+With PROFILE_REQUESTS on, ProfilingMiddleware records for every request:
+
+- the number of SQL queries and the time spent in them, on every database;
+- repeated query fingerprints (the SQL with its parameters left out and IN
+  lists collapsed), the signature of an N+1: the same query run once per row;
+- time spent in serializers (functions decorated with ``profiled('serialize')``)
+  and rendering templates (through ProfiledDjangoTemplates).
+
+The numbers go out in a Server-Timing header, which browser dev tools show
+next to each request, and into a ring buffer of the last PROFILE_BUFFER_SIZE
+requests. /_perf/ (staff only) summarises the buffer per URL name, worst first.
+
+Nested timings count once: a serializer calling another serializer adds only
+the outer one's time. The buffer is per worker process.
+"""
+import contextvars
+import functools
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import JsonResponse
+from django.template.backends.django import DjangoTemplates
+from django.views.decorators.http import require_GET
+
+PHASES = ('serialize', 'template')
+TOP_DUPLICATES = 5
+
+SORTS = {
+    'total': 'avg_total_ms',
+    'db': 'avg_db_ms',
+    'queries': 'max_queries',
+    'duplicates': 'max_duplicates',
+    'serialize': 'avg_serialize_ms',
+    'template': 'avg_template_ms',
+}
+
+_IN_LIST = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+_SPACE = re.compile(r'\s+')
+
+
+class Profile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.fingerprints = Counter()
+        self.phases = defaultdict(float)
+        self._depth = Counter()
+
+
+# Holds the current request's Profile. Being a mutable object, it is also
+# updated from sync_to_async() threads, which run in a copy of the context.
+_current = contextvars.ContextVar('evently_profile', default=None)
+
+_buffer = deque(maxlen=getattr(settings, 'PROFILE_BUFFER_SIZE', 500))
+_buffer_lock = threading.Lock()
+
+
+def fingerprint(sql):
+    return _IN_LIST.sub('(%s, ...)', _SPACE.sub(' ', sql).strip())
+
+
+@contextmanager
+def timed(phase):
+    """Add the time spent in the block to ``phase`` of the current request's profile."""
+    profile = _current.get()
+    if profile is None or profile._depth[phase]:
+        yield
+        return
+    profile._depth[phase] += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.phases[phase] += time.perf_counter() - start
+        profile._depth[phase] -= 1
+
+
+def profiled(phase):
+    """Decorator form of timed(); a plain call when nothing is being profiled."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return func(*args, **kwargs)
+            with timed(phase):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_query(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.queries += 1
+        profile.db_time += time.perf_counter() - start
+        profile.fingerprints[fingerprint(sql)] += 1
+
+
+def install_query_recorder(sender=None, connection=None, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class _TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        with timed('template'):
+            return self.template.render(context, request)
+
+
+class ProfiledDjangoTemplates(DjangoTemplates):
+    """The Django template backend, with render time counted in the request's profile."""
+
+    def from_string(self, template_code):
+        return _TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name))
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def repeated_count(profile):
+    """How many queries repeated one already run in the same request."""
+    return sum(count - 1 for count in profile.fingerprints.values() if count > 1)
+
+
+def server_timing(profile, total):
+    parts = [
+        f'db;dur={_ms(profile.db_time)};desc="{profile.queries} queries"',
+        f'dupq;desc="{repeated_count(profile)} repeated queries"',
+    ]
+    parts += [f'{phase};dur={_ms(profile.phases[phase])}' for phase in PHASES if phase in profile.phases]
+    parts.append(f'total;dur={_ms(total)}')
+    return ', '.join(parts)
+
+
+def _record(request, response, profile, total):
+    repeated = [(sql, count) for sql, count in profile.fingerprints.most_common(TOP_DUPLICATES) if count > 1]
+    entry = {
+        'url_name': request.resolver_match.url_name if request.resolver_match else None,
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        'total_ms': _ms(total),
+        'queries': profile.queries,
+        'db_ms': _ms(profile.db_time),
+        'duplicates': repeated_count(profile),
+        'repeated_queries': repeated,
+        'serialize_ms': _ms(profile.phases['serialize']),
+        'template_ms': _ms(profile.phases['template']),
+        'at': time.time(),
+    }
+    with _buffer_lock:
+        _buffer.append(entry)
+
+
+def recent():
+    with _buffer_lock:
+        return list(_buffer)
+
+
+def summary(sort='total'):
+    """Per-URL-name aggregates of the buffered requests, worst first by ``sort``."""
+    groups = defaultdict(list)
+    for entry in recent():
+        groups[entry['url_name'] or entry['path']].append(entry)
+    rows = []
+    for name, entries in groups.items():
+        n = len(entries)
+        worst = max(entries, key=lambda entry: (entry['duplicates'], entry['queries']))
+        rows.append({
+            'url_name': name,
+            'requests': n,
+            'avg_total_ms': round(sum(e['total_ms'] for e in entries) / n, 2),
+            'max_total_ms': max(e['total_ms'] for e in entries),
+            'avg_db_ms': round(sum(e['db_ms'] for e in entries) / n, 2),
+            'avg_queries': round(sum(e['queries'] for e in entries) / n, 1),
+            'max_queries': max(e['queries'] for e in entries),
+            'max_duplicates': worst['duplicates'],
+            'avg_serialize_ms': round(sum(e['serialize_ms'] for e in entries) / n, 2),
+            'avg_template_ms': round(sum(e['template_ms'] for e in entries) / n, 2),
+            'worst_path': worst['path'],
+            'repeated_queries': worst['repeated_queries'],
+        })
+    rows.sort(key=lambda row: row[SORTS[sort]], reverse=True)
+    return rows
+
+
+class ProfilingMiddleware:
+    """Profile each request; enabled by PROFILE_REQUESTS, which also puts it first in MIDDLEWARE."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        connection_created.connect(install_query_recorder)
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection=connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        profile = Profile()
+        token = _current.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, profile)
+
+    async def __acall__(self, request):
+        profile = Profile()
+        token = _current.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, profile)
+
+    def _finish(self, request, response, profile):
+        total = time.perf_counter() - profile.started
+        response['Server-Timing'] = server_timing(profile, total)
+        if not (request.resolver_match and request.resolver_match.url_name == 'perf'):
+            _record(request, response, profile, total)
+        return response
+
+
+@staff_member_required
+@require_GET
+def perf_view(request):
+    sort = request.GET.get('sort', 'total')
+    if sort not in SORTS:
+        return JsonResponse({'error': f"Unknown sort '{sort}'. Use one of: {', '.join(SORTS)}."}, status=400)
+    return JsonResponse({
+        'enabled': getattr(settings, 'PROFILE_REQUESTS', False),
+        'buffered': len(_buffer),
+        'sort': sort,
+        'endpoints': summary(sort),
+    }, status=200)
@@ -0,0 +1,201 @@
+"""
+Per-client rate limiting.
+
+Each limit is a token bucket: it holds up to ``burst`` tokens, refills at
+``rate`` (e.g. "30/m") and every request takes one. A client with an empty
+bucket gets a 429 with Retry-After set to when the next token arrives.
+
+RATE_LIMITS maps URL names to limits, applied by RateLimitMiddleware:
+
+    RATE_LIMITS = {
+        'login': {'rate': '10/m', 'key': 'ip', 'methods': ['POST']},
+    }
+
+``key`` picks whose bucket a request draws from: 'ip' (see client_ip), 'user'
+(the logged-in user, or the IP for anonymous requests) or 'endpoint' (one
+bucket shared by everybody). ``burst`` defaults to the rate's count, and
+without ``methods`` every method is limited. The ``ratelimit`` decorator
+applies the same kind of limit to a single view.
+
+Buckets live in RATE_LIMIT_BACKEND: LocalBackend keeps them in process
+memory (fast, but each worker counts separately); CacheBackend keeps them in
+RATE_LIMIT_CACHE_ALIAS so every worker sharing that cache shares the limit.
+The cache read and write are not atomic, so concurrent requests from one
+client can occasionally let a request or two more through than the limit.
+"""
+import functools
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+from django.utils.module_loading import import_string
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+KEY_PREFIX = 'ratelimit:v1'
+
+
+class Limit:
+    def __init__(self, rate, burst=None, key='ip', methods=None):
+        try:
+            count, period = rate.split('/')
+            count, seconds = int(count), PERIODS[period]
+        except (ValueError, KeyError):
+            raise ValueError(f"Invalid rate '{rate}'; use '<count>/<s|m|h|d>'.")
+        if key not in KEYS:
+            raise ValueError(f"Invalid rate limit key '{key}'; use one of: {', '.join(KEYS)}.")
+        self.capacity = burst or count
+        self.per_second = count / seconds
+        self.key = key
+        self.methods = {method.upper() for method in methods} if methods else None
+
+    def applies_to(self, request):
+        return self.methods is None or request.method in self.methods
+
+
+def take(state, capacity, per_second, now):
+    """Take a token from a bucket; returns (new state, seconds to wait or 0 if allowed)."""
+    tokens, updated = state if state is not None else (capacity, now)
+    tokens = min(capacity, tokens + (now - updated) * per_second)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) / per_second
+
+
+class LocalBackend:
+    """Buckets in this process's memory, evicting the least recently used past MAX_BUCKETS."""
+    MAX_BUCKETS = 10000
+
+    def __init__(self):
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit):
+        with self._lock:
+            state, wait = take(self._buckets.pop(key, None), limit.capacity, limit.per_second, time.monotonic())
+            self._buckets[key] = state
+            if len(self._buckets) > self.MAX_BUCKETS:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+class CacheBackend:
+    """Buckets in a Django cache, shared by every worker that uses it."""
+
+    def hit(self, key, limit):
+        cache = caches[getattr(settings, 'RATE_LIMIT_CACHE_ALIAS', 'default')]
+        state, wait = take(cache.get(key), limit.capacity, limit.per_second, time.time())
+        # A bucket left alone this long is full again, the same as no entry.
+        cache.set(key, state, math.ceil(limit.capacity / limit.per_second) + 1)
+        return wait
+
+
+@functools.cache
+def _backend(path):
+    return import_string(path)()
+
+
+def backend():
+    return _backend(getattr(settings, 'RATE_LIMIT_BACKEND', 'evently.ratelimit.LocalBackend'))
+
+
+def client_ip(request):
+    """
+    The client address: REMOTE_ADDR, or behind a proxy the last address in the
+    RATE_LIMIT_IP_HEADER header (e.g. 'HTTP_X_FORWARDED_FOR'), which is the
+    one the proxy itself appended. Earlier entries are client-supplied.
+    """
+    header = getattr(settings, 'RATE_LIMIT_IP_HEADER', None)
+    if header:
+        forwarded = request.META.get(header, '').rsplit(',', 1)[-1].strip()
+        if forwarded:
+            return forwarded
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _user_key(request):
+    user = request.user
+    return f'user:{user.pk}' if user.is_authenticated else f'ip:{client_ip(request)}'
+
+
+KEYS = {
+    'ip': lambda request: f'ip:{client_ip(request)}',
+    'user': _user_key,
+    'endpoint': lambda request: 'all',
+}
+
+
+def check(request, name, limit):
+    """None if ``request`` may proceed under ``limit``, else the 429 response."""
+    if not limit.applies_to(request):
+        return None
+    wait = backend().hit(f'{KEY_PREFIX}:{name}:{KEYS[limit.key](request)}', limit)
+    if not wait:
+        return None
+    response = JsonResponse({'error': 'Too many requests. Try again later.'}, status=429)
+    response['Retry-After'] = str(math.ceil(wait))
+    return response
+
+
+# (RATE_LIMITS dict, parsed limits), rebuilt when the setting is replaced.
+_configured = (None, {})
+
+
+def configured_limits():
+    global _configured
+    limits = getattr(settings, 'RATE_LIMITS', {})
+    if _configured[0] is not limits:
+        _configured = (limits, {name: Limit(**options) for name, options in limits.items()})
+    return _configured[1]
+
+
+class RateLimitMiddleware:
+    """Apply RATE_LIMITS to the view each request resolves to. Must come after AuthenticationMiddleware."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # The handler runs this in a worker thread for async requests, so
+        # resolving request.user here is safe either way.
+        name = request.resolver_match.url_name if request.resolver_match else None
+        limit = configured_limits().get(name)
+        if limit is None:
+            return None
+        return check(request, name, limit)
+
+
+def ratelimit(rate, burst=None, key='ip', methods=None, name=None):
+    """Rate limit one view; ``name`` names its buckets (defaults to the view's qualified name)."""
+    limit = Limit(rate, burst, key, methods)
+
+    def decorator(view):
+        bucket = name or f'{view.__module__}.{view.__qualname__}'
+
+        if iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                response = await sync_to_async(check)(request, bucket, limit)
+                return response or await view(request, *args, **kwargs)
+        else:
+            @functools.wraps(view)
+            def wrapper(request, *args, **kwargs):
+                return check(request, bucket, limit) or view(request, *args, **kwargs)
+        return wrapper
+    return decorator
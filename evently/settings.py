@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -20,6 +20,9 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Resized JPEG/WebP copies of uploaded vendor images (vendors/images.py)
+IMAGE_DERIVATIVE_WIDTHS = (320, 640, 1280)
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
 
@@ -38,6 +41,7 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'vendors',
     'events',
+    'jobs',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -50,10 +54,14 @@ AUTH_USER_MODEL = 'users.User'
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'evently.db_router.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.tokens.BearerTokenMiddleware',
+    'evently.ratelimit.RateLimitMiddleware',
+    'evently.concurrency.ConcurrencyLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -90,6 +98,119 @@ DATABASES = {
     }
 }
 
+# Read replicas (evently/db_router.py). Every alias in REPLICA_DATABASES must
+# also be defined in DATABASES; safe requests read from one of them unless the
+# client wrote within the last DATABASE_STICKY_SECONDS. Locally, list SQLite
+# files in DATABASE_REPLICAS and refresh them with `manage.py sync_sqlite_replicas`.
+REPLICA_DATABASES = []
+for number, name in enumerate(config('DATABASE_REPLICAS', default='', cast=Csv()), start=1):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / name,
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['evently.db_router.PrimaryReplicaRouter']
+DATABASE_STICKY_SECONDS = config('DATABASE_STICKY_SECONDS', default=5, cast=int)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Local memory by default; point CACHE_BACKEND at
+# django.core.cache.backends.filebased.FileBasedCache (with CACHE_LOCATION set
+# to a directory) to share the cache between worker processes.
+
+CACHE_BACKEND = config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': config('CACHE_LOCATION', default='evently'),
+    }
+}
+# Whether every worker process sees the same cache entries.
+SHARED_CACHE = CACHE_BACKEND not in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Versioned catalog response cache (vendors/cache.py)
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=300, cast=int)
+
+# With a shared cache, sessions are read from the cache and written through
+# to the database, and the logged-in user is cached by
+# users.backends.CachedModelBackend, so an authenticated request needs no
+# queries before the view runs. Logout, password and role changes only clear
+# those entries in the cache they were made through: with a per-process cache
+# (LocMemCache) other workers would keep authenticating a logged-out session
+# or an outdated user, so sessions and users are then read from the database.
+SESSION_ENGINE = config(
+    'SESSION_ENGINE',
+    default='django.contrib.sessions.backends.cached_db' if SHARED_CACHE else 'django.contrib.sessions.backends.db',
+)
+SESSION_CACHE_ALIAS = 'default'
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend' if SHARED_CACHE else 'django.contrib.auth.backends.ModelBackend',
+]
+USER_CACHE_ALIAS = 'default'
+USER_CACHE_TIMEOUT = config('USER_CACHE_TIMEOUT', default=300, cast=int)
+
+# Signed bearer tokens for API clients (users/tokens.py). API_TOKEN_KEYS is a
+# comma-separated list of "kid:secret"; the first signs, all are accepted.
+API_TOKEN_KEYS = config('API_TOKEN_KEYS', default='', cast=Csv())
+API_ACCESS_TOKEN_SECONDS = config('API_ACCESS_TOKEN_SECONDS', default=15 * 60, cast=int)
+API_REFRESH_TOKEN_SECONDS = config('API_REFRESH_TOKEN_SECONDS', default=14 * 24 * 60 * 60, cast=int)
+
+# Token-bucket rate limits by URL name (evently/ratelimit.py). The local
+# backend counts per worker process; use evently.ratelimit.CacheBackend with a
+# cache shared between workers to enforce the limits across all of them.
+RATE_LIMIT_BACKEND = config('RATE_LIMIT_BACKEND', default='evently.ratelimit.LocalBackend')
+RATE_LIMIT_CACHE_ALIAS = 'default'
+# Behind a reverse proxy every request has the proxy's REMOTE_ADDR, so all
+# clients would share one 'ip' bucket. Set this to the META key of the header
+# the proxy appends the client address to (e.g. HTTP_X_FORWARDED_FOR), and
+# only when every request arrives through that proxy: otherwise clients can
+# pick their own address.
+RATE_LIMIT_IP_HEADER = config('RATE_LIMIT_IP_HEADER', default='')
+RATE_LIMITS = {
+    'login': {'rate': '10/m', 'key': 'ip', 'methods': ['POST']},
+    'issue_token': {'rate': '10/m', 'key': 'ip', 'methods': ['POST']},
+    'create_booking': {'rate': '30/m', 'burst': 10, 'key': 'user', 'methods': ['POST']},
+    'reviews': {'rate': '10/h', 'burst': 3, 'key': 'user', 'methods': ['POST']},
+    'vendor-search': {'rate': '60/m', 'burst': 20, 'key': 'ip'},
+    'vendors': {'rate': '120/m', 'burst': 40, 'key': 'ip'},
+    'async-vendors': {'rate': '120/m', 'burst': 40, 'key': 'ip'},
+}
+
+# Adaptive per-worker concurrency limit (evently/concurrency.py). Requests
+# over the limit are shed with a 503 by priority; unlisted writes are
+# 'critical' and unlisted reads 'normal'.
+CONCURRENCY_LIMIT = {
+    'INITIAL': config('CONCURRENCY_LIMIT_INITIAL', default=20, cast=int),
+    'MIN': 4,
+    'MAX': config('CONCURRENCY_LIMIT_MAX', default=200, cast=int),
+}
+CONCURRENCY_PRIORITIES = {
+    'create_booking': 'critical',
+    'patch_booking': 'critical',
+    'concurrency-stats': 'critical',
+    'perf': 'critical',
+    'vendors-page': 'low',
+    'categories': 'low',
+    'async-categories': 'low',
+}
+
+# Opt-in request profiling (evently/profiling.py): query counts, DB time,
+# repeated queries, serializer and template time per request, sent in a
+# Server-Timing header and summarised for staff at /_perf/.
+PROFILE_REQUESTS = config('PROFILE_REQUESTS', default=False, cast=bool)
+PROFILE_BUFFER_SIZE = config('PROFILE_BUFFER_SIZE', default=500, cast=int)
+if PROFILE_REQUESTS:
+    MIDDLEWARE.insert(0, 'evently.profiling.ProfilingMiddleware')
+    TEMPLATES[0]['BACKEND'] = 'evently.profiling.ProfiledDjangoTemplates'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -131,6 +252,17 @@ STATICFILES_DIRS = [BASE_DIR / "static"]
 # Authentication
 LOGIN_URL = '/users/login/'
 
+# Background jobs (jobs/queue.py), processed by `manage.py run_workers`.
+# JOBS_EAGER runs them in-process after commit instead; it is on by default
+# in DEBUG so a development setup without workers still updates the search
+# index, image derivatives and vendor stats.
+JOBS_EAGER = config('JOBS_EAGER', default=DEBUG, cast=bool)
+JOBS_LEASE_TIMEOUT = config('JOBS_LEASE_TIMEOUT', default=600, cast=int)
+
+# Vendor search (vendors/search.py). Use vendors.search.DatabaseSearchBackend
+# on databases without SQLite FTS5.
+VENDOR_SEARCH_BACKEND = config('VENDOR_SEARCH_BACKEND', default='vendors.search.SQLiteFTS5Backend')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
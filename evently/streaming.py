@@ -0,0 +1,64 @@
+"""
+Incremental JSON / NDJSON responses for large listings.
+
+Rows are pulled from the database with ``QuerySet.iterator(chunk_size=...)``
+and encoded one at a time, so memory stays flat and the first bytes go out as
+soon as the first chunk is fetched, however many rows match.
+
+Clients choose the mode per request:
+  * ``?format=ndjson`` or ``Accept: application/x-ndjson`` - one JSON object per line
+  * ``?stream=1`` - the endpoint's usual JSON document, streamed
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+
+CHUNK_SIZE = 500
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+
+def wants_ndjson(request):
+    return request.GET.get('format') == 'ndjson' or NDJSON_CONTENT_TYPE in request.headers.get('Accept', '')
+
+
+def wants_stream(request):
+    return wants_ndjson(request) or request.GET.get('stream') == '1'
+
+
+def response_format(request):
+    """The body format negotiated for ``request``: 'ndjson', 'stream' (streamed JSON) or 'json'."""
+    if wants_ndjson(request):
+        return 'ndjson'
+    return 'stream' if wants_stream(request) else 'json'
+
+
+def _encode(value):
+    return json.dumps(value, cls=DjangoJSONEncoder)
+
+
+def iter_json_array(rows, serialize, key=None):
+    """Yield a JSON array (or ``{"<key>": [...]}``) piece by piece."""
+    yield '{%s: [' % _encode(key) if key else '['
+    first = True
+    for row in rows:
+        yield ('' if first else ',') + _encode(serialize(row))
+        first = False
+    yield ']}' if key else ']'
+
+
+def iter_ndjson(rows, serialize):
+    for row in rows:
+        yield _encode(serialize(row)) + '\n'
+
+
+def stream_response(request, queryset, serialize, key=None, chunk_size=CHUNK_SIZE):
+    rows = queryset.iterator(chunk_size=chunk_size)
+    if wants_ndjson(request):
+        response = StreamingHttpResponse(iter_ndjson(rows, serialize), content_type=NDJSON_CONTENT_TYPE)
+    else:
+        response = StreamingHttpResponse(iter_json_array(rows, serialize, key), content_type='application/json')
+    patch_vary_headers(response, ['Accept'])
+    return response
@@ -0,0 +1,190 @@
+import threading
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.http import JsonResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from users.models import User
+from . import concurrency, ratelimit
+
+
+class TakeTests(SimpleTestCase):
+    def test_bucket_allows_burst_then_refills(self):
+        state = None
+        for _ in range(3):
+            state, wait = ratelimit.take(state, 3, 1, now=100)
+            self.assertEqual(wait, 0)
+        state, wait = ratelimit.take(state, 3, 1, now=100)
+        self.assertEqual(wait, 1)
+        state, wait = ratelimit.take(state, 3, 1, now=100.5)
+        self.assertAlmostEqual(wait, 0.5)
+        state, wait = ratelimit.take(state, 3, 1, now=101)
+        self.assertEqual(wait, 0)
+
+    def test_bucket_never_holds_more_than_capacity(self):
+        state, _ = ratelimit.take(None, 2, 1, now=0)
+        state, _ = ratelimit.take(state, 2, 1, now=1000)
+        self.assertEqual(state, (1, 1000))
+
+    def test_invalid_limits_are_rejected(self):
+        for options in ({'rate': '10'}, {'rate': '10/w'}, {'rate': '10/m', 'key': 'session'}):
+            with self.assertRaises(ValueError):
+                ratelimit.Limit(**options)
+
+
+@override_settings(RATE_LIMIT_BACKEND='evently.ratelimit.LocalBackend', RATE_LIMIT_IP_HEADER='')
+class CheckTests(TestCase):
+    def setUp(self):
+        ratelimit._backend.cache_clear()
+        self.factory = RequestFactory()
+
+    def request(self, method='get', ip='10.0.0.1', user=None, **extra):
+        request = getattr(self.factory, method)('/', REMOTE_ADDR=ip, **extra)
+        request.user = user or AnonymousUser()
+        return request
+
+    def test_empty_bucket_answers_429_with_retry_after(self):
+        limit = ratelimit.Limit('2/m')
+        self.assertIsNone(ratelimit.check(self.request(), 'test', limit))
+        self.assertIsNone(ratelimit.check(self.request(), 'test', limit))
+        response = ratelimit.check(self.request(), 'test', limit)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        # Another client has its own bucket.
+        self.assertIsNone(ratelimit.check(self.request(ip='10.0.0.2'), 'test', limit))
+
+    def test_only_listed_methods_are_limited(self):
+        limit = ratelimit.Limit('1/m', methods=['post'])
+        self.assertIsNone(ratelimit.check(self.request('post'), 'test', limit))
+        self.assertEqual(ratelimit.check(self.request('post'), 'test', limit).status_code, 429)
+        self.assertIsNone(ratelimit.check(self.request('get'), 'test', limit))
+
+    def test_user_key_falls_back_to_ip_for_anonymous_requests(self):
+        limit = ratelimit.Limit('1/m', key='user')
+        user = User.objects.create_user('planner', 'planner@example.com', 'pw')
+        self.assertIsNone(ratelimit.check(self.request(user=user), 'test', limit))
+        self.assertIsNone(ratelimit.check(self.request(), 'test', limit))
+        self.assertEqual(ratelimit.check(self.request(ip='10.0.0.9', user=user), 'test', limit).status_code, 429)
+        self.assertEqual(ratelimit.check(self.request(), 'test', limit).status_code, 429)
+
+    def test_forwarded_address_is_used_only_when_configured(self):
+        request = self.request(HTTP_X_FORWARDED_FOR='1.1.1.1, 2.2.2.2')
+        self.assertEqual(ratelimit.client_ip(request), '10.0.0.1')
+        with override_settings(RATE_LIMIT_IP_HEADER='HTTP_X_FORWARDED_FOR'):
+            self.assertEqual(ratelimit.client_ip(request), '2.2.2.2')
+            self.assertEqual(ratelimit.client_ip(self.request()), '10.0.0.1')
+
+    def test_decorator_limits_sync_and_async_views(self):
+        @ratelimit.ratelimit('1/m', name='sync-view')
+        def view(request):
+            return JsonResponse({})
+
+        @ratelimit.ratelimit('1/m', name='async-view')
+        async def async_view(request):
+            return JsonResponse({})
+
+        self.assertEqual(view(self.request()).status_code, 200)
+        self.assertEqual(view(self.request()).status_code, 429)
+        self.assertEqual(async_to_sync(async_view)(self.request()).status_code, 200)
+        self.assertEqual(async_to_sync(async_view)(self.request()).status_code, 429)
+
+    @override_settings(RATE_LIMITS={'login': {'rate': '1/m', 'methods': ['POST']}})
+    def test_middleware_applies_configured_limits_by_url_name(self):
+        self.assertNotEqual(self.client.post('/users/login/').status_code, 429)
+        response = self.client.post('/users/login/')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertNotEqual(self.client.get('/users/login/').status_code, 429)
+
+
+@override_settings(CONCURRENCY_LIMIT={'INITIAL': 4, 'MIN': 1, 'LOW_SHARE': 0.5, 'QUEUE_SIZE': 1, 'QUEUE_TIMEOUT': 0.05})
+class LimiterTests(SimpleTestCase):
+    def setUp(self):
+        self.limiter = concurrency.Limiter()
+
+    def fill(self, count, priority=concurrency.NORMAL):
+        return [self.limiter.acquire(priority) for _ in range(count)]
+
+    def test_requests_are_admitted_up_to_the_limit(self):
+        self.assertTrue(all(started is not None for started in self.fill(4)))
+        self.assertIsNone(self.limiter.acquire(concurrency.NORMAL))
+        self.assertEqual(self.limiter.stats()['admitted'][concurrency.NORMAL], 4)
+        self.assertEqual(self.limiter.stats()['shed'][concurrency.NORMAL], 1)
+
+    def test_low_priority_requests_are_shed_first(self):
+        self.fill(2)
+        self.assertIsNone(self.limiter.acquire(concurrency.LOW))
+        self.assertIsNotNone(self.limiter.acquire(concurrency.NORMAL))
+
+    def test_critical_request_waits_for_a_released_slot(self):
+        started = self.fill(4)
+        timer = threading.Timer(0.01, self.limiter.release, [started[0]])
+        timer.start()
+        with override_settings(CONCURRENCY_LIMIT={'INITIAL': 4, 'MIN': 1, 'QUEUE_TIMEOUT': 5}):
+            self.assertIsNotNone(self.limiter.acquire(concurrency.CRITICAL))
+        timer.join()
+        self.assertEqual((self.limiter.in_flight, self.limiter.queued), (4, 0))
+
+    def test_critical_request_times_out_in_the_queue(self):
+        self.fill(4)
+        self.assertIsNone(self.limiter.acquire(concurrency.CRITICAL))
+        self.assertIsNone(async_to_sync(self.limiter.aacquire)(concurrency.CRITICAL))
+        stats = self.limiter.stats()
+        self.assertEqual((stats['queue_timeouts'], stats['queued']), (2, 0))
+
+    def test_critical_request_is_shed_when_the_queue_is_full(self):
+        self.fill(4)
+        self.limiter.queued = 1
+        self.assertIsNone(self.limiter.acquire(concurrency.CRITICAL))
+        self.assertEqual(self.limiter.timed_out, 0)
+
+
+@override_settings(CONCURRENCY_LIMIT={'INITIAL': 4, 'MIN': 1})
+class ConcurrencyMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(concurrency, 'limiter', concurrency.Limiter())
+        self.limiter = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.request = RequestFactory().get('/')
+
+    def test_plain_response_releases_its_slot_when_returned(self):
+        def get_response(request):
+            self.assertIsNone(middleware.process_view(request, None, (), {}))
+            self.assertEqual(self.limiter.in_flight, 1)
+            return JsonResponse({})
+
+        middleware = concurrency.ConcurrencyLimitMiddleware(get_response)
+        middleware(self.request)
+        self.assertEqual(self.limiter.in_flight, 0)
+
+    def test_streaming_response_holds_its_slot_until_closed(self):
+        def get_response(request):
+            middleware.process_view(request, None, (), {})
+            return StreamingHttpResponse(iter(['a', 'b']))
+
+        middleware = concurrency.ConcurrencyLimitMiddleware(get_response)
+        response = middleware(self.request)
+        self.assertEqual(b''.join(response.streaming_content), b'ab')
+        self.assertEqual(self.limiter.in_flight, 1)
+        response.close()
+        response.close()
+        self.assertEqual(self.limiter.in_flight, 0)
+
+    def test_async_streaming_response_holds_its_slot_until_closed(self):
+        async def get_response(request):
+            await middleware.process_view(request, None, (), {})
+            return StreamingHttpResponse(iter(['a']))
+
+        middleware = concurrency.ConcurrencyLimitMiddleware(get_response)
+        response = async_to_sync(middleware)(self.request)
+        self.assertEqual(self.limiter.in_flight, 1)
+        response.close()
+        self.assertEqual(self.limiter.in_flight, 0)
+
+    def test_shed_request_gets_503_with_retry_after(self):
+        self.limiter.in_flight = 4
+        response = self.client.get('/vendors/categories/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(self.limiter.in_flight, 4)
@@ -18,6 +18,7 @@ from django.contrib import admin
 from django.urls import path, include
 from evently import settings
 from users.views import index
+from evently import concurrency, profiling
 from django.conf.urls.static import static
 
 urlpatterns = [
@@ -26,6 +27,11 @@ urlpatterns = [
     path('users/', include('users.urls')),
     path('vendors/', include('vendors.urls')),
     path('events/', include('events.urls')),
+    path('_concurrency/', concurrency.stats_view, name='concurrency-stats'),
+    path('_perf/', profiling.perf_view, name='perf'),
+    # Async read endpoints for ASGI deployments; same responses as above.
+    path('async/vendors/', include('vendors.async_urls')),
+    path('async/events/', include('events.async_urls')),
 ]
 
 if settings.DEBUG:
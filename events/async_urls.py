@@ -0,0 +1,7 @@
+from django.urls import path
+from . import async_views
+
+urlpatterns = [
+    path("", async_views.event_list, name="async_event_list"),
+    path("<int:id>/guests/", async_views.event_guests, name="async_event_guests"),
+]
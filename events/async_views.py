@@ -0,0 +1,94 @@
+"""
+Async versions of the read-only event endpoints, mounted under /async/events/.
+
+They return the same JSON as their counterparts in views.py but run on the
+event loop under ASGI, using request.auser() and the async ORM instead of a
+sync_to_async hop per request. Independent queries run concurrently through
+evently.aio.gather().
+"""
+from django.contrib.auth.decorators import login_required
+from django.db.models import Count, Max
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_GET
+from .models import Event, Guest
+from .serializers import guest_queryset, serialize_event_summary, serialize_guest
+from evently import aio
+from evently.conditional import acondition, make_etag
+from evently.pagination import InvalidCursor, apaginate, paginate
+
+
+@require_GET
+@login_required
+async def event_list(request):
+    events = Event.objects.all()
+
+    date = request.GET.get('date')
+    location = request.GET.get('location')
+    planner_id = request.GET.get('planner_id')
+    mine = request.GET.get('mine')
+
+    if date:
+        events = events.filter(date__date=date)
+    if location:
+        events = events.filter(location__icontains=location)
+    if planner_id:
+        events = events.filter(planner__id=planner_id)
+    if mine == '1':
+        events = events.filter(planner=await request.auser())
+
+    try:
+        page = await apaginate(request, events, keys=('date', 'id'))
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    if page is not None:
+        events = page.items
+    else:
+        events = [event async for event in events]
+
+    data = {'events': [serialize_event_summary(event) for event in events]}
+    if page is not None:
+        data['next'] = page.next_cursor
+    return JsonResponse(data, status=200)
+
+
+async def _event_guests_etag(request, id):
+    row = await (
+        Event.objects.filter(id=id)
+        .values('updated_at')
+        .annotate(
+            guest_count=Count('guests'),
+            latest=Max('guests__updated_at'),
+            # Deleting a linked user unlinks its guests with an UPDATE that
+            # leaves guests.updated_at alone.
+            linked_users=Count('guests__user'),
+            users_updated=Max('guests__user__updated_at'),
+        )
+        .order_by('id')
+        .afirst()
+    )
+    if row is None:
+        return None
+    return make_etag(request, *row.values())
+
+
+@require_GET
+@login_required
+@acondition(etag_func=_event_guests_etag)
+async def event_guests(request, id):
+    guests = guest_queryset(Guest.objects.filter(event_id=id))
+
+    def fetch_guests():
+        page = paginate(request, guests)
+        return page if page is not None else list(guests)
+
+    try:
+        # The event check and the guest query are independent; run them together.
+        exists, result = await aio.gather(Event.objects.filter(id=id).exists, fetch_guests)
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    if not exists:
+        raise Http404('No Event matches the given query.')
+
+    if isinstance(result, list):
+        return JsonResponse([serialize_guest(guest) for guest in result], safe=False)
+    return JsonResponse({'guests': [serialize_guest(guest) for guest in result.items], 'next': result.next_cursor})
@@ -0,0 +1,99 @@
+"""
+Denormalized guest and booking counters on Event.
+
+Every change is applied as a single UPDATE with F() expressions, so concurrent
+writers never overwrite each other's counts. Changes are described as
+(old status, new status) transitions: old is None for a row being added and
+new is None for a row being removed. reconcile() recomputes the counters from
+the source tables for repairs and audits.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F
+from .models import Event, Guest, VendorBooking
+
+GUEST_FIELDS = {status: f'guests_{status}_count' for status, _ in Guest.RSVP_CHOICES}
+BOOKING_FIELDS = {status: f'bookings_{status}_count' for status, _ in VendorBooking.STATUS_CHOICES}
+
+COUNTER_FIELDS = Event.COUNTER_FIELDS
+
+
+def _deltas(transitions, total_field, status_fields):
+    deltas = Counter()
+    for (old, new), n in Counter(transitions).items():
+        if old == new:
+            continue
+        if old is None:
+            deltas[total_field] += n
+        elif old in status_fields:
+            deltas[status_fields[old]] -= n
+        if new is None:
+            deltas[total_field] -= n
+        elif new in status_fields:
+            deltas[status_fields[new]] += n
+    return deltas
+
+
+def apply(event_id, deltas):
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if changes:
+        Event.objects.filter(pk=event_id).update(**changes)
+
+
+def record_guests(event_id, transitions):
+    """Apply (old rsvp_status, new rsvp_status) pairs to the event's guest counters."""
+    apply(event_id, _deltas(transitions, 'guests_count', GUEST_FIELDS))
+
+
+def record_bookings(event_id, transitions):
+    """Apply (old status, new status) pairs to the event's booking counters."""
+    apply(event_id, _deltas(transitions, 'bookings_count', BOOKING_FIELDS))
+
+
+def compute_counters(event_ids):
+    """Recompute every counter field from the source tables for the given events."""
+    counters = {event_id: {field: 0 for field in COUNTER_FIELDS} for event_id in event_ids}
+    sources = (
+        (Guest, 'rsvp_status', 'guests_count', GUEST_FIELDS),
+        (VendorBooking, 'status', 'bookings_count', BOOKING_FIELDS),
+    )
+    for model, status_field, total_field, status_fields in sources:
+        rows = (
+            model.objects.filter(event_id__in=event_ids)
+            .order_by()
+            .values('event_id', status_field)
+            .annotate(n=Count('pk'))
+        )
+        for row in rows:
+            entry = counters[row['event_id']]
+            entry[total_field] += row['n']
+            field = status_fields.get(row[status_field])
+            if field:
+                entry[field] += row['n']
+    return counters
+
+
+def reconcile(queryset=None, batch_size=500, verify_only=False):
+    """Rebuild (or just compare) stored counters; returns the ids of events that were out of date."""
+    if queryset is None:
+        queryset = Event.objects.all()
+    stale = []
+    ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(ids), batch_size):
+        batch_ids = ids[start:start + batch_size]
+        with transaction.atomic():
+            # Lock the rows first so no F() update lands between counting and writing.
+            events = list(Event.objects.filter(pk__in=batch_ids).only(*COUNTER_FIELDS).select_for_update())
+            expected = compute_counters(batch_ids)
+            changed = []
+            for event in events:
+                values = expected[event.pk]
+                if any(getattr(event, field) != values[field] for field in COUNTER_FIELDS):
+                    stale.append(event.pk)
+                    for field in COUNTER_FIELDS:
+                        setattr(event, field, values[field])
+                    changed.append(event)
+            if changed and not verify_only:
+                Event.objects.bulk_update(changed, COUNTER_FIELDS)
+    return stale
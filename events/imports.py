@@ -0,0 +1,166 @@
+"""
+Bulk guest import.
+
+Rows are read lazily from a CSV or NDJSON stream and written in batches, so an
+import holds at most one batch in memory however long the file is. For each
+batch, existing guests of the event and matching users are looked up with one
+set-based query each, then the new guests are inserted with bulk_create() and
+the event's counters are moved by the same transaction (bulk_create() sends
+no signals).
+"""
+import codecs
+import csv
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models.functions import Lower
+from users.models import User
+from .models import Guest
+from . import counters
+
+BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+FORMATS = ('csv', 'ndjson')
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def detect_format(requested, filename=None, content_type=None):
+    if requested:
+        if requested not in FORMATS:
+            raise ImportFormatError(f"Unsupported format '{requested}'. Use csv or ndjson.")
+        return requested
+    name = (filename or '').lower()
+    content_type = (content_type or '').lower()
+    if name.endswith(('.ndjson', '.jsonl')) or 'ndjson' in content_type or 'jsonl' in content_type:
+        return 'ndjson'
+    return 'csv'
+
+
+def text_lines(stream):
+    """Decode an iterable of byte lines (an upload or the request itself) as it is read."""
+    return codecs.iterdecode(stream, 'utf-8-sig')
+
+
+def read_rows(lines, fmt):
+    """Yield (row number, dict or error message) pairs."""
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        if not reader.fieldnames or 'email' not in [name.strip().lower() for name in reader.fieldnames]:
+            raise ImportFormatError("CSV input needs a header row with at least an 'email' column.")
+        for number, row in enumerate(reader, start=2):
+            if None in row:
+                # DictReader files the fields past the header under the key None.
+                yield number, 'Too many columns.'
+                continue
+            yield number, {
+                (key or '').strip().lower(): value.strip() if isinstance(value, str) else ''
+                for key, value in row.items()
+            }
+    else:
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield number, 'Invalid JSON.'
+                continue
+            if not isinstance(row, dict):
+                yield number, 'Each line must be a JSON object.'
+                continue
+            yield number, {key.lower(): str(value).strip() for key, value in row.items() if value is not None}
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.skipped = 0
+        self.errors = []
+        self.errors_truncated = False
+
+    def error(self, row, message, email=None):
+        self.skipped += 1
+        if len(self.errors) >= MAX_REPORTED_ERRORS:
+            self.errors_truncated = True
+            return
+        self.errors.append({'row': row, 'email': email, 'error': message})
+
+    def as_dict(self):
+        return {
+            'created': self.created,
+            'skipped': self.skipped,
+            'errors': self.errors,
+            'errors_truncated': self.errors_truncated,
+        }
+
+
+def import_guests(event, rows, batch_size=BATCH_SIZE):
+    valid_statuses = dict(Guest.RSVP_CHOICES)
+    report = ImportReport()
+    batch = {}
+
+    for number, row in rows:
+        if isinstance(row, str):
+            report.error(number, row)
+            continue
+        email = row.get('email', '').lower()
+        try:
+            validate_email(email)
+        except ValidationError:
+            report.error(number, 'A valid email is required.', email or None)
+            continue
+        rsvp_status = row.get('rsvp_status') or 'invited'
+        if rsvp_status not in valid_statuses:
+            report.error(number, f"Invalid rsvp_status '{rsvp_status}'.", email)
+            continue
+        if email in batch:
+            report.error(number, 'Duplicate email in this file.', email)
+            continue
+        batch[email] = (number, row.get('name') or None, rsvp_status)
+        if len(batch) >= batch_size:
+            _write_batch(event, batch, report)
+            batch = {}
+
+    if batch:
+        _write_batch(event, batch, report)
+    return report
+
+
+def _write_batch(event, batch, report):
+    emails = list(batch)
+    existing = set(
+        Guest.objects.filter(event=event)
+        .annotate(email_lower=Lower('email'))
+        .filter(email_lower__in=emails)
+        .values_list('email_lower', flat=True)
+    )
+    users = {}
+    matches = (
+        User.objects.annotate(email_lower=Lower('email'))
+        .filter(email_lower__in=emails)
+        .order_by('-id')
+    )
+    for user in matches:
+        # Ordered newest first so the oldest account wins when emails collide.
+        users[user.email_lower] = user
+
+    guests = []
+    for email, (number, name, rsvp_status) in batch.items():
+        if email in existing:
+            report.error(number, 'Already on the guest list.', email)
+            continue
+        user = users.get(email)
+        if user is not None:
+            name = user.get_full_name() or user.username
+        guests.append(Guest(event=event, user=user, name=name, email=email, rsvp_status=rsvp_status))
+
+    with transaction.atomic():
+        Guest.objects.bulk_create(guests)
+        counters.record_guests(event.pk, [(None, guest.rsvp_status) for guest in guests])
+    report.created += len(guests)
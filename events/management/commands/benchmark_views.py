@@ -0,0 +1,108 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from events.models import Event
+from users.models import User
+from vendors.models import VendorProfile
+
+# (path, who) for each read endpoint that has an async version under /async/.
+ENDPOINTS = [
+    ('/events/', 'planner'),
+    ('/events/{event}/guests/', 'planner'),
+    ('/vendors/', 'planner'),
+    ('/vendors/categories/', 'planner'),
+    ('/vendors/{vendor}/', 'planner'),
+    ('/vendors/dashboard/bookings/', 'vendor'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare throughput of the read endpoints served by the sync views through the WSGI "
+        "handler, the sync views through the ASGI handler, and the async views under /async/."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--planner', required=True, help="Username to make planner requests as.")
+        parser.add_argument('--vendor', help="Username to make vendor requests as (defaults to the first vendor).")
+        parser.add_argument('--requests', type=int, default=200, help="Requests per endpoint and mode.")
+        parser.add_argument('--concurrency', type=int, default=10, help="Requests in flight at once.")
+
+    def handle(self, *args, **options):
+        # The test clients send Host: testserver.
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            self.benchmark(options)
+
+    def benchmark(self, options):
+        planner = User.objects.filter(username=options['planner']).first()
+        if planner is None:
+            raise CommandError(f"No user named {options['planner']}.")
+        vendor_users = User.objects.filter(is_vendor=True, vendor_profile__isnull=False)
+        if options['vendor']:
+            vendor_users = vendor_users.filter(username=options['vendor'])
+        users = {'planner': planner, 'vendor': vendor_users.order_by('id').first()}
+        ids = {
+            'event': Event.objects.filter(planner=planner).order_by('id').values_list('id', flat=True).first(),
+            'vendor': VendorProfile.objects.order_by('id').values_list('id', flat=True).first(),
+        }
+
+        rows = []
+        for template, who in ENDPOINTS:
+            try:
+                path = template.format(**ids)
+            except KeyError:
+                continue
+            if users[who] is None or 'None' in path:
+                self.stdout.write(f"Skipping {template}: no {who} or sample data.")
+                continue
+            rows.append((
+                path,
+                self.run_wsgi(path, users[who], options),
+                asyncio.run(self.run_asgi(path, users[who], options)),
+                asyncio.run(self.run_asgi('/async' + path, users[who], options)),
+            ))
+
+        self.stdout.write(f"{options['requests']} requests per cell, concurrency {options['concurrency']} (requests/second)")
+        self.stdout.write(f"{'endpoint':40} {'WSGI sync':>12} {'ASGI sync':>12} {'ASGI async':>12}")
+        for path, wsgi, asgi_sync, asgi_async in rows:
+            self.stdout.write(f"{path:40} {wsgi:12.1f} {asgi_sync:12.1f} {asgi_async:12.1f}")
+
+    def run_wsgi(self, path, user, options):
+        def worker(count):
+            client = Client()
+            client.force_login(user)
+            for _ in range(count):
+                self.check_response(path, client.get(path))
+            close_old_connections()
+
+        batches = self.split(options['requests'], options['concurrency'])
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(batches)) as pool:
+            list(pool.map(worker, batches))
+        return options['requests'] / (time.perf_counter() - started)
+
+    async def run_asgi(self, path, user, options):
+        async def worker(count):
+            client = AsyncClient()
+            await client.aforce_login(user)
+            for _ in range(count):
+                self.check_response(path, await client.get(path))
+
+        batches = self.split(options['requests'], options['concurrency'])
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(count) for count in batches))
+        return options['requests'] / (time.perf_counter() - started)
+
+    def check_response(self, path, response):
+        if response.status_code != 200:
+            raise CommandError(f"GET {path} returned {response.status_code}.")
+
+    def split(self, total, parts):
+        parts = max(1, min(parts, total))
+        return [total // parts + (1 if index < total % parts else 0) for index in range(parts)]
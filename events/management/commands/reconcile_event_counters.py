@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from events.counters import reconcile
+from events.models import Event
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized guest and booking counters on Event from the source tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', type=int, action='append', dest='event_ids',
+                            help="Only process this event id (may be repeated).")
+        parser.add_argument('--verify', action='store_true',
+                            help="Report events whose stored counters are stale without changing them.")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        events = Event.objects.all()
+        if options['event_ids']:
+            events = events.filter(pk__in=options['event_ids'])
+
+        stale = reconcile(events, batch_size=options['batch_size'], verify_only=options['verify'])
+
+        if options['verify']:
+            if stale:
+                raise CommandError(f"{len(stale)} event(s) have stale counters: {', '.join(map(str, stale))}")
+            self.stdout.write(self.style.SUCCESS("All event counters are up to date."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Reconciled counters for {len(stale)} event(s)."))
@@ -0,0 +1,30 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = "Copy the primary SQLite database into each replica file (local stand-in for replication)."
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        if primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError("Only SQLite databases can be copied; real replicas replicate themselves.")
+        if not settings.REPLICA_DATABASES:
+            raise CommandError("No replicas configured. Set DATABASE_REPLICAS.")
+
+        source = sqlite3.connect(str(primary['NAME']))
+        try:
+            for alias in settings.REPLICA_DATABASES:
+                target = sqlite3.connect(str(settings.DATABASES[alias]['NAME']))
+                try:
+                    # The backup API takes a consistent snapshot even while the primary is in use.
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f"Synced {alias} from {primary['NAME']}.")
+        finally:
+            source.close()
+        self.stdout.write(self.style.SUCCESS(f"Synced {len(settings.REPLICA_DATABASES)} replica(s)."))
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.1 on 2026-10-18 03:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_initial'),
+        ('vendors', '0003_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['date', 'id'], name='event_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='guest',
+            index=models.Index(fields=['event', 'created_at', 'id'], name='guest_event_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendorbooking',
+            index=models.Index(fields=['event', 'created_at', 'id'], name='booking_event_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendorbooking',
+            index=models.Index(fields=['vendor', 'created_at', 'id'], name='booking_vendor_created_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.1 on 2026-10-18 03:37
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0003_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='guest',
+            index=models.Index(models.F('event'), django.db.models.functions.text.Lower('email'), name='guest_event_email_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.1 on 2026-10-18 03:54
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_bookings(apps, schema_editor):
+    # Keep the first booking of each (event, vendor, service) so the unique
+    # constraint can be created.
+    VendorBooking = apps.get_model('events', 'VendorBooking')
+    duplicates = (
+        VendorBooking.objects.values('event_id', 'vendor_id', 'service_id')
+        .annotate(n=Count('pk'), keep=Min('pk'))
+        .filter(n__gt=1)
+        .order_by()
+    )
+    for row in duplicates:
+        VendorBooking.objects.filter(
+            event_id=row['event_id'], vendor_id=row['vendor_id'], service_id=row['service_id'],
+        ).exclude(pk=row['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0004_guest_email_index'),
+        ('vendors', '0007_unique_reviews'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['planner', 'date', 'id'], name='event_planner_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='guest',
+            index=models.Index(fields=['event', 'rsvp_status'], name='guest_event_rsvp_idx'),
+        ),
+        migrations.RunPython(remove_duplicate_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='vendorbooking',
+            constraint=models.UniqueConstraint(fields=('event', 'vendor', 'service'), name='unique_event_vendor_service'),
+        ),
+    ]
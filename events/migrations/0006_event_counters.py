@@ -0,0 +1,85 @@
+# Generated by Django 5.1.1 on 2026-10-18 03:59
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_event_counters(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    Guest = apps.get_model('events', 'Guest')
+    VendorBooking = apps.get_model('events', 'VendorBooking')
+
+    events = {event.pk: event for event in Event.objects.all()}
+    sources = ((Guest, 'rsvp_status', 'guests'), (VendorBooking, 'status', 'bookings'))
+    fields = []
+    for model, status_field, prefix in sources:
+        fields.append(f'{prefix}_count')
+        fields.extend(f'{prefix}_{status}_count' for status, _ in model._meta.get_field(status_field).choices)
+        for row in model.objects.values('event_id', status_field).annotate(n=Count('pk')).order_by():
+            event = events[row['event_id']]
+            setattr(event, f'{prefix}_count', getattr(event, f'{prefix}_count') + row['n'])
+            field = f'{prefix}_{row[status_field]}_count'
+            if hasattr(event, field):
+                setattr(event, field, row['n'])
+    Event.objects.bulk_update(events.values(), fields, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0005_indexes_and_unique_bookings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='bookings_cancelled_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='bookings_completed_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='bookings_confirmed_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='bookings_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='bookings_pending_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='guests_attending_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='guests_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='guests_declined_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='guests_invited_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='guests_waitlist_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_event_counters, migrations.RunPython.noop),
+    ]
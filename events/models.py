@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Lower
 
 # Create your models here.
 class Event(models.Model):
@@ -10,22 +11,55 @@ class Event(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Denormalized counters, kept current by events.counters.
+    guests_count = models.PositiveIntegerField(default=0)
+    guests_invited_count = models.PositiveIntegerField(default=0)
+    guests_attending_count = models.PositiveIntegerField(default=0)
+    guests_declined_count = models.PositiveIntegerField(default=0)
+    guests_waitlist_count = models.PositiveIntegerField(default=0)
+    bookings_count = models.PositiveIntegerField(default=0)
+    bookings_pending_count = models.PositiveIntegerField(default=0)
+    bookings_confirmed_count = models.PositiveIntegerField(default=0)
+    bookings_cancelled_count = models.PositiveIntegerField(default=0)
+    bookings_completed_count = models.PositiveIntegerField(default=0)
+
+    COUNTER_FIELDS = [
+        'guests_count', 'guests_invited_count', 'guests_attending_count',
+        'guests_declined_count', 'guests_waitlist_count',
+        'bookings_count', 'bookings_pending_count', 'bookings_confirmed_count',
+        'bookings_cancelled_count', 'bookings_completed_count',
+    ]
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date', 'id'], name='event_date_id_idx'),
+            models.Index(fields=['planner', 'date', 'id'], name='event_planner_date_idx'),
+        ]
+
     def __str__(self):
         return f"{self.title} on {self.date.strftime('%Y-%m-%d')}"
 
+    def save(self, *args, **kwargs):
+        # The counters are changed with F() updates; a plain save() of an
+        # instance loaded earlier must not write stale values back over them.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def rsvp_counts(self):
+        return {status: getattr(self, f'guests_{status}_count') for status, _ in Guest.RSVP_CHOICES}
+
+    @property
+    def booking_counts(self):
+        return {status: getattr(self, f'bookings_{status}_count') for status, _ in VendorBooking.STATUS_CHOICES}
+
     def serialize(self):
-        return {
-            'id': self.id,
-            'planner': self.planner.username,
-            'title': self.title,
-            'description': self.description,
-            'date': self.date.strftime('%B %d, %Y'),
-            'location': self.location,
-            'guest_count': self.guests.count(),
-            'vendor_count': self.vendor_bookings.count(),
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-        }
+        from .serializers import serialize_event
+        return serialize_event(self)
 
 class VendorBooking(models.Model):
     STATUS_CHOICES = [
@@ -42,20 +76,27 @@ class VendorBooking(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'vendor', 'service'], name='unique_event_vendor_service'),
+        ]
+        indexes = [
+            models.Index(fields=['event', 'created_at', 'id'], name='booking_event_created_idx'),
+            # Also serves the vendor's newest-first list by scanning it backwards.
+            models.Index(fields=['vendor', 'created_at', 'id'], name='booking_vendor_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.vendor.business_name} - {self.service.title} for {self.event.title} ({self.status})"
+
+    def save(self, *args, **kwargs):
+        # Run the post_save counter update in the same transaction as the write.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
     
     def serialize(self):
-        return {
-            'id': self.id,
-            'event': self.event.serialize(),
-            'vendor': self.vendor.serialize(),  
-            'service': self.service.serialize(),
-            'status': self.status,
-            'notes': self.notes,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-        }
+        from .serializers import serialize_booking
+        return serialize_booking(self)
 
 class Guest(models.Model):
     RSVP_CHOICES = [
@@ -72,22 +113,21 @@ class Guest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['event', 'created_at', 'id'], name='guest_event_created_idx'),
+            models.Index('event', Lower('email'), name='guest_event_email_idx'),
+            models.Index(fields=['event', 'rsvp_status'], name='guest_event_rsvp_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name or self.email} ({self.rsvp_status}) for {self.event.title}"
 
+    def save(self, *args, **kwargs):
+        # Run the post_save counter update in the same transaction as the write.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def serialize(self):
-        return {
-            'id': self.id,
-            'event': self.event.title,
-            'user': {
-                'id': self.user.id,
-                'username': self.user.username,
-                'email': self.user.email,
-                'full_name': self.user.get_full_name()
-            } if self.user else None,
-            'name': self.name,
-            'email': self.email,
-            'rsvp_status': self.rsvp_status,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-        }
\ No newline at end of file
+        from .serializers import serialize_guest
+        return serialize_guest(self)
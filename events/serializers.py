@@ -0,0 +1,90 @@
+from django.db.models import Prefetch
+from evently.profiling import profiled
+from users.serializers import serialize_user_summary
+from vendors.serializers import serialize_service, serialize_vendor, service_queryset, vendor_queryset
+from .models import Event, VendorBooking, Guest
+
+
+def event_queryset(queryset=None):
+    """Events with the planner joined; the counts are stored on the row."""
+    if queryset is None:
+        queryset = Event.objects.all()
+    return queryset.select_related('planner')
+
+
+def booking_queryset(queryset=None):
+    """Bookings with their event, vendor and service loaded in one query each."""
+    if queryset is None:
+        queryset = VendorBooking.objects.all()
+    return queryset.prefetch_related(
+        Prefetch('event', queryset=event_queryset()),
+        Prefetch('vendor', queryset=vendor_queryset()),
+        Prefetch('service', queryset=service_queryset()),
+    )
+
+
+def guest_queryset(queryset=None):
+    if queryset is None:
+        queryset = Guest.objects.all()
+    return queryset.select_related('event', 'user')
+
+
+@profiled('serialize')
+def serialize_event(event):
+    return {
+        'id': event.id,
+        'planner': event.planner.username,
+        'title': event.title,
+        'description': event.description,
+        'date': event.date.strftime('%B %d, %Y'),
+        'location': event.location,
+        'guest_count': event.guests_count,
+        'vendor_count': event.bookings_count,
+        'rsvp_counts': event.rsvp_counts,
+        'booking_counts': event.booking_counts,
+        'created_at': event.created_at.isoformat(),
+        'updated_at': event.updated_at.isoformat(),
+    }
+
+
+@profiled('serialize')
+def serialize_event_summary(event):
+    """The compact shape returned by the event list endpoint."""
+    return {
+        'id': event.id,
+        'title': event.title,
+        'date': event.date,
+        'location': event.location,
+        'guest_count': event.guests_count,
+        'vendor_count': event.bookings_count,
+        'rsvp_counts': event.rsvp_counts,
+        'booking_counts': event.booking_counts,
+    }
+
+
+@profiled('serialize')
+def serialize_booking(booking):
+    return {
+        'id': booking.id,
+        'event': serialize_event(booking.event),
+        'vendor': serialize_vendor(booking.vendor),
+        'service': serialize_service(booking.service),
+        'status': booking.status,
+        'notes': booking.notes,
+        'created_at': booking.created_at.isoformat(),
+        'updated_at': booking.updated_at.isoformat(),
+    }
+
+
+@profiled('serialize')
+def serialize_guest(guest):
+    return {
+        'id': guest.id,
+        'event': guest.event.title,
+        'user': serialize_user_summary(guest.user) if guest.user else None,
+        'name': guest.name,
+        'email': guest.email,
+        'rsvp_status': guest.rsvp_status,
+        'created_at': guest.created_at.isoformat(),
+        'updated_at': guest.updated_at.isoformat(),
+    }
@@ -0,0 +1,74 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from .models import Event, Guest, VendorBooking
+from . import counters
+
+# Each instance remembers the event and status it was loaded (or last saved)
+# with, so a save can tell which counters to move.
+TRACKED = {Guest: 'rsvp_status', VendorBooking: 'status'}
+RECORDERS = {Guest: counters.record_guests, VendorBooking: counters.record_bookings}
+
+# Stands in for a field that was deferred when the instance was loaded.
+UNKNOWN = object()
+
+
+@receiver(post_init, sender=Guest)
+@receiver(post_init, sender=VendorBooking)
+def remember_status(sender, instance, **kwargs):
+    _remember(sender, instance)
+
+
+@receiver(post_save, sender=Guest)
+@receiver(post_save, sender=VendorBooking)
+def status_saved(sender, instance, created, update_fields=None, **kwargs):
+    field = TRACKED[sender]
+    record = RECORDERS[sender]
+    status = getattr(instance, field)
+    if created:
+        record(instance.event_id, [(None, status)])
+    elif update_fields is not None and not {'event', 'event_id', field} & set(update_fields):
+        # Neither the event nor the status was written; keep the remembered values.
+        return
+    elif UNKNOWN in instance._counted:
+        # Loaded with only()/defer(): the previous values are unknown, so recount.
+        counters.reconcile(Event.objects.filter(pk=instance.event_id))
+    else:
+        old_event_id, old_status = instance._counted
+        if old_event_id != instance.event_id:
+            record(old_event_id, [(old_status, None)])
+            old_status = None
+        record(instance.event_id, [(old_status, status)])
+    _remember(sender, instance)
+    _refresh_event(sender, instance)
+
+
+@receiver(post_delete, sender=Guest)
+@receiver(post_delete, sender=VendorBooking)
+def status_deleted(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Event) or getattr(origin, 'model', None) is Event:
+        # Cascading from the event's own delete: its counters go with it.
+        return
+    if UNKNOWN in instance._counted:
+        counters.reconcile(Event.objects.filter(pk=instance.event_id))
+    else:
+        event_id, status = instance._counted
+        RECORDERS[sender](event_id, [(status, None)])
+    _refresh_event(sender, instance)
+
+
+def _remember(sender, instance):
+    # Deferred fields are missing from __dict__; reading them would cost a query per instance.
+    instance._counted = (
+        instance.__dict__.get('event_id', UNKNOWN),
+        instance.__dict__.get(TRACKED[sender], UNKNOWN),
+    )
+
+
+def _refresh_event(sender, instance):
+    # A response built from instance.event should show the counts just written.
+    if not sender._meta.get_field('event').is_cached(instance):
+        return
+    event = instance.event
+    values = Event.objects.filter(pk=event.pk).values(*Event.COUNTER_FIELDS).first()
+    for field, value in (values or {}).items():
+        setattr(event, field, value)
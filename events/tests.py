@@ -1,3 +1,232 @@
+import unittest
+
+from django.db import connection
+from django.db.models import Count, Q
+from django.db.models.functions import Lower
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from users.models import User
+from vendors import availability
+from vendors.models import AvailabilityBlock, Review, Service, VendorCategoryFacet, VendorProfile
+from .models import Event, Guest, VendorBooking
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', "Checks SQLite EXPLAIN QUERY PLAN output.")
+class HotQueryPlanTests(TestCase):
+    """Each hot query must be answered from an index, not a full table scan."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.planner = User.objects.create_user('planner', 'planner@example.com', 'pw', is_planner=True)
+        cls.vendor_user = User.objects.create_user('vendor', 'vendor@example.com', 'pw', is_vendor=True)
+        cls.vendor = VendorProfile.objects.get(user=cls.vendor_user)
+        cls.service = Service.objects.create(vendor=cls.vendor, title='Catering', description='', price=100)
+        cls.event = Event.objects.create(planner=cls.planner, title='Wedding', date=timezone.now(), location='Nairobi')
+
+    def assertUsesIndex(self, queryset, expected):
+        """``expected`` is the index name, or the searched columns for unique constraints (SQLite autoindexes)."""
+        plan = queryset.explain()
+        self.assertIn(expected, plan, f"Expected {expected} in plan:\n{plan}")
+        for line in plan.splitlines():
+            if 'SCAN' in line and 'INDEX' not in line:
+                self.fail(f"Full table scan in plan:\n{plan}")
+
+    def test_planner_events_by_date(self):
+        self.assertUsesIndex(
+            Event.objects.filter(planner=self.planner).order_by('date', 'id'),
+            'event_planner_date_idx',
+        )
+
+    def test_event_list_keyset_page(self):
+        now = timezone.now()
+        self.assertUsesIndex(
+            Event.objects.filter(date__gte=now).order_by('date', 'id')[:50],
+            'event_date_id_idx',
+        )
+
+    def test_vendor_bookings_newest_first(self):
+        self.assertUsesIndex(
+            VendorBooking.objects.filter(vendor=self.vendor).order_by('-created_at', '-id'),
+            'booking_vendor_created_idx',
+        )
+
+    def test_event_bookings(self):
+        self.assertUsesIndex(
+            VendorBooking.objects.filter(event=self.event).order_by('created_at', 'id'),
+            'booking_event_created_idx',
+        )
+
+    def test_booking_uniqueness_lookup(self):
+        self.assertUsesIndex(
+            VendorBooking.objects.filter(event=self.event, vendor=self.vendor, service=self.service),
+            '(event_id=? AND vendor_id=? AND service_id=?)',
+        )
+
+    def test_guest_rsvp_counts(self):
+        self.assertUsesIndex(
+            Guest.objects.filter(event=self.event).order_by().values('rsvp_status').annotate(n=Count('id')),
+            'guest_event_rsvp_idx',
+        )
+
+    def test_event_guests_page(self):
+        self.assertUsesIndex(
+            Guest.objects.filter(event=self.event).order_by('created_at', 'id'),
+            'guest_event_created_idx',
+        )
+
+    def test_guest_email_lookup(self):
+        self.assertUsesIndex(
+            Guest.objects.annotate(email_lower=Lower('email')).filter(event=self.event, email_lower='a@example.com'),
+            'guest_event_email_idx',
+        )
+
+    def test_review_uniqueness_lookup(self):
+        self.assertUsesIndex(
+            Review.objects.filter(vendor=self.vendor, user=self.planner),
+            '(vendor_id=? AND user_id=?)',
+        )
+
+    def test_booking_conflict_lookup(self):
+        blocks = AvailabilityBlock.objects.filter(vendor=self.vendor).filter(
+            Q(service__isnull=True) | Q(service=self.service)
+        )
+        self.assertUsesIndex(availability.covering(blocks, timezone.localdate()), 'block_vendor_start_idx')
+
+    def test_vendors_available_on(self):
+        self.assertUsesIndex(availability.blocked_vendor_ids(timezone.localdate()), 'block_service_start_idx')
+
+    def test_vendors_by_score(self):
+        self.assertUsesIndex(VendorProfile.objects.order_by('-ranking_score', '-id')[:10], 'vendor_score_idx')
+
+    def test_top_vendors_in_category(self):
+        self.assertUsesIndex(
+            VendorCategoryFacet.objects.filter(category_id__in=[1]).order_by('-ranking_score', '-vendor_id'),
+            'facet_category_score_idx',
+        )
+
+
+class GuestImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.planner = User.objects.create_user('planner', 'planner@example.com', 'pw', is_planner=True)
+        cls.event = Event.objects.create(planner=cls.planner, title='Wedding', date=timezone.now(), location='Nairobi')
+
+    def setUp(self):
+        self.client.force_login(self.planner)
+
+    def test_row_with_extra_columns_is_reported(self):
+        response = self.client.post(
+            f'/events/{self.event.id}/guests/import/',
+            'email,name\na@b.com,A,EXTRA\nc@d.com,C\n',
+            content_type='text/csv',
+        )
+        self.assertEqual(response.status_code, 200)
+        report = response.json()
+        self.assertEqual(report['created'], 1)
+        self.assertEqual(report['errors'], [{'row': 2, 'email': None, 'error': 'Too many columns.'}])
+        self.assertEqual(list(self.event.guests.values_list('email', flat=True)), ['c@d.com'])
+
+
+class GuestBulkUpdateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.planner = User.objects.create_user('planner', 'planner@example.com', 'pw', is_planner=True)
+        cls.event = Event.objects.create(planner=cls.planner, title='Wedding', date=timezone.now(), location='Nairobi')
+        cls.guest = Guest.objects.create(event=cls.event, name='Ann', email='ann@example.com')
+
+    def setUp(self):
+        self.client.force_login(self.planner)
+
+    def patch(self, change):
+        return self.client.patch(
+            f'/events/{self.event.id}/guests/bulk/',
+            {'guests': [{'id': self.guest.id, **change}]},
+            content_type='application/json',
+        )
+
+    def test_non_string_values_are_rejected(self):
+        for change in ({'rsvp_status': ['x']}, {'rsvp_status': {'a': 1}}, {'name': {'a': 1}}, {'email': 5}):
+            response = self.patch(change)
+            self.assertEqual(response.status_code, 400, change)
+            self.assertIn(f'guest {self.guest.id}', response.json()['error'])
+        self.guest.refresh_from_db()
+        self.assertEqual((self.guest.name, self.guest.rsvp_status), ('Ann', 'invited'))
+
+    def test_valid_change_is_applied(self):
+        response = self.patch({'rsvp_status': 'attending', 'name': None})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['counts']['attending'], 1)
+
+
+class GuestListConditionalTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.planner = User.objects.create_user('planner', 'planner@example.com', 'pw', is_planner=True)
+        cls.event = Event.objects.create(planner=cls.planner, title='Wedding', date=timezone.now(), location='Nairobi')
+        cls.invitee = User.objects.create_user('ann', 'ann@example.com', 'pw')
+        Guest.objects.create(event=cls.event, user=cls.invitee, name='Ann', email='ann@example.com')
+
+    def setUp(self):
+        self.client.force_login(self.planner)
+        self.url = f'/events/{self.event.id}/guests/'
+
+    def test_ndjson_and_json_get_distinct_etags(self):
+        as_json = self.client.get(self.url)
+        as_ndjson = self.client.get(self.url, headers={'Accept': 'application/x-ndjson'})
+        self.assertNotEqual(as_json['ETag'], as_ndjson['ETag'])
+        self.assertIn('Accept', as_json['Vary'])
+        self.assertIn('Accept', as_ndjson['Vary'])
+
+        response = self.client.get(
+            self.url, headers={'Accept': 'application/x-ndjson', 'If-None-Match': as_json['ETag']},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+    def test_matching_etag_still_gets_304_with_vary(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertIn('Accept', response['Vary'])
+
+    def test_linked_user_changes_change_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.invitee.username = 'ann.k'
+        self.invitee.save()
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['user']['username'], 'ann.k')
+
+        etag = response['ETag']
+        self.invitee.delete()
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()[0]['user'])
+
+
+class EventCounterDeleteTests(TestCase):
+    def setUp(self):
+        planner = User.objects.create_user('planner', 'planner@example.com', 'pw', is_planner=True)
+        self.event = Event.objects.create(planner=planner, title='Wedding', date=timezone.now(), location='Nairobi')
+        for n in range(20):
+            Guest.objects.create(event=self.event, email=f'guest{n}@example.com')
+        self.event.refresh_from_db()
+
+    def assertNoEventUpdates(self, delete):
+        with CaptureQueriesContext(connection) as queries:
+            delete()
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "events_event"')]
+        self.assertEqual(updates, [])
+        self.assertFalse(Event.objects.filter(pk=self.event.pk).exists())
+
+    def test_event_delete_skips_counter_updates_for_its_guests(self):
+        self.assertNoEventUpdates(self.event.delete)
+
+    def test_event_queryset_delete_skips_counter_updates_for_its_guests(self):
+        self.assertNoEventUpdates(Event.objects.filter(pk=self.event.pk).delete)
 
-# Create your tests here.
+    def test_guest_delete_still_updates_counters(self):
+        Guest.objects.filter(event=self.event)[:1].get().delete()
+        self.event.refresh_from_db()
+        self.assertEqual((self.event.guests_count, self.event.guests_invited_count), (19, 19))
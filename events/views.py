@@ -1,13 +1,26 @@
 from django.views.decorators.http import require_POST
 from django.shortcuts import get_object_or_404, render
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
+from django.db.models import Avg, Count, Max, Prefetch, Sum
 from django.http import JsonResponse
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.utils import timezone
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.http import require_GET, require_http_methods
-from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition, require_GET, require_http_methods
+from django.views.decorators.vary import vary_on_headers
 from .models import *
+from . import counters
+from .imports import ImportFormatError, detect_format, import_guests, read_rows, text_lines
+from .serializers import booking_queryset, event_queryset, guest_queryset, serialize_booking, serialize_event, serialize_event_summary, serialize_guest
 from vendors.models import *
+from vendors import availability
 from users.models import User
+from evently.conditional import make_etag
+from evently.pagination import InvalidCursor, paginate
+from evently.exports import csv_response
+from evently.streaming import stream_response, wants_stream
+from decimal import Decimal
 import json
 
 @login_required
@@ -15,7 +28,18 @@ def events_page(request):
     """Render the events page template"""
     return render(request, 'events/events.html', {'page': 'events'})
 
-@csrf_exempt
+def _unavailable(error):
+    return JsonResponse({'error': str(error), 'conflict': error.block.serialize()}, status=409)
+
+def _set_booking_status(booking, status):
+    # Reviving a cancelled booking takes the day back, so check the calendar again.
+    revived = booking.status == 'cancelled' and status != 'cancelled'
+    with transaction.atomic():
+        booking.status = status
+        booking.save()
+        if revived:
+            availability.ensure_available(booking)
+
 @require_POST  
 @login_required
 def create_booking(request):
@@ -55,22 +79,21 @@ def create_booking(request):
         vendor = get_object_or_404(VendorProfile, id=vendor_id)
         service = get_object_or_404(Service, id=service_id, vendor=vendor)
         
-        # Check if booking already exists
-        existing_booking = VendorBooking.objects.filter(
-            event=event,
-            vendor=vendor,
-            service=service
-        ).first()
-        
-        if existing_booking:
+        # The unique constraint on (event, vendor, service) rejects duplicates,
+        # including ones from concurrent requests.
+        try:
+            with transaction.atomic():
+                booking = VendorBooking.objects.create(
+                    event=event,
+                    vendor=vendor,
+                    service=service,
+                    notes=notes
+                )
+                availability.ensure_available(booking)
+        except IntegrityError:
             return JsonResponse({'error': 'Booking already exists for this vendor and service.'}, status=400)
-        
-        booking = VendorBooking.objects.create(
-            event=event,
-            vendor=vendor,
-            service=service,
-            notes=notes
-        )
+        except availability.Unavailable as e:
+            return _unavailable(e)
         return JsonResponse({'status': 'pending', 'booking': booking.serialize()}, status=201)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=400)
@@ -81,13 +104,15 @@ def patch_booking(request, booking_id):
     booking = get_object_or_404(VendorBooking, id=booking_id)
     # Only vendor or planner can update status
     user = request.user
-    if not (user == booking.event.planner or (hasattr(user, 'vendor_profile') and user.vendor_profile == booking.vendor)):
+    if not (user.id == booking.event.planner_id or user.vendor_profile_id == booking.vendor_id):
         return JsonResponse({'error': 'Permission denied.'}, status=403)
     data = json.loads(request.body)
     status = data.get('status')
     if status and status in dict(VendorBooking.STATUS_CHOICES):
-        booking.status = status
-        booking.save()
+        try:
+            _set_booking_status(booking, status)
+        except availability.Unavailable as e:
+            return _unavailable(e)
         return JsonResponse({'status': status, 'booking': booking.serialize()}, status=200)
     else:
         return JsonResponse({'error': 'Invalid status.'}, status=400)
@@ -96,6 +121,7 @@ def patch_booking(request, booking_id):
 @require_GET
 @login_required
 def event_list(request):
+    # Counts are stored on the row, so the list is a single-table query.
     events = Event.objects.all()
     
     # Filtering
@@ -113,25 +139,81 @@ def event_list(request):
     if mine == '1':
         events = events.filter(planner=request.user)
     
+    try:
+        page = paginate(request, events, keys=('date', 'id'))
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    if page is not None:
+        events = page.items
+
+    data = {'events': [serialize_event_summary(event) for event in events]}
+    if page is not None:
+        data['next'] = page.next_cursor
+    return JsonResponse(data, status=200)
+
+DASHBOARD_INCLUDES = ('guests', 'bookings')
+
+@require_GET
+@login_required
+def event_dashboard(request):
+    include = request.GET.get('include')
+    include = set(DASHBOARD_INCLUDES) if include is None else {part.strip() for part in include.split(',') if part.strip()}
+    unknown = include - set(DASHBOARD_INCLUDES)
+    if unknown:
+        return JsonResponse({'error': f"Unknown include value(s): {', '.join(sorted(unknown))}."}, status=400)
+
+    events = event_queryset(Event.objects.filter(planner=request.user)).order_by('date', 'id')
+    if 'guests' in include:
+        events = events.prefetch_related(
+            Prefetch('guests', queryset=Guest.objects.select_related('user').order_by('created_at', 'id'))
+        )
+    if 'bookings' in include:
+        events = events.prefetch_related(
+            Prefetch('vendor_bookings', queryset=booking_queryset(VendorBooking.objects.order_by('created_at', 'id')))
+        )
+    events = list(events)
+
+    # Counts come from the event's counters; only the money needs the bookings table.
+    booking_totals = {event.id: Decimal('0.00') for event in events}
+    booking_rows = (
+        VendorBooking.objects.filter(event__planner=request.user)
+        .exclude(status='cancelled')
+        .order_by()
+        .values('event_id')
+        .annotate(total=Sum('service__price'))
+    )
+    for row in booking_rows:
+        booking_totals[row['event_id']] += row['total'] or 0
+
     event_list = []
     for event in events:
-        event_list.append({
-            'id': event.id,
-            'title': event.title,
-            'date': event.date,
-            'location': event.location,
-            'guest_count': event.guests.count(),
-            'vendor_count': event.vendor_bookings.count(),
-        })
+        data = serialize_event(event)
+        data['booking_total'] = str(booking_totals[event.id].quantize(Decimal('0.01')))
+        if 'guests' in include:
+            data['guests'] = [serialize_guest(guest) for guest in event.guests.all()]
+        if 'bookings' in include:
+            data['bookings'] = [serialize_booking(booking) for booking in event.vendor_bookings.all()]
+        event_list.append(data)
     return JsonResponse({'events': event_list}, status=200)
 
+def _event_etag(request, event_id):
+    row = (
+        Event.objects.filter(id=event_id)
+        .values('updated_at', 'planner__username', *Event.COUNTER_FIELDS)
+        .first()
+    )
+    if row is None:
+        return None
+    return make_etag(request, *row.values())
+
 @require_http_methods(["GET", "PATCH", "PUT", "DELETE"])
 @login_required
+@condition(etag_func=_event_etag)
 def event_detail(request, event_id):
-    event = get_object_or_404(Event, id=event_id)
+    event = get_object_or_404(event_queryset(), id=event_id)
     
     if request.method == "GET":
-        return JsonResponse(event.serialize())
+        return JsonResponse(serialize_event(event))
     
     elif request.method in ["PATCH", "PUT"]:
         if not request.user.is_planner:
@@ -143,7 +225,7 @@ def event_detail(request, event_id):
         event.date = data.get('date', event.date)
         event.location = data.get('location', event.location)
         event.save()
-        return JsonResponse(event.serialize())
+        return JsonResponse(serialize_event(event))
     
     elif request.method == "DELETE":
         if not request.user.is_planner:
@@ -183,9 +265,16 @@ def event_vendors(request, id):
     event = get_object_or_404(Event, id=id)
     
     if request.method == "GET":
-        bookings = event.vendor_bookings.all()
-        booking_list = [booking.serialize() for booking in bookings]
-        return JsonResponse(booking_list, safe=False)
+        bookings = booking_queryset(VendorBooking.objects.filter(event=event))
+        try:
+            page = paginate(request, bookings)
+        except InvalidCursor as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        if page is None:
+            booking_list = [serialize_booking(booking) for booking in bookings]
+            return JsonResponse(booking_list, safe=False)
+        booking_list = [serialize_booking(booking) for booking in page.items]
+        return JsonResponse({'bookings': booking_list, 'next': page.next_cursor})
     
     elif request.method == "POST":
         if request.user != event.planner:
@@ -203,13 +292,21 @@ def event_vendors(request, id):
         vendor = get_object_or_404(VendorProfile, id=vendor_id)
         service = get_object_or_404(Service, id=service_id)
         
-        booking = VendorBooking.objects.create(
-            event=event,
-            vendor=vendor,
-            service=service,
-            status=status,
-            notes=notes
-        )
+        try:
+            with transaction.atomic():
+                booking = VendorBooking.objects.create(
+                    event=event,
+                    vendor=vendor,
+                    service=service,
+                    status=status,
+                    notes=notes
+                )
+                if booking.status != 'cancelled':
+                    availability.ensure_available(booking)
+        except IntegrityError:
+            return JsonResponse({'error': 'Booking already exists for this vendor and service.'}, status=400)
+        except availability.Unavailable as e:
+            return _unavailable(e)
         return JsonResponse(booking.serialize(), status=201)
 
 @require_http_methods(["GET", "PATCH", "DELETE"])
@@ -225,8 +322,10 @@ def booking_detail(request, id, booking_id):
         data = json.loads(request.body)
         status = data.get('status')
         if status and status in dict(VendorBooking.STATUS_CHOICES):
-            booking.status = status
-            booking.save()
+            try:
+                _set_booking_status(booking, status)
+            except availability.Unavailable as e:
+                return _unavailable(e)
             return JsonResponse({'status': status, 'booking': booking.serialize()}, status=200)
         else:
             return JsonResponse({'error': 'Invalid status.'}, status=400)
@@ -238,15 +337,47 @@ def booking_detail(request, id, booking_id):
         booking.delete()
         return JsonResponse({'message': 'Booking deleted successfully.'})
 
+def _event_guests_etag(request, id):
+    if request.method != "GET":
+        return None
+    row = (
+        Event.objects.filter(id=id)
+        .values('updated_at')
+        .annotate(
+            guest_count=Count('guests'),
+            latest=Max('guests__updated_at'),
+            # Deleting a linked user unlinks its guests with an UPDATE that
+            # leaves guests.updated_at alone.
+            linked_users=Count('guests__user'),
+            users_updated=Max('guests__user__updated_at'),
+        )
+        .order_by('id')
+        .first()
+    )
+    if row is None:
+        return None
+    return make_etag(request, *row.values())
+
+@vary_on_headers('Accept')
 @require_http_methods(["GET", "POST"])
 @login_required
+@condition(etag_func=_event_guests_etag)
 def event_guests(request, id):
     event = get_object_or_404(Event, id=id)
     
     if request.method == "GET":
-        guests = event.guests.all()
-        guest_list = [guest.serialize() for guest in guests]
-        return JsonResponse(guest_list, safe=False)
+        guests = guest_queryset(event.guests.all())
+        if wants_stream(request):
+            return stream_response(request, guests.order_by('created_at', 'id'), serialize_guest)
+        try:
+            page = paginate(request, guests)
+        except InvalidCursor as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        if page is None:
+            guest_list = [serialize_guest(guest) for guest in guests]
+            return JsonResponse(guest_list, safe=False)
+        guest_list = [serialize_guest(guest) for guest in page.items]
+        return JsonResponse({'guests': guest_list, 'next': page.next_cursor})
     
     elif request.method == "POST":
         if request.user != event.planner:
@@ -275,6 +406,124 @@ def event_guests(request, id):
         )
         return JsonResponse(guest.serialize(), status=201)
 
+GUEST_EXPORT_HEADER = ['Name', 'Email', 'RSVP status', 'Username', 'Added']
+
+@require_GET
+@login_required
+def guest_export(request, id):
+    event = get_object_or_404(Event, id=id)
+    if request.user != event.planner:
+        return JsonResponse({'error': 'Permission denied.'}, status=403)
+
+    statuses = dict(Guest.RSVP_CHOICES)
+    rows = (
+        Guest.objects.filter(event=event)
+        .order_by('created_at', 'id')
+        .values_list('name', 'email', 'rsvp_status', 'user__username', 'created_at')
+    )
+    return csv_response(
+        f'event-{event.id}-guests.csv',
+        GUEST_EXPORT_HEADER,
+        rows,
+        convert=lambda row: (row[0], row[1], statuses.get(row[2], row[2])) + row[3:],
+    )
+
+@require_POST
+@login_required
+def guest_import(request, id):
+    event = get_object_or_404(Event, id=id)
+    if request.user != event.planner:
+        return JsonResponse({'error': 'Permission denied.'}, status=403)
+
+    if request.content_type == 'multipart/form-data':
+        upload = request.FILES.get('file')
+        if upload is None:
+            return JsonResponse({'error': 'Upload a CSV or NDJSON file as "file".'}, status=400)
+        stream, filename, content_type = upload, upload.name, upload.content_type
+    else:
+        # Raw request bodies are read line by line straight off the request.
+        stream, filename, content_type = request, None, request.content_type
+
+    try:
+        fmt = detect_format(request.GET.get('format'), filename, content_type)
+        report = import_guests(event, read_rows(text_lines(stream), fmt))
+    except ImportFormatError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except UnicodeDecodeError:
+        return JsonResponse({'error': 'The file must be UTF-8 encoded.'}, status=400)
+    return JsonResponse(report.as_dict(), status=200)
+
+MAX_BULK_GUESTS = 1000
+
+@require_http_methods(["PATCH"])
+@login_required
+def guest_bulk_update(request, id):
+    event = get_object_or_404(Event, id=id)
+    if request.user != event.planner:
+        return JsonResponse({'error': 'Permission denied.'}, status=403)
+
+    try:
+        changes = json.loads(request.body).get('guests')
+    except (ValueError, AttributeError):
+        return JsonResponse({'error': 'Invalid JSON body.'}, status=400)
+    if not isinstance(changes, list) or not changes:
+        return JsonResponse({'error': 'guests must be a non-empty list.'}, status=400)
+    if len(changes) > MAX_BULK_GUESTS:
+        return JsonResponse({'error': f'At most {MAX_BULK_GUESTS} guests can be updated at once.'}, status=400)
+
+    valid_statuses = dict(Guest.RSVP_CHOICES)
+    by_id = {}
+    for change in changes:
+        if not isinstance(change, dict) or not isinstance(change.get('id'), int):
+            return JsonResponse({'error': 'Each entry needs an integer id.'}, status=400)
+        if change['id'] in by_id:
+            return JsonResponse({'error': f"Guest {change['id']} is listed more than once."}, status=400)
+        for field in ('rsvp_status', 'name', 'email'):
+            value = change.get(field, '')
+            # name may be cleared with null; every other value must be a string.
+            if not isinstance(value, str) and not (field == 'name' and value is None):
+                return JsonResponse({'error': f"{field} must be a string for guest {change['id']}."}, status=400)
+        if 'rsvp_status' in change and change['rsvp_status'] not in valid_statuses:
+            return JsonResponse({'error': f"Invalid rsvp_status for guest {change['id']}."}, status=400)
+        if 'email' in change:
+            try:
+                validate_email(change['email'])
+            except ValidationError:
+                return JsonResponse({'error': f"Invalid email for guest {change['id']}."}, status=400)
+        by_id[change['id']] = change
+
+    now = timezone.now()
+    with transaction.atomic():
+        guests = list(event.guests.filter(id__in=by_id).select_related('user').select_for_update())
+        missing = set(by_id) - {guest.id for guest in guests}
+        if missing:
+            return JsonResponse({'error': 'Guests not found for this event.', 'ids': sorted(missing)}, status=404)
+
+        changed = []
+        transitions = []
+        for guest in guests:
+            change = by_id[guest.id]
+            before = (guest.rsvp_status, guest.name, guest.email)
+            # Same rule as guest_detail: name and email come from the linked user when there is one.
+            if guest.user is None:
+                guest.name = change.get('name', guest.name)
+                guest.email = change.get('email', guest.email)
+            guest.rsvp_status = change.get('rsvp_status', guest.rsvp_status)
+            if (guest.rsvp_status, guest.name, guest.email) != before:
+                guest.updated_at = now
+                changed.append(guest)
+                transitions.append((before[0], guest.rsvp_status))
+        # bulk_update() sends no signals, so move the event's counters here.
+        Guest.objects.bulk_update(changed, ['rsvp_status', 'name', 'email', 'updated_at'])
+        counters.record_guests(event.id, transitions)
+
+    event.refresh_from_db(fields=counters.GUEST_FIELDS.values())
+    return JsonResponse({
+        'updated': len(changed),
+        'guests': [serialize_guest(guest) for guest in changed],
+        'counts': event.rsvp_counts,
+    }, status=200)
+
 @require_http_methods(["GET", "PATCH", "DELETE"])
 @login_required
 def guest_detail(request, id, guest_id):
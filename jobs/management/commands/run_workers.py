@@ -0,0 +1,95 @@
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from jobs.queue import Worker, recover_stale
+
+RECOVERY_INTERVAL = 60
+
+
+def _worker_name(index):
+    return f'{socket.gethostname()}:{os.getpid()}:{index}'
+
+
+def _run_process(index, stop, poll_interval, burst):
+    django.setup()
+    # The parent handles Ctrl-C and SIGTERM and sets ``stop``; finish the current job.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    Worker(_worker_name(index), stop, poll_interval, burst).run()
+
+
+class Command(BaseCommand):
+    help = "Run background job workers from the database queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help="Number of workers to run.")
+        parser.add_argument('--mode', choices=['thread', 'process'], default='thread',
+                            help="Run workers as threads (default) or separate processes.")
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help="Seconds to wait between polls when the queue is empty.")
+        parser.add_argument('--burst', action='store_true',
+                            help="Exit once no job is due instead of waiting for more.")
+
+    def handle(self, *args, **options):
+        lease_timeout = getattr(settings, 'JOBS_LEASE_TIMEOUT', 600)
+        recovered = recover_stale(lease_timeout)
+        if recovered:
+            self.stdout.write(f"Recovered {recovered} stale job(s).")
+
+        concurrency = max(1, options['concurrency'])
+        if options['mode'] == 'process':
+            context = multiprocessing.get_context()
+            stop = context.Event()
+            # Forked children must not share the parent's database connections.
+            connections.close_all()
+            workers = [
+                context.Process(
+                    target=_run_process,
+                    args=(index, stop, options['poll_interval'], options['burst']),
+                    name=f'job-worker-{index}',
+                )
+                for index in range(concurrency)
+            ]
+        else:
+            stop = threading.Event()
+            workers = [
+                threading.Thread(
+                    target=Worker(_worker_name(index), stop, options['poll_interval'], options['burst']).run,
+                    name=f'job-worker-{index}',
+                )
+                for index in range(concurrency)
+            ]
+
+        stopping = []
+
+        def shutdown(signum, frame):
+            # Only record the request here: setting the Event from a signal
+            # handler can deadlock if the handler interrupts another set().
+            stopping.append(signum)
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        self.stdout.write(f"Starting {concurrency} {options['mode']} worker(s).")
+        for worker in workers:
+            worker.start()
+        last_recovery = time.monotonic()
+        while any(worker.is_alive() for worker in workers):
+            for worker in workers:
+                worker.join(0.5)
+            if stopping and not stop.is_set():
+                self.stdout.write("Stopping workers after their current job...")
+                stop.set()
+            if not stop.is_set() and time.monotonic() - last_recovery > RECOVERY_INTERVAL:
+                recover_stale(lease_timeout)
+                last_recovery = time.monotonic()
+        self.stdout.write(self.style.SUCCESS("Workers stopped."))
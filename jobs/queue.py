@@ -0,0 +1,179 @@
+"""
+Database-backed job queue.
+
+Work is deferred by registering a function with @task and calling enqueue().
+The job row is written in the caller's transaction, so it only becomes
+visible to workers if the surrounding write commits. Workers started with
+`manage.py run_workers` claim jobs with a conditional UPDATE (queued ->
+running), so two workers can never run the same job and no broker or row
+locking support is needed. Failed jobs are retried with exponential backoff
+until max_attempts; jobs whose worker died are picked up again once they
+have been running for longer than JOBS_LEASE_TIMEOUT seconds.
+
+With JOBS_EAGER = True jobs run in-process right after commit instead, which
+is handy for development and tests.
+"""
+import datetime
+import functools
+import logging
+import random
+import threading
+import traceback
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 5
+BACKOFF_BASE = 10        # seconds before the first retry
+BACKOFF_MAX = 60 * 60
+CLAIM_BATCH = 10
+
+_registry = {}
+
+
+class UnknownTask(LookupError):
+    pass
+
+
+def task(name=None, priority=0, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """
+    Register ``func`` as a task. The payload of a job is passed as keyword
+    arguments, so it must be JSON serializable.
+    """
+    def decorator(func):
+        func.task_name = name or f'{func.__module__}.{func.__name__}'
+        func.priority = priority
+        func.max_attempts = max_attempts
+        func.enqueue = functools.partial(enqueue, func)
+        _registry[func.task_name] = func
+        return func
+    return decorator
+
+
+def get_task(name):
+    if name not in _registry:
+        try:
+            import_string(name)
+        except ImportError:
+            pass
+    try:
+        return _registry[name]
+    except KeyError:
+        raise UnknownTask(name)
+
+
+def enqueue(func, payload=None, key='', priority=None, delay=None, max_attempts=None):
+    """
+    Queue ``func`` (a task or its name) to run with ``payload``. With ``key``,
+    nothing is added while a job for the same task and key is still waiting.
+    Returns the Job, or None if it was coalesced or run eagerly.
+    """
+    func = get_task(func) if isinstance(func, str) else func
+    payload = payload or {}
+    if getattr(settings, 'JOBS_EAGER', False):
+        transaction.on_commit(lambda: func(**payload))
+        return None
+    if key and Job.objects.filter(task=func.task_name, key=key, status=Job.QUEUED).exists():
+        return None
+    return Job.objects.create(
+        task=func.task_name,
+        payload=payload,
+        key=key,
+        priority=func.priority if priority is None else priority,
+        max_attempts=max_attempts or func.max_attempts,
+        run_at=timezone.now() + datetime.timedelta(seconds=delay or 0),
+    )
+
+
+def claim(worker_id):
+    """Mark the most urgent due job as running for ``worker_id`` and return it, or None."""
+    now = timezone.now()
+    candidates = list(
+        Job.objects.filter(status=Job.QUEUED, run_at__lte=now)
+        .order_by('-priority', 'run_at', 'id')
+        .values_list('id', flat=True)[:CLAIM_BATCH]
+    )
+    for job_id in candidates:
+        # Losing the race to another worker just means the update matches nothing.
+        claimed = Job.objects.filter(id=job_id, status=Job.QUEUED).update(
+            status=Job.RUNNING,
+            locked_by=worker_id,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+            updated_at=now,
+        )
+        if claimed:
+            return Job.objects.get(id=job_id)
+    return None
+
+
+def backoff(attempts):
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    return datetime.timedelta(seconds=delay * random.uniform(1, 1.25))
+
+
+def run(job):
+    """Run a claimed job and record the outcome. Returns True on success."""
+    try:
+        get_task(job.task)(**job.payload)
+    except Exception:
+        logger.exception('Job %s (%s) failed', job.id, job.task)
+        fail(job, traceback.format_exc())
+        return False
+    now = timezone.now()
+    Job.objects.filter(id=job.id, locked_by=job.locked_by).update(
+        status=Job.DONE, finished_at=now, updated_at=now, last_error='',
+    )
+    return True
+
+
+def fail(job, error):
+    now = timezone.now()
+    rows = Job.objects.filter(id=job.id, locked_by=job.locked_by)
+    if job.attempts >= job.max_attempts:
+        rows.update(status=Job.FAILED, finished_at=now, updated_at=now, last_error=error)
+    else:
+        rows.update(status=Job.QUEUED, run_at=now + backoff(job.attempts), locked_by='', updated_at=now, last_error=error)
+
+
+def recover_stale(lease_timeout):
+    """Requeue (or fail, when out of attempts) jobs that have been running longer than the lease."""
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=now - datetime.timedelta(seconds=lease_timeout))
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, finished_at=now, updated_at=now, last_error='Lease expired.',
+    )
+    requeued = stale.update(status=Job.QUEUED, run_at=now, locked_by='', updated_at=now)
+    return requeued + failed
+
+
+class Worker:
+    def __init__(self, name, stop, poll_interval=1.0, burst=False):
+        self.name = name
+        self.stop = stop
+        self.poll_interval = poll_interval
+        self.burst = burst
+        self.processed = 0
+
+    def run(self):
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                job = claim(self.name)
+                if job is None:
+                    if self.burst:
+                        break
+                    self.stop.wait(self.poll_interval)
+                    continue
+                run(job)
+                self.processed += 1
+        finally:
+            if threading.current_thread() is not threading.main_thread():
+                connections.close_all()
+        return self.processed
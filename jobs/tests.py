@@ -0,0 +1,91 @@
+import datetime
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from .models import Job
+from . import queue
+
+calls = []
+
+
+@queue.task(name='jobs.tests.record')
+def record(value):
+    calls.append(value)
+
+
+@queue.task(name='jobs.tests.explode', max_attempts=2)
+def explode():
+    raise RuntimeError('boom')
+
+
+@override_settings(JOBS_EAGER=False)
+class QueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_coalesces_waiting_jobs_with_the_same_key(self):
+        first = record.enqueue({'value': 1}, key='a')
+        self.assertIsNotNone(first)
+        self.assertIsNone(record.enqueue({'value': 2}, key='a'))
+        self.assertIsNotNone(record.enqueue({'value': 3}, key='b'))
+        self.assertIsNotNone(record.enqueue({'value': 4}))
+        self.assertEqual(Job.objects.count(), 3)
+
+        # Once the job is running, a new one with the same key is queued again.
+        queue.claim('w1')
+        self.assertIsNotNone(record.enqueue({'value': 5}, key='a'))
+
+    def test_claim_leases_a_job_to_one_worker(self):
+        job = record.enqueue({'value': 1})
+        claimed = queue.claim('w1')
+        self.assertEqual(claimed.id, job.id)
+        self.assertEqual((claimed.status, claimed.locked_by, claimed.attempts), (Job.RUNNING, 'w1', 1))
+        self.assertIsNone(queue.claim('w2'))
+
+        self.assertTrue(queue.run(claimed))
+        self.assertEqual(calls, [1])
+        self.assertEqual(Job.objects.get(id=job.id).status, Job.DONE)
+
+    def test_claim_skips_jobs_not_yet_due(self):
+        record.enqueue({'value': 1}, delay=60)
+        self.assertIsNone(queue.claim('w1'))
+
+    def test_expired_lease_is_requeued(self):
+        job = record.enqueue({'value': 1})
+        queue.claim('w1')
+        self.assertEqual(queue.recover_stale(lease_timeout=60), 0)
+
+        Job.objects.filter(id=job.id).update(locked_at=timezone.now() - datetime.timedelta(seconds=120))
+        self.assertEqual(queue.recover_stale(lease_timeout=60), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), (Job.QUEUED, ''))
+        self.assertEqual(queue.claim('w2').locked_by, 'w2')
+
+    def test_expired_lease_out_of_attempts_fails(self):
+        job = explode.enqueue()
+        Job.objects.filter(id=job.id).update(
+            status=Job.RUNNING, attempts=2, locked_at=timezone.now() - datetime.timedelta(seconds=120),
+        )
+        queue.recover_stale(lease_timeout=60)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.last_error), (Job.FAILED, 'Lease expired.'))
+
+    def test_failed_job_is_retried_with_backoff_then_failed(self):
+        job = explode.enqueue()
+        self.assertFalse(queue.run(queue.claim('w1')))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('boom', job.last_error)
+
+        Job.objects.filter(id=job.id).update(run_at=timezone.now())
+        self.assertFalse(queue.run(queue.claim('w1')))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_jobs_run_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertIsNone(record.enqueue({'value': 7}))
+        self.assertEqual(calls, [7])
+        self.assertFalse(Job.objects.exists())
@@ -669,7 +669,10 @@ function renderVendors(vendors) {
     section.innerHTML = vendors.map(vendor => `
         <div class="col-md-4 col-lg-3 mb-4">
             <div class="card h-100 vendor-card">
-                <img src="${vendor.profile_pic || '/static/js/img/default_vendor.jpg'}" class="card-img-top" alt="${vendor.business_name}">
+                <picture>
+                    ${vendor.profile_pic_srcset ? `<source type="image/webp" srcset="${vendor.profile_pic_srcset.webp}" sizes="(min-width: 992px) 25vw, (min-width: 768px) 33vw, 100vw">` : ''}
+                    <img src="${vendor.profile_pic || '/static/js/img/default_vendor.jpg'}" ${vendor.profile_pic_srcset ? `srcset="${vendor.profile_pic_srcset.jpeg}" sizes="(min-width: 992px) 25vw, (min-width: 768px) 33vw, 100vw"` : ''} loading="lazy" class="card-img-top" alt="${vendor.business_name}">
+                </picture>
                 <div class="card-body">
                     <h5 class="card-title">${vendor.business_name}</h5>
                     <p class="card-text">${vendor.description || ''}</p>
@@ -0,0 +1,75 @@
+"""
+Authentication backend that caches the per-request user lookup.
+
+AuthenticationMiddleware resolves request.user through the backend's
+get_user() on every authenticated request. CachedModelBackend keeps the
+resolved User, with its vendor_profile_id already filled in, in the cache
+for USER_CACHE_TIMEOUT seconds, so together with cached sessions an
+authenticated request makes no queries before the view runs. The entry is
+dropped after User and VendorProfile saves and on logout (users/signals.py).
+
+Misses are read from the primary database, so a lagging replica can never
+put an outdated user back into the cache.
+
+Dropping an entry only reaches the cache it was dropped from, so settings
+only enable this backend when that cache is shared by every worker process
+(SHARED_CACHE); with a per-process cache, ModelBackend is used instead.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from vendors.models import VendorProfile
+
+KEY_PREFIX = 'users:user:v1'
+
+
+def _cache():
+    return caches[getattr(settings, 'USER_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'USER_CACHE_TIMEOUT', 300)
+
+
+def user_cache_key(user_id):
+    return f'{KEY_PREFIX}:{user_id}'
+
+
+def forget_user(user_id):
+    """Drop the cached user now and again once the current transaction commits."""
+    _cache().delete(user_cache_key(user_id))
+    transaction.on_commit(lambda: _cache().delete(user_cache_key(user_id)))
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = _cache().get(key)
+        if user is None:
+            user = self._load_user(user_id)
+            if user is None:
+                return None
+            _cache().set(key, user, _timeout())
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        user = await _cache().aget(user_cache_key(user_id))
+        if user is not None:
+            return user if self.user_can_authenticate(user) else None
+        return await sync_to_async(self.get_user)(user_id)
+
+    def _load_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.db_manager(DEFAULT_DB_ALIAS).get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        # Resolve it now so the cached copy carries it.
+        user.vendor_profile_id = (
+            VendorProfile.objects.db_manager(DEFAULT_DB_ALIAS)
+            .filter(user_id=user.pk).values_list('id', flat=True).first()
+        )
+        return user
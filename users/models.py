@@ -1,11 +1,20 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.utils.functional import cached_property
 
 # Create your models here.
 class User(AbstractUser):
     is_vendor = models.BooleanField(default=False)
     is_planner = models.BooleanField(default=False)
+    # Lets the review and guest list ETags notice a changed username or name.
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return super().__str__()
+
+    @cached_property
+    def vendor_profile_id(self):
+        """Id of the user's VendorProfile or None, without loading the profile."""
+        from vendors.models import VendorProfile
+        return VendorProfile.objects.filter(user_id=self.pk).values_list('id', flat=True).first()
     
\ No newline at end of file
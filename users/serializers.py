@@ -0,0 +1,26 @@
+from evently.profiling import profiled
+
+
+@profiled('serialize')
+def serialize_user(user):
+    """The full profile shape returned by the profile endpoint."""
+    return {
+        "id": user.id,
+        "username": user.username,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "email": user.email,
+        "is_vendor": user.is_vendor,
+        "is_planner": user.is_planner
+    }
+
+
+@profiled('serialize')
+def serialize_user_summary(user):
+    """The short shape embedded in guest records."""
+    return {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'full_name': user.get_full_name()
+    }
@@ -1,5 +1,7 @@
-from django.db.models.signals import post_save
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from .backends import forget_user
 from .models import User
 from vendors.models import VendorProfile
 @receiver(post_save, sender=User)
@@ -10,3 +12,18 @@ def create_vendor_profile(sender, instance, created, **kwargs):
         VendorProfile.objects.get_or_create(user=instance)
 
 
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=VendorProfile)
+def vendor_profile_changed(sender, instance, **kwargs):
+    # The cached user carries vendor_profile_id.
+    forget_user(instance.user_id)
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, request, user, **kwargs):
+    if user is not None:
+        forget_user(user.pk)
@@ -1,3 +1,165 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from django.contrib.auth import get_user
+from django.core.cache import caches
+from django.test import Client, RequestFactory, TestCase, override_settings
+from vendors.models import VendorProfile
+from .backends import CachedModelBackend, user_cache_key
+from .models import User
+from . import tokens
+
+
+@override_settings(AUTHENTICATION_BACKENDS=['users.backends.CachedModelBackend'])
+class CachedUserTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.backend = CachedModelBackend()
+        self.user = User.objects.create_user('vendor', 'vendor@example.com', 'pw', is_vendor=True)
+
+    def load(self):
+        return self.backend.get_user(self.user.pk)
+
+    def assertCached(self):
+        self.assertIsNotNone(caches['default'].get(user_cache_key(self.user.pk)))
+
+    def assertForgotten(self):
+        self.assertIsNone(caches['default'].get(user_cache_key(self.user.pk)))
+
+    def test_user_is_served_from_cache(self):
+        self.assertEqual(self.load().vendor_profile_id, self.user.vendor_profile.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.load(), self.user)
+
+    def test_user_save_forgets_cached_user(self):
+        self.load()
+        self.assertCached()
+        self.user.is_active = False
+        self.user.save()
+        self.assertForgotten()
+        self.assertIsNone(self.load())
+
+    def test_password_change_forgets_cached_user(self):
+        self.load()
+        self.user.set_password('new')
+        self.user.save()
+        self.assertForgotten()
+        self.assertTrue(self.load().check_password('new'))
+
+    def test_vendor_profile_change_forgets_cached_user(self):
+        self.load()
+        VendorProfile.objects.filter(user=self.user).delete()
+        # QuerySet.delete() sends post_delete per row.
+        self.assertForgotten()
+        self.assertIsNone(self.load().vendor_profile_id)
+
+    def test_user_delete_forgets_cached_user(self):
+        self.load()
+        self.user.delete()
+        self.assertForgotten()
+        self.assertIsNone(self.load())
+
+    def test_logout_forgets_cached_user(self):
+        self.client.force_login(self.user)
+        request = RequestFactory().get('/')
+        request.session = self.client.session
+        self.assertEqual(get_user(request), self.user)
+        self.assertCached()
+        self.client.get('/users/logout/')
+        self.assertForgotten()
+
+
+@override_settings(RATE_LIMITS={}, API_TOKEN_KEYS=['k1:first-secret'])
+class BearerTokenTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('planner', 'planner@example.com', 'pw', is_planner=True)
+        self.client = Client(enforce_csrf_checks=True)
+
+    def issue(self, **credentials):
+        return self.client.post(
+            '/users/token/', credentials or {'username': 'planner', 'password': 'pw'}, content_type='application/json',
+        )
+
+    def get_profile(self, token):
+        return self.client.get('/users/profile/', headers={'Authorization': f'Bearer {token}'})
+
+    def test_access_token_authenticates_without_session(self):
+        pair = self.issue().json()
+        response = self.get_profile(pair['access'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['email'], 'planner@example.com')
+        self.assertNotIn('sessionid', self.client.cookies)
+
+    def test_claims_are_verified_without_queries(self):
+        token = self.issue().json()['access']
+        with self.assertNumQueries(0):
+            user = tokens.token_user(tokens.decode(token))
+        self.assertEqual((user.pk, user.is_planner, user.is_vendor), (self.user.pk, True, False))
+
+    def test_tampered_token_is_rejected(self):
+        kid, body, signature = self.issue().json()['access'].split('.')
+        claims = tokens.decode(f'{kid}.{body}.{signature}')
+        forged = tokens._b64encode(json.dumps({**claims, 'stf': True}).encode())
+        for token in (f'{kid}.{forged}.{signature}', f'{kid}.{body}.{signature[:-2]}xx', 'not-a-token'):
+            response = self.get_profile(token)
+            self.assertEqual(response.status_code, 401, token)
+            self.assertIn('Bearer', response['WWW-Authenticate'])
+
+    def test_unknown_kid_is_rejected_and_old_keys_still_verify(self):
+        token = self.issue().json()['access']
+        with override_settings(API_TOKEN_KEYS=['k2:second-secret', 'k1:first-secret']):
+            self.assertEqual(self.get_profile(token).status_code, 200)
+            self.assertTrue(self.issue().json()['access'].startswith('k2.'))
+        with override_settings(API_TOKEN_KEYS=['k2:second-secret']):
+            self.assertEqual(self.get_profile(token).status_code, 401)
+
+    def test_expired_token_is_rejected(self):
+        with override_settings(API_ACCESS_TOKEN_SECONDS=-1):
+            token = self.issue().json()['access']
+        self.assertEqual(self.get_profile(token).status_code, 401)
+
+    def test_token_types_are_not_interchangeable(self):
+        pair = self.issue().json()
+        self.assertEqual(self.get_profile(pair['refresh']).status_code, 401)
+        response = self.client.post('/users/token/refresh/', {'refresh': pair['access']}, content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_refresh_issues_a_new_pair(self):
+        refresh = self.issue().json()['refresh']
+        response = self.client.post('/users/token/refresh/', {'refresh': refresh}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_profile(response.json()['access']).status_code, 200)
+
+    def test_refresh_fails_after_password_change_or_deactivation(self):
+        refresh = self.issue().json()['refresh']
+        self.user.set_password('new')
+        self.user.save()
+        response = self.client.post('/users/token/refresh/', {'refresh': refresh}, content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+
+        refresh = self.issue(username='planner', password='new').json()['refresh']
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.post('/users/token/refresh/', {'refresh': refresh}, content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_non_object_bodies_are_rejected(self):
+        for url in ('/users/token/', '/users/token/refresh/'):
+            for body in ('[1]', '"x"', '{"username": ["a"], "password": 1, "refresh": 5}'):
+                response = self.client.post(url, body, content_type='application/json')
+                self.assertEqual(response.status_code, 400, (url, body))
+
+    def test_csrf_is_only_skipped_for_bearer_requests(self):
+        token = self.issue().json()['access']
+        body = {'first_name': 'Pat'}
+        response = self.client.patch(
+            '/users/profile/', body, content_type='application/json', headers={'Authorization': f'Bearer {token}'},
+        )
+        self.assertEqual(response.status_code, 200)
+
+        self.client.force_login(self.user)
+        response = self.client.patch('/users/profile/', body, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        response = self.client.patch(
+            '/users/profile/', body, content_type='application/json', headers={'Authorization': 'Basic abc'},
+        )
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,203 @@
+"""
+Signed bearer tokens for API clients.
+
+A token is ``<kid>.<claims>.<signature>``: base64url JSON claims (user id,
+username, role flags, vendor profile id, type and expiry) and an HMAC-SHA256
+signature made with the key named by ``kid``. Verifying one needs no
+database access, so BearerTokenMiddleware can authenticate an API request
+from the Authorization header alone.
+
+Keys come from API_TOKEN_KEYS, a list of "kid:secret" entries. The first
+one signs new tokens; every listed key is accepted, so a key is rotated by
+putting a new one first and dropping the old one once its tokens have
+expired. Without API_TOKEN_KEYS, SECRET_KEY is used under the kid "default".
+
+Access tokens live API_ACCESS_TOKEN_SECONDS and cannot be revoked before
+then. Refresh tokens also carry a fingerprint of the password hash and are
+checked against the database when used, so changing the password or
+deactivating the user ends them.
+"""
+import base64
+import hmac
+import json
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+from django.utils.crypto import salted_hmac
+
+SALT = 'evently.users.tokens'
+ACCESS = 'access'
+REFRESH = 'refresh'
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+def signing_keys():
+    """{kid: secret} in priority order; the first key signs."""
+    entries = getattr(settings, 'API_TOKEN_KEYS', None) or []
+    keys = {}
+    for entry in entries:
+        kid, _, secret = entry.partition(':')
+        if kid and secret:
+            keys[kid] = secret
+    return keys or {'default': settings.SECRET_KEY}
+
+
+def access_lifetime():
+    return getattr(settings, 'API_ACCESS_TOKEN_SECONDS', 15 * 60)
+
+
+def refresh_lifetime():
+    return getattr(settings, 'API_REFRESH_TOKEN_SECONDS', 14 * 24 * 60 * 60)
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _signature(kid, body, secret):
+    return salted_hmac(SALT, f'{kid}.{body}', secret=secret, algorithm='sha256').digest()
+
+
+def _password_fingerprint(user):
+    return salted_hmac(SALT + '.password', user.password, algorithm='sha256').hexdigest()[:16]
+
+
+def encode(claims):
+    kid, secret = next(iter(signing_keys().items()))
+    body = _b64encode(json.dumps(claims, separators=(',', ':')).encode())
+    return f'{kid}.{body}.{_b64encode(_signature(kid, body, secret))}'
+
+
+def decode(token, expected_type=ACCESS):
+    """Return the claims of a valid, unexpired token of ``expected_type``; raises InvalidToken."""
+    try:
+        kid, body, signature = token.split('.')
+        secret = signing_keys()[kid]
+        given = _b64decode(signature)
+    except (ValueError, KeyError):
+        raise InvalidToken('Malformed token or unknown key.')
+    if not hmac.compare_digest(given, _signature(kid, body, secret)):
+        raise InvalidToken('Bad token signature.')
+    try:
+        claims = json.loads(_b64decode(body))
+    except ValueError:
+        raise InvalidToken('Malformed token.')
+    if claims.get('typ') != expected_type:
+        raise InvalidToken(f'Expected an {expected_type} token.')
+    if claims.get('exp', 0) < time.time():
+        raise InvalidToken('Token has expired.')
+    return claims
+
+
+def issue(user):
+    """A fresh access/refresh pair for ``user``, as returned by the token endpoints."""
+    now = int(time.time())
+    identity = {
+        'sub': user.pk,
+        'usr': user.get_username(),
+        'ven': user.is_vendor,
+        'pln': user.is_planner,
+        'stf': user.is_staff,
+        'vp': user.vendor_profile_id,
+        'iat': now,
+    }
+    return {
+        'token_type': 'Bearer',
+        'access': encode({**identity, 'typ': ACCESS, 'exp': now + access_lifetime()}),
+        'refresh': encode({**identity, 'typ': REFRESH, 'exp': now + refresh_lifetime(),
+                           'pwd': _password_fingerprint(user)}),
+        'expires_in': access_lifetime(),
+    }
+
+
+def refresh(token):
+    """Exchange a refresh token for a new pair, checking the user still exists and is unchanged."""
+    claims = decode(token, REFRESH)
+    User = get_user_model()
+    user = User._default_manager.filter(pk=claims['sub'], is_active=True).first()
+    if user is None or not hmac.compare_digest(claims.get('pwd', ''), _password_fingerprint(user)):
+        raise InvalidToken('Refresh token is no longer valid.')
+    return issue(user)
+
+
+def token_user(claims):
+    """
+    A User carrying only what the token holds. It compares equal to the
+    stored user and works in queryset filters, but must not be saved; load
+    the full record (see users.views.profile) before changing it.
+    """
+    User = get_user_model()
+    user = User(
+        id=claims['sub'],
+        username=claims['usr'],
+        is_vendor=claims['ven'],
+        is_planner=claims['pln'],
+        is_staff=claims['stf'],
+        is_active=True,
+    )
+    user._state.adding = False
+    user.vendor_profile_id = claims['vp']
+    user.is_token_user = True
+    return user
+
+
+def bearer_token(request):
+    header = request.headers.get('Authorization', '')
+    scheme, _, token = header.partition(' ')
+    if scheme.lower() != 'bearer' or not token.strip():
+        return None
+    return token.strip()
+
+
+class BearerTokenMiddleware:
+    """
+    Authenticate requests that carry ``Authorization: Bearer <access token>``.
+    Must come after AuthenticationMiddleware. Such requests skip the session
+    and CSRF checks (no cookies are involved); an invalid token is a 401.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        error = self.authenticate(request)
+        return error or self.get_response(request)
+
+    async def __acall__(self, request):
+        error = self.authenticate(request)
+        return error or await self.get_response(request)
+
+    def authenticate(self, request):
+        token = bearer_token(request)
+        if token is None:
+            return None
+        try:
+            user = token_user(decode(token))
+        except InvalidToken as e:
+            response = JsonResponse({'error': str(e)}, status=401)
+            response['WWW-Authenticate'] = 'Bearer error="invalid_token"'
+            return response
+
+        async def auser():
+            return user
+
+        request.user = user
+        request.auser = auser
+        request._dont_enforce_csrf_checks = True
+        return None
@@ -12,4 +12,6 @@ urlpatterns = [
 #    path('logout/', views.logout_view, name='logout'),
 #    path('register/', views.register, name='register'),
     path('profile/', views.profile, name='profile'),
+    path('token/', views.issue_token, name='issue_token'),
+    path('token/refresh/', views.refresh_token, name='refresh_token'),
 ]
\ No newline at end of file
@@ -1,5 +1,6 @@
 from django.shortcuts import render, redirect
-from django.contrib.auth import authenticate, login, logout
+from django.conf import settings
+from django.contrib.auth import authenticate, load_backend, login, logout
 from django.db import IntegrityError
 from django.http import JsonResponse
 from django.contrib import messages
@@ -7,6 +8,8 @@ from django.contrib.auth.decorators import login_required
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 from .models import *
+from .serializers import serialize_user
+from . import tokens
 import json
 # Create your views here.
 
@@ -69,17 +72,14 @@ def logout_page(request):
 @login_required
 def profile(request):
     user = request.user
+    if getattr(user, "is_token_user", False):
+        # A bearer token only carries the id and role flags.
+        user = load_backend(settings.AUTHENTICATION_BACKENDS[0]).get_user(user.pk)
+        if user is None:
+            return JsonResponse({"error": "User no longer exists."}, status=401)
 
     if request.method == "GET":
-        return JsonResponse({
-            "id": user.id,
-            "username": user.username,
-            "first_name": user.first_name,
-            "last_name": user.last_name,
-            "email": user.email,
-            "is_vendor": user.is_vendor,
-            "is_planner": user.is_planner
-        })
+        return JsonResponse(serialize_user(user))
 
     elif request.method == "PATCH":
         data = json.loads(request.body)
@@ -89,19 +89,48 @@ def profile(request):
         # Add other fields as necessary
 
         user.save()
-        return JsonResponse({
-            "id": user.id,
-            "username": user.username,
-            "first_name": user.first_name,
-            "last_name": user.last_name,
-            "email": user.email,
-            "is_vendor": user.is_vendor,
-            "is_planner": user.is_planner
-        })
+        return JsonResponse(serialize_user(user))
 
     else:
         return JsonResponse({"error": "Method not allowed."}, status=405)
 
+@csrf_exempt
+@require_POST
+def issue_token(request):
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON."}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({"error": "Expected a JSON object."}, status=400)
+    username = data.get("username")
+    password = data.get("password")
+
+    if not isinstance(username, str) or not isinstance(password, str) or not username or not password:
+        return JsonResponse({"error": "Username and password are required."}, status=400)
+
+    user = authenticate(request, username=username, password=password)
+    if user is None:
+        return JsonResponse({"error": "Invalid credentials."}, status=401)
+    return JsonResponse(tokens.issue(user))
+
+@csrf_exempt
+@require_POST
+def refresh_token(request):
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON."}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({"error": "Expected a JSON object."}, status=400)
+    if not isinstance(data.get("refresh"), str) or not data["refresh"]:
+        return JsonResponse({"error": "refresh is required."}, status=400)
+
+    try:
+        return JsonResponse(tokens.refresh(data["refresh"]))
+    except tokens.InvalidToken as e:
+        return JsonResponse({"error": str(e)}, status=401)
+
 '''
 @csrf_exempt
 @require_POST
@@ -1,9 +1,11 @@
 from django.contrib import admin
-from .models import VendorProfile, ServiceCategory, Service, PortfolioItem, Review
+from .models import VendorProfile, ServiceCategory, Service, PortfolioItem, Review, AvailabilityBlock
 
 # Register your models here.
 admin.site.register(VendorProfile)
 admin.site.register(ServiceCategory)
 admin.site.register(Service)
 admin.site.register(PortfolioItem)
-admin.site.register(Review)
\ No newline at end of file
+admin.site.register(Review)
+admin.site.register(AvailabilityBlock)
+
@@ -0,0 +1,9 @@
+from django.urls import path
+from . import async_views
+
+urlpatterns = [
+    path('', async_views.vendors, name='async-vendors'),
+    path('categories/', async_views.categories, name='async-categories'),
+    path('dashboard/bookings/', async_views.vendor_bookings, name='async-vendor-bookings'),
+    path('<int:id>/', async_views.vendor_detail, name='async-vendor-detail'),
+]
@@ -0,0 +1,129 @@
+"""
+Async versions of the read-only vendor endpoints, mounted under /async/vendors/.
+
+They return the same JSON as their counterparts in views.py but run on the
+event loop under ASGI, using request.auser() and the async ORM instead of a
+sync_to_async hop per request. Independent queries run concurrently through
+evently.aio.gather(); serialization happens there too, because following
+relations and iterating querysets are synchronous ORM calls that must not run
+on the event loop.
+"""
+from django.contrib.auth.decorators import login_required
+from django.db.models import Max
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_GET
+from .models import VendorProfile, ServiceCategory, Service
+from . import availability, facets, ranking
+from .cache import cache_response
+from .serializers import serialize_service, serialize_vendor, service_queryset, vendor_queryset
+from events.models import VendorBooking
+from events.serializers import booking_queryset, serialize_booking
+from evently import aio
+from evently.conditional import acondition, make_etag
+from evently.pagination import InvalidCursor, paginate
+
+
+@require_GET
+@cache_response('categories', ['categories'])
+async def categories(request):
+    data = [
+        {
+            'id': cat.id,
+            'name': cat.name,
+            'description': cat.description
+        } async for cat in ServiceCategory.objects.all()
+    ]
+    return JsonResponse(data, safe=False, status=200)
+
+
+@require_GET
+@cache_response('vendors', ['vendors', 'categories'])
+async def vendors(request):
+    try:
+        vendors = facets.filter_vendors(vendor_queryset(), request.GET)
+        vendors, keys, descending = ranking.sort_vendors(vendors, request.GET.get('sort'))
+    except (availability.InvalidRange, ranking.InvalidSort) as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    def fetch_vendors():
+        page = paginate(request, vendors, keys=keys, descending=descending)
+        data = {'vendors': [serialize_vendor(vendor) for vendor in (vendors if page is None else page.items)]}
+        if page is not None:
+            data['next'] = page.next_cursor
+        return data
+
+    try:
+        # The vendor page and the category counts are independent queries.
+        data, category_counts = await aio.gather(fetch_vendors, lambda: facets.category_counts(request.GET))
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    data['facets'] = {'categories': category_counts}
+    return JsonResponse(data, status=200)
+
+
+async def _vendor_detail_etag(request, id):
+    row = await (
+        VendorProfile.objects.filter(id=id)
+        .values('updated_at', *VendorProfile.STAT_FIELDS, *VendorProfile.IMAGE_FIELDS, *VendorProfile.RANKING_FIELDS)
+        .annotate(services_updated=Max('services__updated_at'))
+        .order_by('id')
+        .afirst()
+    )
+    if row is None:
+        return None
+    return make_etag(request, *row.values())
+
+
+@require_GET
+@acondition(etag_func=_vendor_detail_etag)
+@cache_response('vendor-detail', lambda request, id: ['categories', f'vendor:{id}'])
+async def vendor_detail(request, id):
+    def fetch_vendor():
+        vendor = vendor_queryset().filter(id=id).first()
+        if vendor is None:
+            return None
+        data = serialize_vendor(vendor)
+        data['rating_histogram'] = vendor.rating_histogram
+        return data
+
+    # The services are looked up by vendor id, so both queries can run at once.
+    data, services = await aio.gather(
+        fetch_vendor,
+        lambda: [serialize_service(service) for service in service_queryset(Service.objects.filter(vendor_id=id))],
+    )
+    if data is None:
+        raise Http404('No VendorProfile matches the given query.')
+    data['services'] = services
+    return JsonResponse({'vendor': data}, status=200)
+
+
+@require_GET
+@login_required
+async def vendor_bookings(request):
+    user = await request.auser()
+    if not user.is_vendor:
+        return JsonResponse({'error': 'Access denied. Vendor account required.'}, status=403)
+
+    # CachedModelBackend and bearer tokens fill this in; otherwise it is a
+    # cached_property that would query synchronously.
+    if 'vendor_profile_id' in user.__dict__:
+        vendor_id = user.vendor_profile_id
+    else:
+        vendor_id = await VendorProfile.objects.filter(user_id=user.pk).values_list('id', flat=True).afirst()
+    if vendor_id is None:
+        return JsonResponse({'error': 'Vendor profile not found.'}, status=404)
+
+    bookings = booking_queryset(VendorBooking.objects.filter(vendor_id=vendor_id).order_by('-created_at'))
+
+    def fetch_bookings():
+        page = paginate(request, bookings, descending=True)
+        data = {'bookings': [serialize_booking(booking) for booking in (bookings if page is None else page.items)]}
+        if page is not None:
+            data['next'] = page.next_cursor
+        return data
+
+    try:
+        [data] = await aio.gather(fetch_bookings)
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse(data, status=200)
@@ -0,0 +1,120 @@
+"""
+Vendor availability calendar.
+
+AvailabilityBlock rows mark days a vendor (service=None) or a single service
+cannot take bookings. Vendors add blackouts themselves; every booking that is
+not cancelled owns a one-day block on its event's date, kept in step by the
+signal handlers in vendors/signals.py.
+
+Blocks are date ranges capped at MAX_BLOCK_DAYS, so "which blocks cover day
+D" only has to look at blocks starting in the MAX_BLOCK_DAYS before D: a
+bounded index range, however many past bookings a vendor has.
+"""
+import datetime
+
+from django.db.models import Q
+from django.utils import timezone
+from events.models import Event
+from .models import AvailabilityBlock, VendorProfile
+
+MAX_BLOCK_DAYS = 366
+
+
+class InvalidRange(ValueError):
+    pass
+
+
+class Unavailable(Exception):
+    def __init__(self, block):
+        super().__init__('The vendor is not available on this date.')
+        self.block = block
+
+
+def event_day(value):
+    """The calendar day of an event's date, in the site's time zone."""
+    if timezone.is_aware(value):
+        return timezone.localdate(value)
+    return value.date()
+
+
+def parse_day(value, name='date'):
+    try:
+        return datetime.date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise InvalidRange(f'{name} must be a date in YYYY-MM-DD format.')
+
+
+def validate_range(start, end):
+    if end < start:
+        raise InvalidRange('end_date must not be before start_date.')
+    if (end - start).days >= MAX_BLOCK_DAYS:
+        raise InvalidRange(f'A block can span at most {MAX_BLOCK_DAYS} days.')
+
+
+def covering(blocks, day):
+    """Narrow ``blocks`` to the ones that include ``day``."""
+    earliest = day - datetime.timedelta(days=MAX_BLOCK_DAYS - 1)
+    return blocks.filter(start_date__gte=earliest, start_date__lte=day, end_date__gte=day)
+
+
+def overlapping(blocks, start, end):
+    """Narrow ``blocks`` to the ones that share at least one day with start..end."""
+    earliest = start - datetime.timedelta(days=MAX_BLOCK_DAYS - 1)
+    return blocks.filter(start_date__gte=earliest, start_date__lte=end, end_date__gte=start)
+
+
+def blocked_vendor_ids(day):
+    """Subquery of the vendors with a vendor-wide block on ``day``."""
+    return covering(AvailabilityBlock.objects.filter(service__isnull=True), day).values('vendor_id')
+
+
+def filter_available(vendors, day):
+    return vendors.exclude(id__in=blocked_vendor_ids(day))
+
+
+def find_conflict(vendor_id, service_id, day, exclude_booking_id=None):
+    """The first block stopping ``service_id`` of ``vendor_id`` from being booked on ``day``, or None."""
+    blocks = AvailabilityBlock.objects.filter(Q(service__isnull=True) | Q(service_id=service_id), vendor_id=vendor_id)
+    if exclude_booking_id is not None:
+        blocks = blocks.exclude(booking_id=exclude_booking_id)
+    return covering(blocks, day).order_by('start_date', 'id').first()
+
+
+def ensure_available(booking):
+    """
+    Raise Unavailable if another block covers the day of ``booking``. Call it
+    in the transaction that saved the booking, so a conflict rolls it back.
+    """
+    # Serialize bookings per vendor: a concurrent booking either committed
+    # before we get the lock (and its block is seen) or waits for us.
+    list(VendorProfile.objects.select_for_update().filter(pk=booking.vendor_id).values_list('pk'))
+    day = event_day(Event.objects.values_list('date', flat=True).get(pk=booking.event_id))
+    conflict = find_conflict(booking.vendor_id, booking.service_id, day, exclude_booking_id=booking.pk)
+    if conflict is not None:
+        raise Unavailable(conflict)
+
+
+def sync_booking(booking):
+    """Give an active booking a block on its event's day, and drop the block of a cancelled one."""
+    if booking.status == 'cancelled':
+        AvailabilityBlock.objects.filter(booking_id=booking.pk).delete()
+        return
+    day = event_day(Event.objects.values_list('date', flat=True).get(pk=booking.event_id))
+    AvailabilityBlock.objects.update_or_create(
+        booking_id=booking.pk,
+        defaults={
+            'vendor_id': booking.vendor_id,
+            'service_id': booking.service_id,
+            'kind': AvailabilityBlock.BOOKING,
+            'start_date': day,
+            'end_date': day,
+        },
+    )
+
+
+def sync_event(event_id):
+    """Move the blocks of an event's bookings after its date changed."""
+    date = Event.objects.filter(pk=event_id).values_list('date', flat=True).first()
+    if date is not None:
+        day = event_day(date)
+        AvailabilityBlock.objects.filter(booking__event_id=event_id).update(start_date=day, end_date=day)
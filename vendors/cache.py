@@ -0,0 +1,183 @@
+"""
+Versioned response cache for the public catalog reads.
+
+Cached entries are keyed on an endpoint name, the normalized query string and
+the current version of every scope the response depends on ("categories",
+"vendors" for any vendor-side change, and "vendor:<id>" for one vendor). The
+signal handlers in vendors/signals.py bump the affected versions after each
+commit, which makes the old entries unreachable without flushing anything;
+they simply age out of the cache.
+
+Works with any Django cache backend, including the local-memory and file
+backends. Set CATALOG_CACHE_ALIAS to use a dedicated cache.
+"""
+import functools
+import hashlib
+import time
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from evently.db_router import reading_from_replica, sticky_seconds
+
+PREFIX = 'catalog'
+
+
+def _cache():
+    return caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300)
+
+
+def _version_key(scope):
+    return f'{PREFIX}:version:{scope}'
+
+
+def get_versions(scopes):
+    cache = _cache()
+    keys = {_version_key(scope): scope for scope in scopes}
+    found = cache.get_many(keys)
+    versions = {}
+    for key, scope in keys.items():
+        if key not in found:
+            # Start from the clock rather than 0 so a version key that was
+            # evicted never comes back with a number that was used before.
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key)
+        versions[scope] = found[key]
+    return versions
+
+
+def bump(*scopes):
+    cache = _cache()
+    cache.set(f'{PREFIX}:bumped_at', time.time(), timeout=None)
+    for scope in scopes:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def bump_on_commit(*scopes):
+    transaction.on_commit(lambda: bump(*scopes))
+
+
+def normalize_query(querydict):
+    return '&'.join(
+        f'{key}={value}'
+        for key in sorted(querydict)
+        for value in sorted(querydict.getlist(key))
+    )
+
+
+def make_key(namespace, params, scopes):
+    versions = get_versions(scopes)
+    fingerprint = '|'.join([namespace, params] + [f'{scope}={versions[scope]}' for scope in sorted(scopes)])
+    return f'{PREFIX}:entry:{namespace}:' + hashlib.sha256(fingerprint.encode()).hexdigest()
+
+
+def record(outcome):
+    cache = _cache()
+    key = f'{PREFIX}:stats:{outcome}'
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def stats():
+    found = _cache().get_many([f'{PREFIX}:stats:hit', f'{PREFIX}:stats:miss'])
+    hits = found.get(f'{PREFIX}:stats:hit', 0)
+    misses = found.get(f'{PREFIX}:stats:miss', 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else 0,
+    }
+
+
+def replica_may_lag():
+    """
+    True if this request read from a replica that may not have the latest
+    change yet; caching its response would pin stale data to the new version.
+    """
+    if not reading_from_replica():
+        return False
+    bumped_at = _cache().get(f'{PREFIX}:bumped_at', 0)
+    return time.time() - bumped_at < sticky_seconds()
+
+
+def get_or_set(namespace, params, scopes, builder):
+    """Return the cached value for (namespace, params) or build and store it."""
+    cache = _cache()
+    key = make_key(namespace, params, scopes)
+    value = cache.get(key)
+    if value is not None:
+        record('hit')
+        return value
+    record('miss')
+    value = builder()
+    if not replica_may_lag():
+        cache.set(key, value, _timeout())
+    return value
+
+
+def cache_response(namespace, scopes):
+    """
+    Cache successful responses of a GET view. ``scopes`` is a list of scope
+    names or a callable taking the view's arguments and returning one. Works
+    on sync and async views; for async views the cache calls run in a worker
+    thread so a network cache backend never blocks the event loop.
+    """
+    def lookup(request, *args, **kwargs):
+        view_scopes = scopes(request, *args, **kwargs) if callable(scopes) else scopes
+        key = make_key(namespace, normalize_query(request.GET), view_scopes)
+        entry = _cache().get(key)
+        record('miss' if entry is None else 'hit')
+        return key, entry
+
+    def hit(entry):
+        status, content_type, content = entry
+        response = HttpResponse(content, status=status, content_type=content_type)
+        response['X-Cache'] = 'HIT'
+        return response
+
+    def store(key, response):
+        if response.status_code == 200 and not response.streaming and not replica_may_lag():
+            _cache().set(key, (response.status_code, response['Content-Type'], response.content), _timeout())
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view(request, *args, **kwargs)
+                key, entry = await sync_to_async(lookup, thread_sensitive=False)(request, *args, **kwargs)
+                if entry is not None:
+                    return hit(entry)
+                response = await view(request, *args, **kwargs)
+                await sync_to_async(store, thread_sensitive=False)(key, response)
+                response['X-Cache'] = 'MISS'
+                return response
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            key, entry = lookup(request, *args, **kwargs)
+            if entry is not None:
+                return hit(entry)
+            response = view(request, *args, **kwargs)
+            store(key, response)
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
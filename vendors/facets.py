@@ -0,0 +1,156 @@
+"""
+Precomputed catalog facets.
+
+Each vendor has one VendorCategoryFacet row per category it offers services
+in, holding that category's price range and service count, plus an overall
+price range on VendorProfile itself. Catalog filtering then becomes indexed
+lookups on these rows instead of joins through Service with DISTINCT. A
+facet's [min, max] span only narrows the candidates for a price filter; a
+vendor matches when one of its services (in the requested category, if any)
+is actually priced inside the range, checked with an EXISTS per candidate.
+?available_on= drops vendors blocked that day (see vendors/availability.py).
+"""
+from django.db import transaction
+from django.db.models import Count, Exists, Max, Min, OuterRef, Q
+from .models import VendorProfile, ServiceCategory, Service, VendorCategoryFacet
+from . import availability
+
+
+def refresh_vendor_facets(vendor_id):
+    rows = (
+        Service.objects.filter(vendor_id=vendor_id, category__isnull=False)
+        .order_by()
+        .values('category_id')
+        .annotate(min_price=Min('price'), max_price=Max('price'), services_count=Count('pk'))
+    )
+    score = VendorProfile.objects.filter(pk=vendor_id).values_list('ranking_score', flat=True).first() or 0
+    with transaction.atomic():
+        by_category = {row['category_id']: row for row in rows}
+        VendorCategoryFacet.objects.filter(vendor_id=vendor_id).exclude(category_id__in=by_category).delete()
+        for category_id, row in by_category.items():
+            VendorCategoryFacet.objects.update_or_create(
+                vendor_id=vendor_id,
+                category_id=category_id,
+                defaults={
+                    'min_price': row['min_price'],
+                    'max_price': row['max_price'],
+                    'services_count': row['services_count'],
+                    'ranking_score': score,
+                },
+            )
+        prices = Service.objects.filter(vendor_id=vendor_id).aggregate(low=Min('price'), high=Max('price'))
+        VendorProfile.objects.filter(pk=vendor_id).update(
+            min_service_price=prices['low'],
+            max_service_price=prices['high'],
+        )
+
+
+def rebuild_facets():
+    """Recompute every facet row and vendor price range; returns the number of facet rows."""
+    rows = (
+        Service.objects.filter(category__isnull=False)
+        .order_by()
+        .values('vendor_id', 'category_id')
+        .annotate(min_price=Min('price'), max_price=Max('price'), services_count=Count('pk'))
+    )
+    vendors = list(VendorProfile.objects.only('pk', 'ranking_score', *VendorProfile.FACET_FIELDS))
+    scores = {vendor.pk: vendor.ranking_score for vendor in vendors}
+    facets = [VendorCategoryFacet(ranking_score=scores.get(row['vendor_id'], 0), **row) for row in rows.iterator()]
+    prices = {
+        row['vendor_id']: row
+        for row in Service.objects.order_by().values('vendor_id').annotate(low=Min('price'), high=Max('price'))
+    }
+    for vendor in vendors:
+        row = prices.get(vendor.pk, {})
+        vendor.min_service_price = row.get('low')
+        vendor.max_service_price = row.get('high')
+    with transaction.atomic():
+        VendorCategoryFacet.objects.all().delete()
+        VendorCategoryFacet.objects.bulk_create(facets, batch_size=500)
+        VendorProfile.objects.bulk_update(vendors, VendorProfile.FACET_FIELDS, batch_size=500)
+    return len(facets)
+
+
+def category_ids(category):
+    """Resolve the ?category= value (an id, or a name fragment) to category ids."""
+    try:
+        return [int(category)]
+    except (ValueError, TypeError):
+        return ServiceCategory.objects.filter(name__icontains=category).values('id')
+
+
+def _price_q(price_min, price_max, low, high):
+    condition = Q()
+    if price_min:
+        condition &= Q(**{f'{high}__gte': price_min})
+    if price_max:
+        condition &= Q(**{f'{low}__lte': price_max})
+    return condition
+
+
+def _priced_services(price_min, price_max):
+    """Services priced inside the requested range."""
+    services = Service.objects.all()
+    if price_min:
+        services = services.filter(price__gte=price_min)
+    if price_max:
+        services = services.filter(price__lte=price_max)
+    return services
+
+
+def _available_on(params):
+    value = params.get('available_on')
+    return availability.parse_day(value, 'available_on') if value else None
+
+
+def filter_vendors(vendors, params):
+    """Apply the catalog filters; raises availability.InvalidRange for a malformed available_on."""
+    category = params.get('category')
+    location = params.get('location')
+    price_min = params.get('price_min')
+    price_max = params.get('price_max')
+    if location:
+        vendors = vendors.filter(location__icontains=location)
+    if category:
+        facets = VendorCategoryFacet.objects.filter(
+            _price_q(price_min, price_max, 'min_price', 'max_price'),
+            category_id__in=category_ids(category),
+        )
+        vendors = vendors.filter(id__in=facets.values('vendor_id'))
+    else:
+        vendors = vendors.filter(_price_q(price_min, price_max, 'min_service_price', 'max_service_price'))
+    if price_min or price_max:
+        services = _priced_services(price_min, price_max).filter(vendor_id=OuterRef('pk'))
+        if category:
+            services = services.filter(category_id__in=category_ids(category))
+        vendors = vendors.filter(Exists(services))
+    day = _available_on(params)
+    if day:
+        vendors = availability.filter_available(vendors, day)
+    return vendors
+
+
+def category_counts(params):
+    """
+    Vendors per category for the current location and price filters. The
+    category filter itself is left out so every chip shows what it would yield.
+    """
+    price_min = params.get('price_min')
+    price_max = params.get('price_max')
+    facets = VendorCategoryFacet.objects.filter(_price_q(price_min, price_max, 'min_price', 'max_price'))
+    if price_min or price_max:
+        facets = facets.filter(Exists(_priced_services(price_min, price_max).filter(
+            vendor_id=OuterRef('vendor_id'), category_id=OuterRef('category_id'),
+        )))
+    if params.get('location'):
+        facets = facets.filter(vendor__location__icontains=params['location'])
+    day = _available_on(params)
+    if day:
+        facets = facets.exclude(vendor_id__in=availability.blocked_vendor_ids(day))
+    rows = (
+        facets.order_by()
+        .values('category_id', 'category__name')
+        .annotate(count=Count('vendor_id'))
+        .order_by('category__name')
+    )
+    return [{'id': row['category_id'], 'name': row['category__name'], 'count': row['count']} for row in rows]
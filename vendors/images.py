@@ -0,0 +1,176 @@
+"""
+Resized derivatives of vendor images.
+
+Every uploaded portfolio image and vendor profile picture gets a JPEG and a
+WebP copy at each width in IMAGE_DERIVATIVE_WIDTHS (never upscaled), with EXIF
+and other metadata dropped after applying the orientation tag. Derivatives
+live at a path derived from the original file name, e.g.
+
+    vendor_portfolio/wedding.jpeg -> derivatives/vendor_portfolio/wedding/640w.webp
+
+so regenerating them overwrites the same files. The variant map is stored on
+the model row (PortfolioItem.image_variants, VendorProfile.profile_pic_variants)
+and turned into srcset strings by srcset().
+
+Generation runs as a background job (jobs/queue.py), queued by the save
+signal when the image changes, so it never adds to request latency. Until
+the map is ready srcset() returns None and clients fall back to the original
+URL. srcset() only reads the stored map: it touches neither storage nor the
+job queue, so serializing stays cheap on cached and replica reads.
+`manage.py generate_image_derivatives` backfills missing maps and
+regenerates those whose files have gone missing from storage.
+"""
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+DEFAULT_WIDTHS = (320, 640, 1280)
+
+FORMATS = {
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+}
+
+DERIVATIVES_ROOT = 'derivatives'
+
+
+def widths():
+    return tuple(getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', DEFAULT_WIDTHS))
+
+
+def derivative_name(source_name, width, fmt):
+    stem = os.path.splitext(source_name)[0]
+    return f'{DERIVATIVES_ROOT}/{stem}/{width}w.{FORMATS[fmt][1]}'
+
+
+def render(source, width, fmt):
+    """Return the encoded bytes of ``source`` (an open PIL image) at ``width``."""
+    pil_format, _, options = FORMATS[fmt]
+    image = source.copy()
+    image.thumbnail((width, width * 10), Image.LANCZOS)
+    buffer = io.BytesIO()
+    # Nothing from info (exif, icc_profile, xmp) is passed on, which strips it.
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def generate(fieldfile, storage=None):
+    """
+    Write every derivative of ``fieldfile`` and return its variant map:
+    ``{'source': name, 'width': w, 'height': h, 'files': {fmt: {width: name}}}``.
+    Files that are not images get ``{'source': name, 'files': {}}``.
+    """
+    storage = storage or default_storage
+    try:
+        with fieldfile.open('rb'):
+            source = Image.open(fieldfile)
+            source = ImageOps.exif_transpose(source)
+            source.load()
+    except (UnidentifiedImageError, OSError):
+        return {'source': fieldfile.name, 'files': {}}
+
+    if source.mode not in ('RGB', 'L'):
+        source = source.convert('RGB')
+
+    sizes = [width for width in widths() if width < source.width] or [source.width]
+    files = {fmt: {} for fmt in FORMATS}
+    for width in sizes:
+        for fmt in FORMATS:
+            name = derivative_name(fieldfile.name, width, fmt)
+            if storage.exists(name):
+                storage.delete(name)
+            storage.save(name, ContentFile(render(source, width, fmt)))
+            files[fmt][str(width)] = name
+    return {'source': fieldfile.name, 'width': source.width, 'height': source.height, 'files': files}
+
+
+def delete_derivatives(variants, storage=None):
+    storage = storage or default_storage
+    for names in (variants or {}).get('files', {}).values():
+        for name in names.values():
+            storage.delete(name)
+
+
+def is_current(fieldfile, variants):
+    return bool(fieldfile) and bool(variants) and variants.get('source') == fieldfile.name
+
+
+def srcset(fieldfile, variants):
+    """
+    ``{'jpeg': 'url 320w, url 640w', 'webp': ...}`` for ``fieldfile``, or None
+    while its derivatives are not generated yet.
+    """
+    if not is_current(fieldfile, variants) or not variants['files']:
+        return None
+    return {
+        fmt: ', '.join(
+            f'{default_storage.url(name)} {width}w'
+            for width, name in sorted(names.items(), key=lambda item: int(item[0]))
+        )
+        for fmt, names in variants['files'].items()
+    }
+
+
+def files_present(variants, storage=None):
+    """False if the derivatives of ``variants`` have gone missing from storage."""
+    storage = storage or default_storage
+    # The files of one map are written and deleted together, so checking the
+    # smallest one is enough to notice a wiped media directory.
+    for names in variants['files'].values():
+        if names:
+            smallest = min(names, key=int)
+            return storage.exists(names[smallest])
+    return True
+
+
+# Background generation
+
+VARIANT_FIELDS = {
+    # (model label, image field) -> field holding the variant map
+    ('vendors.PortfolioItem', 'image'): 'image_variants',
+    ('vendors.VendorProfile', 'profile_pic'): 'profile_pic_variants',
+}
+
+
+def request_regeneration(instance, field_name):
+    """Queue a regeneration of ``instance.<field_name>``'s derivatives."""
+    from .tasks import generate_image_derivatives
+
+    if instance.pk is None:
+        return
+    label = instance._meta.label
+    generate_image_derivatives.enqueue(
+        {'model': label, 'pk': instance.pk, 'field_name': field_name},
+        key=f'{label}:{instance.pk}:{field_name}',
+    )
+
+
+def process(model, pk, field_name):
+    """Generate and store the variant map for one row; returns it, or None if the row is gone."""
+    variants_field = VARIANT_FIELDS[(model._meta.label, field_name)]
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return None
+    fieldfile = getattr(instance, field_name)
+    old = getattr(instance, variants_field)
+    variants = generate(fieldfile) if fieldfile else {}
+    if old and old.get('source') != variants.get('source'):
+        delete_derivatives(old)
+    rows = model.objects.filter(pk=pk)
+    if fieldfile:
+        # Only store the map if the image has not been replaced in the meantime.
+        rows = rows.filter(**{field_name: fieldfile.name})
+    rows.update(**{variants_field: variants})
+    _invalidate(instance)
+    return variants
+
+
+def _invalidate(instance):
+    from . import cache
+
+    vendor_id = instance.pk if instance._meta.model_name == 'vendorprofile' else instance.vendor_id
+    cache.bump('vendors', f'vendor:{vendor_id}')
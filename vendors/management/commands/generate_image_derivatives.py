@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from vendors import images
+from vendors.models import PortfolioItem, VendorProfile
+
+
+class Command(BaseCommand):
+    help = "Generate resized JPEG/WebP derivatives for portfolio images and vendor profile pictures."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', dest='regenerate_all',
+                            help="Regenerate every image, not only those whose derivatives are "
+                                 "missing, stale or gone from storage.")
+
+    def handle(self, *args, **options):
+        total = 0
+        for model, field_name in ((PortfolioItem, 'image'), (VendorProfile, 'profile_pic')):
+            variants_field = images.VARIANT_FIELDS[(model._meta.label, field_name)]
+            rows = model.objects.exclude(**{f'{field_name}__isnull': True}).exclude(**{field_name: ''})
+            for pk, name, variants in rows.values_list('pk', field_name, variants_field).iterator():
+                current = variants and variants.get('source') == name and images.files_present(variants)
+                if current and not options['regenerate_all']:
+                    continue
+                images.process(model, pk, field_name)
+                total += 1
+        self.stdout.write(self.style.SUCCESS(f"Generated derivatives for {total} image(s)."))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from vendors.search import get_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the vendor/service full-text search index from scratch."
+
+    def handle(self, *args, **options):
+        get_backend().rebuild()
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from vendors.facets import rebuild_facets
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-category vendor facets and vendor price ranges from Service rows."
+
+    def handle(self, *args, **options):
+        count = rebuild_facets()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} vendor facet row(s)."))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from vendors import cache
+from vendors.models import VendorProfile
+from vendors.ranking import refresh_scores
+
+
+class Command(BaseCommand):
+    help = "Recompute every vendor's ranking score. Run daily so the recency signal keeps ageing."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vendor', type=int, action='append', dest='vendor_ids',
+                            help="Only process this vendor id (may be repeated).")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        vendors = VendorProfile.objects.all()
+        if options['vendor_ids']:
+            vendors = vendors.filter(pk__in=options['vendor_ids'])
+
+        count = refresh_scores(vendors, batch_size=options['batch_size'])
+        # Vendor detail responses are cached per vendor, not under 'vendors'.
+        vendor_ids = vendors.values_list('pk', flat=True).iterator()
+        cache.bump('vendors', *(f'vendor:{vendor_id}' for vendor_id in vendor_ids))
+        self.stdout.write(self.style.SUCCESS(f"Refreshed ranking scores for {count} vendor(s)."))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from vendors.models import VendorProfile
+from vendors.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized rating, review, service and portfolio counters on VendorProfile."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vendor', type=int, action='append', dest='vendor_ids',
+                            help="Only process this vendor id (may be repeated).")
+        parser.add_argument('--verify', action='store_true',
+                            help="Report vendors whose stored counters are stale without changing them.")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        vendors = VendorProfile.objects.all()
+        if options['vendor_ids']:
+            vendors = vendors.filter(pk__in=options['vendor_ids'])
+
+        stale = rebuild_stats(vendors, batch_size=options['batch_size'], verify_only=options['verify'])
+
+        if options['verify']:
+            if stale:
+                raise CommandError(f"{len(stale)} vendor(s) have stale stats: {', '.join(map(str, stale))}")
+            self.stdout.write(self.style.SUCCESS("All vendor stats are up to date."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {len(stale)} vendor(s)."))
@@ -0,0 +1,92 @@
+# Generated by Django 5.1.1 on 2026-10-18 03:33
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_vendor_stats(apps, schema_editor):
+    VendorProfile = apps.get_model('vendors', 'VendorProfile')
+    Review = apps.get_model('vendors', 'Review')
+    Service = apps.get_model('vendors', 'Service')
+    PortfolioItem = apps.get_model('vendors', 'PortfolioItem')
+
+    vendors = {vendor.pk: vendor for vendor in VendorProfile.objects.all()}
+    for row in Review.objects.values('vendor_id', 'rating').annotate(n=Count('pk')).order_by():
+        vendor = vendors[row['vendor_id']]
+        vendor.reviews_count += row['n']
+        vendor.rating_sum += row['rating'] * row['n']
+        if 1 <= row['rating'] <= 5:
+            field = f"rating_{row['rating']}_count"
+            setattr(vendor, field, getattr(vendor, field) + row['n'])
+    for model, field in ((Service, 'services_count'), (PortfolioItem, 'portfolio_count')):
+        for row in model.objects.values('vendor_id').annotate(n=Count('pk')).order_by():
+            setattr(vendors[row['vendor_id']], field, row['n'])
+    for vendor in vendors.values():
+        if vendor.reviews_count:
+            vendor.average_rating = vendor.rating_sum / vendor.reviews_count
+    VendorProfile.objects.bulk_update(vendors.values(), [
+        'average_rating', 'reviews_count', 'rating_sum',
+        'rating_1_count', 'rating_2_count', 'rating_3_count', 'rating_4_count', 'rating_5_count',
+        'services_count', 'portfolio_count',
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vendorprofile',
+            name='average_rating',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='vendorprofile',
+            name='portfolio_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='vendorprofile',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='vendorprofile',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='vendorprofile',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='vendorprofile',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='vendorprofile',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='vendorprofile',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='vendorprofile',
+            name='reviews_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='vendorprofile',
+            name='services_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_vendor_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.1 on 2026-10-18 03:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0002_vendor_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='portfolioitem',
+            index=models.Index(fields=['vendor', 'created_at', 'id'], name='portfolio_vendor_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['vendor', 'created_at', 'id'], name='review_vendor_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['vendor', 'created_at', 'id'], name='service_vendor_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendorprofile',
+            index=models.Index(fields=['created_at', 'id'], name='vendor_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+from django.db import migrations
+
+CREATE_TABLE_SQL = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS vendors_search USING fts5(
+        business_name, description, location, service_titles, service_descriptions,
+        tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )
+"""
+
+POPULATE_SQL = """
+    INSERT INTO vendors_search (rowid, business_name, description, location, service_titles, service_descriptions)
+    SELECT v.id,
+           v.business_name,
+           COALESCE(v.description, ''),
+           COALESCE(v.location, ''),
+           COALESCE((SELECT group_concat(s.title, ' ') FROM vendors_service s WHERE s.vendor_id = v.id), ''),
+           COALESCE((SELECT group_concat(s.description, ' ') FROM vendors_service s WHERE s.vendor_id = v.id), '')
+    FROM vendors_vendorprofile v
+"""
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE_TABLE_SQL)
+    schema_editor.execute(POPULATE_SQL)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS vendors_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0003_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
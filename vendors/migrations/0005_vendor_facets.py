@@ -0,0 +1,86 @@
+# Generated by Django 5.1.1 on 2026-10-18 03:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Min
+
+
+def backfill_vendor_facets(apps, schema_editor):
+    VendorProfile = apps.get_model('vendors', 'VendorProfile')
+    Service = apps.get_model('vendors', 'Service')
+    VendorCategoryFacet = apps.get_model('vendors', 'VendorCategoryFacet')
+
+    rows = (
+        Service.objects.filter(category__isnull=False)
+        .order_by()
+        .values('vendor_id', 'category_id')
+        .annotate(min_price=Min('price'), max_price=Max('price'), services_count=Count('pk'))
+    )
+    VendorCategoryFacet.objects.bulk_create([VendorCategoryFacet(**row) for row in rows], batch_size=500)
+    for row in Service.objects.order_by().values('vendor_id').annotate(low=Min('price'), high=Max('price')):
+        VendorProfile.objects.filter(pk=row['vendor_id']).update(
+            min_service_price=row['low'],
+            max_service_price=row['high'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0004_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorCategoryFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('min_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('max_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('services_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='vendorprofile',
+            name='max_service_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='vendorprofile',
+            name='min_service_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='vendorprofile',
+            index=models.Index(fields=['min_service_price'], name='vendor_min_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendorprofile',
+            index=models.Index(fields=['max_service_price'], name='vendor_max_price_idx'),
+        ),
+        migrations.AddField(
+            model_name='vendorcategoryfacet',
+            name='category',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vendor_facets', to='vendors.servicecategory'),
+        ),
+        migrations.AddField(
+            model_name='vendorcategoryfacet',
+            name='vendor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='category_facets', to='vendors.vendorprofile'),
+        ),
+        migrations.AddIndex(
+            model_name='vendorcategoryfacet',
+            index=models.Index(fields=['category', 'min_price'], name='facet_category_min_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendorcategoryfacet',
+            index=models.Index(fields=['category', 'max_price'], name='facet_category_max_price_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='vendorcategoryfacet',
+            constraint=models.UniqueConstraint(fields=('vendor', 'category'), name='unique_vendor_category_facet'),
+        ),
+        migrations.RunPython(backfill_vendor_facets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.1.1 on 2026-10-18 03:54
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_reviews(apps, schema_editor):
+    # Keep each user's first review of a vendor so the unique constraint can be
+    # created, then recount the rating counters of the vendors affected.
+    VendorProfile = apps.get_model('vendors', 'VendorProfile')
+    Review = apps.get_model('vendors', 'Review')
+    duplicates = (
+        Review.objects.values('vendor_id', 'user_id')
+        .annotate(n=Count('pk'), keep=Min('pk'))
+        .filter(n__gt=1)
+        .order_by()
+    )
+    vendor_ids = set()
+    for row in duplicates:
+        Review.objects.filter(vendor_id=row['vendor_id'], user_id=row['user_id']).exclude(pk=row['keep']).delete()
+        vendor_ids.add(row['vendor_id'])
+
+    for vendor in VendorProfile.objects.filter(pk__in=vendor_ids):
+        counts = dict(
+            Review.objects.filter(vendor=vendor).values_list('rating').annotate(n=Count('pk')).order_by()
+        )
+        vendor.reviews_count = sum(counts.values())
+        vendor.rating_sum = sum(rating * n for rating, n in counts.items())
+        for stars in range(1, 6):
+            setattr(vendor, f'rating_{stars}_count', counts.get(stars, 0))
+        vendor.average_rating = vendor.rating_sum / vendor.reviews_count if vendor.reviews_count else 0
+        vendor.save(update_fields=[
+            'reviews_count', 'rating_sum', 'average_rating',
+            'rating_1_count', 'rating_2_count', 'rating_3_count', 'rating_4_count', 'rating_5_count',
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0006_image_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_reviews, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.UniqueConstraint(fields=('vendor', 'user'), name='unique_vendor_user_review'),
+        ),
+    ]
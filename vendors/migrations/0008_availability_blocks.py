@@ -0,0 +1,50 @@
+# Generated by Django 5.1.1 on 2026-10-18 04:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def block_booked_days(apps, schema_editor):
+    AvailabilityBlock = apps.get_model('vendors', 'AvailabilityBlock')
+    VendorBooking = apps.get_model('events', 'VendorBooking')
+
+    bookings = VendorBooking.objects.exclude(status='cancelled').values_list('id', 'vendor_id', 'service_id', 'event__date')
+    blocks = []
+    for booking_id, vendor_id, service_id, date in bookings.iterator():
+        day = timezone.localdate(date) if timezone.is_aware(date) else date.date()
+        blocks.append(AvailabilityBlock(
+            booking_id=booking_id, vendor_id=vendor_id, service_id=service_id,
+            kind='booking', start_date=day, end_date=day,
+        ))
+    AvailabilityBlock.objects.bulk_create(blocks, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0006_event_counters'),
+        ('vendors', '0007_unique_reviews'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvailabilityBlock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('blackout', 'Blackout'), ('booking', 'Booking')], default='blackout', max_length=10)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('booking', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='availability_block', to='events.vendorbooking')),
+                ('service', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='availability_blocks', to='vendors.service')),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability_blocks', to='vendors.vendorprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['vendor', 'start_date', 'end_date'], name='block_vendor_start_idx'), models.Index(fields=['service', 'start_date', 'end_date'], name='block_service_start_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(('end_date__gte', models.F('start_date'))), name='availability_block_dates')],
+            },
+        ),
+        migrations.RunPython(block_booked_days, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.1.1 on 2026-10-18 04:06
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.utils import timezone
+
+
+def backfill_ranking_scores(apps, schema_editor):
+    from vendors.ranking import compute_score
+
+    VendorProfile = apps.get_model('vendors', 'VendorProfile')
+    VendorCategoryFacet = apps.get_model('vendors', 'VendorCategoryFacet')
+    Review = apps.get_model('vendors', 'Review')
+    VendorBooking = apps.get_model('events', 'VendorBooking')
+
+    now = timezone.now()
+    bookings = {
+        row['vendor_id']: row
+        for row in VendorBooking.objects.exclude(status='cancelled').order_by()
+        .values('vendor_id').annotate(n=Count('pk'), latest=Max('created_at'))
+    }
+    reviewed = dict(
+        Review.objects.order_by().values('vendor_id').annotate(latest=Max('created_at')).values_list('vendor_id', 'latest')
+    )
+    vendors = list(VendorProfile.objects.only('pk', 'created_at', 'reviews_count', 'rating_sum'))
+    for vendor in vendors:
+        booked = bookings.get(vendor.pk, {})
+        activity = [vendor.created_at, reviewed.get(vendor.pk), booked.get('latest')]
+        vendor.ranking_score = compute_score(
+            vendor.reviews_count, vendor.rating_sum, booked.get('n', 0),
+            max(moment for moment in activity if moment is not None), now,
+        )
+    VendorProfile.objects.bulk_update(vendors, ['ranking_score'], batch_size=500)
+    VendorCategoryFacet.objects.update(ranking_score=Subquery(
+        VendorProfile.objects.filter(pk=OuterRef('vendor_id')).values('ranking_score')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0006_event_counters'),
+        ('vendors', '0008_availability_blocks'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='vendorprofile',
+            name='vendor_min_price_idx',
+        ),
+        migrations.AddField(
+            model_name='vendorcategoryfacet',
+            name='ranking_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='vendorprofile',
+            name='ranking_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='vendorcategoryfacet',
+            index=models.Index(fields=['category', 'ranking_score', 'vendor'], name='facet_category_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendorprofile',
+            index=models.Index(fields=['min_service_price', 'id'], name='vendor_min_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendorprofile',
+            index=models.Index(fields=['ranking_score', 'id'], name='vendor_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendorprofile',
+            index=models.Index(fields=['average_rating', 'id'], name='vendor_rating_idx'),
+        ),
+        migrations.RunPython(backfill_ranking_scores, migrations.RunPython.noop),
+    ]
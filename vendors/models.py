@@ -1,5 +1,5 @@
-from django.db import models
-from django.db.models import Avg
+from django.db import models, transaction
+from evently.profiling import profiled
 
 # Create your models here.
 class VendorProfile(models.Model):
@@ -9,26 +9,71 @@ class VendorProfile(models.Model):
     location = models.CharField(max_length=255, blank=True, null=True)
     contact_info = models.CharField(max_length=255, blank=True, null=True)
     profile_pic = models.ImageField(upload_to='vendor_profiles/', blank=True, null=True)
+    # Resized copies of profile_pic, written in the background by vendors/images.py.
+    profile_pic_variants = models.JSONField(default=dict, blank=True)
     is_verified = models.BooleanField(default=False)
+    # Denormalized aggregates, maintained by vendors/signals.py and rebuilt
+    # with `manage.py rebuild_vendor_stats`.
+    average_rating = models.FloatField(default=0)
+    reviews_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+    services_count = models.PositiveIntegerField(default=0)
+    portfolio_count = models.PositiveIntegerField(default=0)
+    # Service price range, maintained with the per-category facets in vendors/facets.py.
+    min_service_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    max_service_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    # Sort key for ?sort=score and /vendors/top/, refreshed by vendors/ranking.py.
+    ranking_score = models.FloatField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='vendor_created_id_idx'),
+            models.Index(fields=['min_service_price', 'id'], name='vendor_min_price_idx'),
+            models.Index(fields=['max_service_price'], name='vendor_max_price_idx'),
+            models.Index(fields=['ranking_score', 'id'], name='vendor_score_idx'),
+            models.Index(fields=['average_rating', 'id'], name='vendor_rating_idx'),
+        ]
+
+    STAT_FIELDS = [
+        'average_rating', 'reviews_count', 'rating_sum',
+        'rating_1_count', 'rating_2_count', 'rating_3_count', 'rating_4_count', 'rating_5_count',
+        'services_count', 'portfolio_count',
+    ]
+    FACET_FIELDS = ['min_service_price', 'max_service_price']
+    IMAGE_FIELDS = ['profile_pic_variants']
+    RANKING_FIELDS = ['ranking_score']
+
     def __str__(self):
         return self.business_name
 
+    def save(self, *args, **kwargs):
+        # The counters are changed with F() updates; a plain save() of an
+        # instance loaded earlier must not write stale values back over them.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.STAT_FIELDS
+                and field.name not in self.FACET_FIELDS
+                and field.name not in self.IMAGE_FIELDS
+                and field.name not in self.RANKING_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def rating_histogram(self):
+        return {stars: getattr(self, f'rating_{stars}_count') for stars in range(1, 6)}
+
     def serialize(self):
-        avg_rating = self.reviews.aggregate(Avg('rating'))['rating__avg'] or 0
-        return {
-            'id': self.id,
-            'business_name': self.business_name,
-            'profile_pic': self.profile_pic.url if self.profile_pic else None,
-            'description': self.description,
-            'location': self.location,
-            'average_rating': round(avg_rating, 2),
-            'services_count': self.services.count(),
-            'portfolio_count': self.portfolio_items.count(),
-            'reviews_count': self.reviews.count(),
-        }
+        from .serializers import serialize_vendor
+        return serialize_vendor(self)
     
 class ServiceCategory(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -37,6 +82,29 @@ class ServiceCategory(models.Model):
     def __str__(self):
         return self.name
     
+class VendorCategoryFacet(models.Model):
+    """One row per (vendor, category) the vendor offers services in; see vendors/facets.py."""
+    vendor = models.ForeignKey(VendorProfile, on_delete=models.CASCADE, related_name='category_facets')
+    category = models.ForeignKey(ServiceCategory, on_delete=models.CASCADE, related_name='vendor_facets')
+    min_price = models.DecimalField(max_digits=10, decimal_places=2)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2)
+    services_count = models.PositiveIntegerField(default=0)
+    # Copy of the vendor's ranking_score, so the top vendors of a category are an index scan.
+    ranking_score = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['vendor', 'category'], name='unique_vendor_category_facet'),
+        ]
+        indexes = [
+            models.Index(fields=['category', 'min_price'], name='facet_category_min_price_idx'),
+            models.Index(fields=['category', 'max_price'], name='facet_category_max_price_idx'),
+            models.Index(fields=['category', 'ranking_score', 'vendor'], name='facet_category_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.vendor.business_name} in {self.category.name}"
+
 class Service(models.Model):
     vendor = models.ForeignKey(VendorProfile, on_delete=models.CASCADE, related_name='services')
     category = models.ForeignKey(ServiceCategory, on_delete=models.SET_NULL, null=True, related_name='services')
@@ -47,36 +115,52 @@ class Service(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['vendor', 'created_at', 'id'], name='service_vendor_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.title} by {self.vendor.business_name}"
+
+    def save(self, *args, **kwargs):
+        # Run the post_save counter update in the same transaction as the write.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
     
     def serialize(self):
-        return {
-            'id': self.id,
-            'vendor': self.vendor.business_name,
-            'category': self.category.name if self.category else None,
-            'title': self.title,
-            'description': self.description,
-            'price': str(self.price),
-            'availability_notes': self.availability_notes,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-        }
+        from .serializers import serialize_service
+        return serialize_service(self)
 
 class PortfolioItem(models.Model):
     vendor = models.ForeignKey(VendorProfile, on_delete=models.CASCADE, related_name='portfolio_items')
     image = models.FileField(upload_to='vendor_portfolio/', blank=True, null=True)
+    # Resized copies of image, written in the background by vendors/images.py.
+    image_variants = models.JSONField(default=dict, blank=True)
     description = models.CharField(max_length=255, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['vendor', 'created_at', 'id'], name='portfolio_vendor_created_idx'),
+        ]
+
     def __str__(self):
         return f"Portfolio Item for {self.vendor.business_name}" 
+
+    def save(self, *args, **kwargs):
+        # Run the post_save counter update in the same transaction as the write.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
     
+    @profiled('serialize')
     def serialize(self):
+        from .images import srcset
         return {
             'id': self.id,
             'vendor': self.vendor.business_name,
             'image': self.image.url if self.image else None,
+            'image_srcset': srcset(self.image, self.image_variants),
             'description': self.description,
             'created_at': self.created_at.isoformat(),
         }
@@ -87,10 +171,25 @@ class Review(models.Model):
     rating = models.PositiveSmallIntegerField()  # 1-5 stars
     comment = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['vendor', 'user'], name='unique_vendor_user_review'),
+        ]
+        indexes = [
+            models.Index(fields=['vendor', 'created_at', 'id'], name='review_vendor_created_idx'),
+        ]
 
     def __str__(self):
         return f"Review for {self.vendor.business_name} by {self.user.username}"
+
+    def save(self, *args, **kwargs):
+        # Run the post_save counter update in the same transaction as the write.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
     
+    @profiled('serialize')
     def serialize(self):
         return {
             'id': self.id,
@@ -100,4 +199,52 @@ class Review(models.Model):
             'rating': self.rating,
             'comment': self.comment,
             'created_at': self.created_at.isoformat(),
-        }
\ No newline at end of file
+        }
+
+
+class AvailabilityBlock(models.Model):
+    """
+    Days on which a vendor (service=None) or one of its services cannot take
+    bookings: blackouts entered by the vendor, and one row per active booking,
+    kept in step with the booking by vendors/availability.py.
+    """
+    BLACKOUT = 'blackout'
+    BOOKING = 'booking'
+    KIND_CHOICES = [
+        (BLACKOUT, 'Blackout'),
+        (BOOKING, 'Booking'),
+    ]
+    vendor = models.ForeignKey(VendorProfile, on_delete=models.CASCADE, related_name='availability_blocks')
+    service = models.ForeignKey(Service, null=True, blank=True, on_delete=models.CASCADE, related_name='availability_blocks')
+    booking = models.OneToOneField('events.VendorBooking', null=True, blank=True, on_delete=models.CASCADE, related_name='availability_block')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default=BLACKOUT)
+    # Both inclusive; spans are capped at availability.MAX_BLOCK_DAYS.
+    start_date = models.DateField()
+    end_date = models.DateField()
+    note = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(condition=models.Q(end_date__gte=models.F('start_date')), name='availability_block_dates'),
+        ]
+        indexes = [
+            models.Index(fields=['vendor', 'start_date', 'end_date'], name='block_vendor_start_idx'),
+            # Vendor-wide blocks for ?available_on=: service IS NULL, then the start_date range.
+            models.Index(fields=['service', 'start_date', 'end_date'], name='block_service_start_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.vendor.business_name} unavailable {self.start_date} to {self.end_date}"
+
+    @profiled('serialize')
+    def serialize(self):
+        return {
+            'id': self.id,
+            'vendor_id': self.vendor_id,
+            'service_id': self.service_id,
+            'kind': self.kind,
+            'start_date': self.start_date.isoformat(),
+            'end_date': self.end_date.isoformat(),
+            'note': self.note,
+        }
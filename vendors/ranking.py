@@ -0,0 +1,142 @@
+"""
+Vendor ranking.
+
+Each vendor's ranking_score combines three signals:
+
+- a Bayesian average rating: the vendor's reviews blended with PRIOR_WEIGHT
+  imaginary reviews of PRIOR_MEAN, so one 5-star review does not outrank a
+  hundred 4.8s;
+- booking volume, as log(1 + bookings that were not cancelled);
+- recency, halving every RECENCY_HALF_LIFE_DAYS since the vendor's last
+  review or booking (or since it joined).
+
+The score is stored on VendorProfile and copied onto its VendorCategoryFacet
+rows, so sorting and the per-category top-N are index scans. Review and
+booking changes queue a refresh for the one vendor (vendors/signals.py);
+recency also decays with no writes at all, so run
+`manage.py rebuild_vendor_ranking` daily to age every score.
+"""
+import math
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.utils import timezone
+from events.models import VendorBooking
+from .models import VendorProfile, VendorCategoryFacet, Review
+from .facets import category_ids
+
+DEFAULTS = {
+    'PRIOR_MEAN': 3.5,
+    'PRIOR_WEIGHT': 5,
+    'BOOKING_WEIGHT': 0.25,
+    'RECENCY_WEIGHT': 0.5,
+    'RECENCY_HALF_LIFE_DAYS': 90,
+}
+
+# ?sort= value -> (keyset pagination keys, descending)
+SORTS = {
+    'score': (('ranking_score', 'id'), True),
+    'rating': (('average_rating', 'id'), True),
+    'price': (('min_service_price', 'id'), False),
+    'newest': (('created_at', 'id'), True),
+}
+
+DEFAULT_TOP = 10
+MAX_TOP = 50
+
+
+class InvalidSort(ValueError):
+    pass
+
+
+def option(name):
+    return getattr(settings, 'VENDOR_RANKING', {}).get(name, DEFAULTS[name])
+
+
+def compute_score(reviews_count, rating_sum, bookings, last_activity, now):
+    prior_weight = option('PRIOR_WEIGHT')
+    rating = (prior_weight * option('PRIOR_MEAN') + rating_sum) / (prior_weight + reviews_count)
+    volume = math.log1p(bookings)
+    age_days = max((now - last_activity).total_seconds() / 86400, 0)
+    recency = 0.5 ** (age_days / option('RECENCY_HALF_LIFE_DAYS'))
+    return rating + option('BOOKING_WEIGHT') * volume + option('RECENCY_WEIGHT') * recency
+
+
+def refresh_scores(queryset=None, batch_size=500):
+    """Recompute ranking_score for the vendors in ``queryset``; returns how many were processed."""
+    if queryset is None:
+        queryset = VendorProfile.objects.all()
+    now = timezone.now()
+    ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(ids), batch_size):
+        batch_ids = ids[start:start + batch_size]
+        bookings = {
+            row['vendor_id']: row
+            for row in VendorBooking.objects.filter(vendor_id__in=batch_ids)
+            .exclude(status='cancelled')
+            .order_by()
+            .values('vendor_id')
+            .annotate(n=Count('pk'), latest=Max('created_at'))
+        }
+        reviewed = dict(
+            Review.objects.filter(vendor_id__in=batch_ids)
+            .order_by()
+            .values('vendor_id')
+            .annotate(latest=Max('created_at'))
+            .values_list('vendor_id', 'latest')
+        )
+        vendors = list(VendorProfile.objects.filter(pk__in=batch_ids).only(
+            'pk', 'created_at', 'reviews_count', 'rating_sum', 'ranking_score',
+        ))
+        for vendor in vendors:
+            booked = bookings.get(vendor.pk, {})
+            activity = [vendor.created_at, reviewed.get(vendor.pk), booked.get('latest')]
+            vendor.ranking_score = compute_score(
+                vendor.reviews_count, vendor.rating_sum, booked.get('n', 0),
+                max(moment for moment in activity if moment is not None), now,
+            )
+        with transaction.atomic():
+            VendorProfile.objects.bulk_update(vendors, VendorProfile.RANKING_FIELDS)
+            VendorCategoryFacet.objects.filter(vendor_id__in=batch_ids).update(
+                ranking_score=Subquery(
+                    VendorProfile.objects.filter(pk=OuterRef('vendor_id')).values('ranking_score')[:1]
+                ),
+            )
+    return len(ids)
+
+
+def sort_vendors(vendors, sort):
+    """
+    Order ``vendors`` for ?sort=; returns the queryset with the keys and
+    direction to paginate on. Without a sort the catalog keeps its default order.
+    """
+    if not sort:
+        return vendors, ('created_at', 'id'), False
+    if sort not in SORTS:
+        raise InvalidSort(f"Unknown sort '{sort}'. Use one of: {', '.join(SORTS)}.")
+    keys, descending = SORTS[sort]
+    if sort == 'price':
+        # Vendors without services have no price to sort on.
+        vendors = vendors.filter(min_service_price__isnull=False)
+    return vendors.order_by(*[f'-{key}' if descending else key for key in keys]), keys, descending
+
+
+def top_vendors(category=None, limit=DEFAULT_TOP):
+    """The ``limit`` best-scored vendors, optionally within a category, read off an index."""
+    if not category:
+        return list(VendorProfile.objects.order_by('-ranking_score', '-id')[:limit])
+    rows = (
+        VendorCategoryFacet.objects.filter(category_id__in=category_ids(category))
+        .order_by('-ranking_score', '-vendor_id')
+        .values_list('vendor_id', flat=True)
+    )
+    # A name fragment can match several categories, listing a vendor more than once.
+    vendor_ids = []
+    for vendor_id in rows.iterator(chunk_size=limit * 2):
+        if vendor_id not in vendor_ids:
+            vendor_ids.append(vendor_id)
+            if len(vendor_ids) == limit:
+                break
+    vendors = VendorProfile.objects.in_bulk(vendor_ids)
+    return [vendors[vendor_id] for vendor_id in vendor_ids if vendor_id in vendors]
@@ -0,0 +1,122 @@
+"""
+Full-text search over vendors and their services.
+
+The backend is chosen with the VENDOR_SEARCH_BACKEND setting. The default,
+SQLiteFTS5Backend, keeps one FTS5 row per vendor (rowid = vendor id) holding
+the vendor's own text plus the titles and descriptions of its services, and
+ranks matches with bm25(). DatabaseSearchBackend is a plain icontains fallback
+for databases without FTS5.
+
+The index is kept in sync by vendors/signals.py and can be rebuilt with
+`manage.py rebuild_search_index`.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+MAX_CANDIDATES = 500
+
+TABLE = 'vendors_search'
+
+# Relative weight of each column in the bm25() ranking, in column order.
+COLUMN_WEIGHTS = (10.0, 2.0, 4.0, 6.0, 1.0)
+
+POPULATE_SQL = f"""
+    INSERT INTO {TABLE} (rowid, business_name, description, location, service_titles, service_descriptions)
+    SELECT v.id,
+           v.business_name,
+           COALESCE(v.description, ''),
+           COALESCE(v.location, ''),
+           COALESCE((SELECT group_concat(s.title, ' ') FROM vendors_service s WHERE s.vendor_id = v.id), ''),
+           COALESCE((SELECT group_concat(s.description, ' ') FROM vendors_service s WHERE s.vendor_id = v.id), '')
+    FROM vendors_vendorprofile v
+"""
+
+
+class BaseSearchBackend:
+    def index_vendor(self, vendor_id):
+        pass
+
+    def remove_vendor(self, vendor_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def search(self, query, limit=MAX_CANDIDATES):
+        """Return matching vendor ids, best match first."""
+        raise NotImplementedError
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    def index_vendor(self, vendor_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [vendor_id])
+            cursor.execute(POPULATE_SQL + " WHERE v.id = %s", [vendor_id])
+
+    def remove_vendor(self, vendor_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [vendor_id])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {TABLE}")
+            cursor.execute(POPULATE_SQL)
+
+    def search(self, query, limit=MAX_CANDIDATES):
+        match = fts_query(query)
+        if not match:
+            return []
+        weights = ', '.join(str(weight) for weight in COLUMN_WEIGHTS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s "
+                f"ORDER BY bm25({TABLE}, {weights}) LIMIT %s",
+                [match, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """Unranked substring search for databases without a full-text engine."""
+
+    def search(self, query, limit=MAX_CANDIDATES):
+        from .models import VendorProfile
+
+        vendors = VendorProfile.objects.all()
+        terms = tokenize(query)
+        if not terms:
+            return []
+        for term in terms:
+            vendors = vendors.filter(
+                Q(business_name__icontains=term)
+                | Q(description__icontains=term)
+                | Q(location__icontains=term)
+                | Q(services__title__icontains=term)
+                | Q(services__description__icontains=term)
+            )
+        return list(vendors.order_by('id').values_list('id', flat=True).distinct()[:limit])
+
+
+def tokenize(query):
+    return re.findall(r'\w+', query or '')
+
+
+def fts_query(query):
+    # Quote every term so user input can never be parsed as FTS5 syntax, and
+    # prefix-match so "photo" finds "photography".
+    return ' '.join(f'"{term}"*' for term in tokenize(query))
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'VENDOR_SEARCH_BACKEND', 'vendors.search.SQLiteFTS5Backend')
+        _backend = import_string(path)()
+    return _backend
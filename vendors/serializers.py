@@ -0,0 +1,48 @@
+from .images import srcset
+from evently.profiling import profiled
+from .models import VendorProfile, Service
+
+
+def vendor_queryset(queryset=None):
+    """Vendors ready for serialize_vendor(); aggregates are stored on the row itself."""
+    if queryset is None:
+        queryset = VendorProfile.objects.all()
+    return queryset
+
+
+def service_queryset(queryset=None):
+    if queryset is None:
+        queryset = Service.objects.all()
+    return queryset.select_related('vendor', 'category')
+
+
+@profiled('serialize')
+def serialize_vendor(vendor):
+    return {
+        'id': vendor.id,
+        'business_name': vendor.business_name,
+        'profile_pic': vendor.profile_pic.url if vendor.profile_pic else None,
+        'profile_pic_srcset': srcset(vendor.profile_pic, vendor.profile_pic_variants),
+        'description': vendor.description,
+        'location': vendor.location,
+        'average_rating': round(vendor.average_rating, 2),
+        'services_count': vendor.services_count,
+        'portfolio_count': vendor.portfolio_count,
+        'reviews_count': vendor.reviews_count,
+        'ranking_score': round(vendor.ranking_score, 4),
+    }
+
+
+@profiled('serialize')
+def serialize_service(service):
+    return {
+        'id': service.id,
+        'vendor': service.vendor.business_name,
+        'category': service.category.name if service.category else None,
+        'title': service.title,
+        'description': service.description,
+        'price': str(service.price),
+        'availability_notes': service.availability_notes,
+        'created_at': service.created_at.isoformat(),
+        'updated_at': service.updated_at.isoformat(),
+    }
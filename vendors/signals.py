@@ -0,0 +1,124 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from events.models import Event, VendorBooking
+from .models import VendorProfile, ServiceCategory, Service, PortfolioItem, Review, AvailabilityBlock
+from . import availability, cache, images, stats, tasks
+from .facets import refresh_vendor_facets
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.record_review(instance.vendor_id, instance.rating, 1)
+    else:
+        # Ratings are only edited through the admin; recount rather than
+        # tracking the previous value.
+        tasks.rebuild_vendor_stats.enqueue({'vendor_id': instance.vendor_id}, key=str(instance.vendor_id))
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    stats.record_review(instance.vendor_id, instance.rating, -1)
+
+
+@receiver(post_save, sender=Service)
+def service_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.adjust_count(instance.vendor_id, 'services_count', 1)
+    refresh_vendor_facets(instance.vendor_id)
+    _index_vendor(instance.vendor_id)
+
+
+@receiver(post_delete, sender=Service)
+def service_deleted(sender, instance, **kwargs):
+    stats.adjust_count(instance.vendor_id, 'services_count', -1)
+    refresh_vendor_facets(instance.vendor_id)
+    _index_vendor(instance.vendor_id)
+
+
+@receiver(post_save, sender=PortfolioItem)
+def portfolio_item_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.adjust_count(instance.vendor_id, 'portfolio_count', 1)
+
+
+@receiver(post_delete, sender=PortfolioItem)
+def portfolio_item_deleted(sender, instance, **kwargs):
+    stats.adjust_count(instance.vendor_id, 'portfolio_count', -1)
+
+
+@receiver(post_save, sender=VendorProfile)
+def vendor_saved(sender, instance, **kwargs):
+    _index_vendor(instance.pk)
+
+
+@receiver(post_delete, sender=VendorProfile)
+def vendor_deleted(sender, instance, **kwargs):
+    _index_vendor(instance.pk)
+
+
+def _index_vendor(vendor_id):
+    tasks.index_vendor.enqueue({'vendor_id': vendor_id}, key=str(vendor_id))
+
+
+@receiver(post_save, sender=VendorProfile)
+@receiver(post_save, sender=PortfolioItem)
+def image_saved(sender, instance, **kwargs):
+    field_name, variants_field = _image_fields(sender)
+    fieldfile = getattr(instance, field_name)
+    variants = getattr(instance, variants_field)
+    # A new upload needs derivatives; a cleared one needs the old ones removed.
+    if (fieldfile and not images.is_current(fieldfile, variants)) or (not fieldfile and variants):
+        images.request_regeneration(instance, field_name)
+
+
+@receiver(post_delete, sender=VendorProfile)
+@receiver(post_delete, sender=PortfolioItem)
+def image_deleted(sender, instance, **kwargs):
+    variants = getattr(instance, _image_fields(sender)[1])
+    if variants:
+        tasks.delete_image_derivatives.enqueue({'variants': variants})
+
+
+def _image_fields(sender):
+    if sender is VendorProfile:
+        return 'profile_pic', 'profile_pic_variants'
+    return 'image', 'image_variants'
+
+
+@receiver(post_save, sender=VendorBooking)
+def booking_saved(sender, instance, **kwargs):
+    availability.sync_booking(instance)
+
+
+@receiver([post_save, post_delete], sender=Review)
+@receiver([post_save, post_delete], sender=VendorBooking)
+def rescore_vendor(sender, instance, **kwargs):
+    tasks.refresh_vendor_score.enqueue({'vendor_id': instance.vendor_id}, key=str(instance.vendor_id))
+
+
+@receiver(post_save, sender=Event)
+def event_saved(sender, instance, created, update_fields=None, **kwargs):
+    if not created and (update_fields is None or 'date' in update_fields):
+        availability.sync_event(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=VendorProfile)
+@receiver([post_save, post_delete], sender=Service)
+@receiver([post_save, post_delete], sender=Review)
+@receiver([post_save, post_delete], sender=PortfolioItem)
+def invalidate_vendor_cache(sender, instance, **kwargs):
+    vendor_id = instance.pk if sender is VendorProfile else instance.vendor_id
+    cache.bump_on_commit('vendors', f'vendor:{vendor_id}')
+
+
+@receiver([post_save, post_delete], sender=AvailabilityBlock)
+def invalidate_availability_cache(sender, instance, **kwargs):
+    # Only vendor-wide blackouts change ?available_on= results.
+    if instance.service_id is None:
+        cache.bump_on_commit('vendors')
+
+
+@receiver([post_save, post_delete], sender=ServiceCategory)
+def invalidate_category_cache(sender, instance, **kwargs):
+    cache.bump_on_commit('categories')
@@ -0,0 +1,92 @@
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+from .models import VendorProfile, Service, PortfolioItem, Review
+
+RATING_FIELDS = {stars: f'rating_{stars}_count' for stars in range(1, 6)}
+
+STAT_FIELDS = VendorProfile.STAT_FIELDS
+
+
+def adjust_count(vendor_id, field, delta):
+    VendorProfile.objects.filter(pk=vendor_id).update(**{field: F(field) + delta})
+
+
+def record_review(vendor_id, rating, delta):
+    """Apply one review being added (delta=1) or removed (delta=-1) to the vendor's counters."""
+    # Every F() on the right-hand side reads the pre-update row, so the new
+    # average is computed from the new sum and count in the same statement.
+    new_sum = F('rating_sum') + rating * delta
+    new_count = F('reviews_count') + delta
+    changes = {
+        'rating_sum': new_sum,
+        'reviews_count': new_count,
+        'average_rating': Coalesce(
+            Cast(new_sum, FloatField()) / NullIf(new_count, Value(0)),
+            Value(0.0),
+        ),
+    }
+    field = RATING_FIELDS.get(rating)
+    if field:
+        changes[field] = F(field) + delta
+    VendorProfile.objects.filter(pk=vendor_id).update(**changes)
+
+
+def compute_stats(vendor_ids):
+    """Recompute every stat field from the source tables for the given vendors."""
+    stats = {vendor_id: _empty_stats() for vendor_id in vendor_ids}
+    reviews = (
+        Review.objects.filter(vendor_id__in=vendor_ids)
+        .order_by()
+        .values('vendor_id', 'rating')
+        .annotate(n=Count('pk'))
+    )
+    for row in reviews:
+        entry = stats[row['vendor_id']]
+        entry['reviews_count'] += row['n']
+        entry['rating_sum'] += row['rating'] * row['n']
+        field = RATING_FIELDS.get(row['rating'])
+        if field:
+            entry[field] += row['n']
+    for model, field in ((Service, 'services_count'), (PortfolioItem, 'portfolio_count')):
+        rows = model.objects.filter(vendor_id__in=vendor_ids).order_by().values('vendor_id').annotate(n=Count('pk'))
+        for row in rows:
+            stats[row['vendor_id']][field] = row['n']
+    for entry in stats.values():
+        if entry['reviews_count']:
+            entry['average_rating'] = entry['rating_sum'] / entry['reviews_count']
+    return stats
+
+
+def rebuild_stats(queryset=None, batch_size=500, verify_only=False):
+    """Rebuild (or just compare) stored stats; returns the ids of vendors that were out of date."""
+    if queryset is None:
+        queryset = VendorProfile.objects.all()
+    stale = []
+    ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(ids), batch_size):
+        batch_ids = ids[start:start + batch_size]
+        with transaction.atomic():
+            expected = compute_stats(batch_ids)
+            vendors = VendorProfile.objects.filter(pk__in=batch_ids).only(*STAT_FIELDS)
+            changed = []
+            for vendor in vendors:
+                values = expected[vendor.pk]
+                if any(not _matches(getattr(vendor, field), values[field]) for field in STAT_FIELDS):
+                    stale.append(vendor.pk)
+                    for field in STAT_FIELDS:
+                        setattr(vendor, field, values[field])
+                    changed.append(vendor)
+            if changed and not verify_only:
+                VendorProfile.objects.bulk_update(changed, STAT_FIELDS)
+    return stale
+
+
+def _empty_stats():
+    return {field: 0 for field in STAT_FIELDS}
+
+
+def _matches(stored, expected):
+    if isinstance(expected, float) or isinstance(stored, float):
+        return abs(stored - expected) < 1e-6
+    return stored == expected
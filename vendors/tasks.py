@@ -0,0 +1,35 @@
+"""Background jobs for the vendors app; see jobs/queue.py."""
+from django.apps import apps
+from jobs.queue import task
+from . import cache, images, ranking, stats
+from .models import VendorProfile
+from .search import get_backend
+
+
+@task(priority=-10)
+def generate_image_derivatives(model, pk, field_name):
+    images.process(apps.get_model(model), pk, field_name)
+
+
+@task(priority=-10)
+def delete_image_derivatives(variants):
+    images.delete_derivatives(variants)
+
+
+@task(priority=10)
+def index_vendor(vendor_id):
+    # Re-indexing a vendor that no longer exists just drops its row.
+    get_backend().index_vendor(vendor_id)
+
+
+@task(priority=10)
+def rebuild_vendor_stats(vendor_id):
+    stats.rebuild_stats(VendorProfile.objects.filter(pk=vendor_id))
+    ranking.refresh_scores(VendorProfile.objects.filter(pk=vendor_id))
+    cache.bump('vendors', f'vendor:{vendor_id}')
+
+
+@task(priority=5)
+def refresh_vendor_score(vendor_id):
+    ranking.refresh_scores(VendorProfile.objects.filter(pk=vendor_id))
+    cache.bump('vendors', f'vendor:{vendor_id}')
@@ -1,3 +1,125 @@
-from django.test import TestCase
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from events.models import Event, VendorBooking
+from users.models import User
+from .facets import category_counts, filter_vendors, refresh_vendor_facets
+from .models import Review, Service, ServiceCategory, VendorProfile
+
+
+class PriceFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.catering = ServiceCategory.objects.create(name='Catering')
+        user = User.objects.create_user('vendor', 'vendor@example.com', 'pw', is_vendor=True)
+        cls.vendor = VendorProfile.objects.get(user=user)
+        for price in (10, 1000):
+            Service.objects.create(vendor=cls.vendor, category=cls.catering, title=f'Menu {price}', description='', price=price)
+        refresh_vendor_facets(cls.vendor.pk)
+
+    def matches(self, **params):
+        return list(filter_vendors(VendorProfile.objects.all(), params))
+
+    def test_price_span_around_range_does_not_match(self):
+        self.assertEqual(self.matches(price_min='100', price_max='200'), [])
+        self.assertEqual(self.matches(price_min='100', price_max='200', category=str(self.catering.pk)), [])
+        self.assertEqual(category_counts({'price_min': '100', 'price_max': '200'}), [])
+
+    def test_service_inside_range_matches(self):
+        self.assertEqual(self.matches(price_min='5', price_max='20'), [self.vendor])
+        self.assertEqual(self.matches(price_min='900', category='cater'), [self.vendor])
+        self.assertEqual(category_counts({'price_max': '20'})[0]['count'], 1)
+
+
+class VendorDetailETagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('vendor', 'vendor@example.com', 'pw', is_vendor=True)
+        cls.vendor = VendorProfile.objects.get(user=user)
+        cls.url = f'/vendors/{cls.vendor.id}/'
+
+    def assertETagChangesAfter(self, change):
+        etag = self.client.get(self.url)['ETag']
+        change()
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 200)
+
+    def test_stored_variant_map_changes_etag(self):
+        # images.process() stores the map with update(), leaving updated_at alone.
+        self.assertETagChangesAfter(lambda: VendorProfile.objects.filter(pk=self.vendor.pk).update(
+            profile_pic_variants={'source': 'a.jpg', 'files': {}},
+        ))
+
+    def test_ranking_refresh_changes_etag_and_cached_body(self):
+        VendorProfile.objects.filter(pk=self.vendor.pk).update(ranking_score=-1)
+        etag = self.client.get(self.url)['ETag']
+        call_command('rebuild_vendor_ranking', stdout=StringIO())
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        score = VendorProfile.objects.get(pk=self.vendor.pk).ranking_score
+        self.assertNotEqual(score, -1)
+        self.assertEqual(response.json()['vendor']['ranking_score'], round(score, 4))
+
+
+@override_settings(AUTHENTICATION_BACKENDS=['django.contrib.auth.backends.ModelBackend'])
+class AsyncVendorBookingsTests(TransactionTestCase):
+    # aio.gather() queries from other threads, which only see committed rows.
+
+    def setUp(self):
+        planner = User.objects.create_user('planner', 'planner@example.com', 'pw', is_planner=True)
+        self.vendor_user = User.objects.create_user('vendor', 'vendor@example.com', 'pw', is_vendor=True)
+        vendor = VendorProfile.objects.get(user=self.vendor_user)
+        service = Service.objects.create(vendor=vendor, title='Catering', description='', price=100)
+        event = Event.objects.create(planner=planner, title='Wedding', date=timezone.now(), location='Nairobi')
+        self.booking = VendorBooking.objects.create(event=event, vendor=vendor, service=service)
+
+    async def test_vendor_profile_is_looked_up_without_blocking(self):
+        await self.async_client.aforce_login(self.vendor_user)
+        response = await self.async_client.get('/async/vendors/dashboard/bookings/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([booking['id'] for booking in response.json()['bookings']], [self.booking.id])
+
+
+@override_settings(RATE_LIMITS={})
+class VendorSearchTests(TestCase):
+    def test_limit_below_one_is_rejected(self):
+        for limit in ('0', '-5'):
+            response = self.client.get('/vendors/search/', {'q': 'cake', 'limit': limit})
+            self.assertEqual(response.status_code, 400, limit)
+            self.assertEqual(response.json(), {'error': 'limit must be at least 1.'})
+        self.assertEqual(self.client.get('/vendors/search/', {'q': 'cake', 'limit': '1'}).status_code, 200)
+
+
+class ReviewListETagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        vendor_user = User.objects.create_user('vendor', 'vendor@example.com', 'pw', is_vendor=True)
+        cls.reviewer = User.objects.create_user('planner', 'planner@example.com', 'pw', is_planner=True)
+        cls.review = Review.objects.create(
+            vendor=VendorProfile.objects.get(user=vendor_user), user=cls.reviewer, rating=4, comment='Good',
+        )
+        cls.url = f'/vendors/{cls.review.vendor_id}/reviews/'
+
+    def setUp(self):
+        self.client.force_login(self.reviewer)
+
+    def assertFreshAfter(self, change):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 304)
+        change()
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['reviews'][0]
+
+    def test_edited_review_changes_etag(self):
+        def edit():
+            self.review.rating, self.review.comment = 2, 'Late'
+            self.review.save()
+        self.assertEqual(self.assertFreshAfter(edit)['comment'], 'Late')
+
+    def test_reviewer_rename_changes_etag(self):
+        def rename():
+            self.reviewer.username = 'pat'
+            self.reviewer.save()
+        self.assertEqual(self.assertFreshAfter(rename)['user'], 'pat')
@@ -5,10 +5,17 @@ urlpatterns = [
     path('page/', views.vendors_page, name='vendors-page'),
     path('dashboard/', views.vendor_dashboard, name='vendor-dashboard'),
     path('dashboard/bookings/', views.vendor_bookings, name='vendor-bookings'),
+    path('dashboard/bookings/export.csv', views.vendor_bookings_export, name='vendor-bookings-export'),
     path('categories/', views.categories, name='categories'),
+    path('cache/stats/', views.cache_stats, name='catalog-cache-stats'),
     path('', views.vendors, name='vendors'),
+    path('search/', views.vendor_search, name='vendor-search'),
+    path('top/', views.top_vendors, name='top-vendors'),
     path('<int:id>/', views.vendor_detail, name='vendor-detail'),
     path('me/', views.vendor_profile, name='vendor-profile'),
+    path('me/availability/', views.my_availability, name='my-availability'),
+    path('me/availability/<int:block_id>/', views.my_availability_block, name='my-availability-block'),
+    path('<int:id>/availability/', views.vendor_availability, name='vendor-availability'),
     path('<int:id>/services/', views.services, name='services'),
     path('<int:id>/services/<int:service_id>/', views.service_detail, name='service-detail'),
     path('<int:id>/portfolio/', views.portfolio, name='portfolio'),
@@ -1,26 +1,45 @@
 from django.shortcuts import render
 from django.views.decorators.http import require_GET
 from django.shortcuts import get_object_or_404
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
+from django.db.models import Avg, Count, Max
 from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
+from django.utils import timezone
+from django.contrib.admin.views.decorators import staff_member_required
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_GET, require_http_methods
+from django.views.decorators.http import condition, require_GET, require_http_methods
+from django.views.decorators.vary import vary_on_headers
 from .models import *
+from . import availability, facets, ranking, search
+from .cache import cache_response, get_or_set
+from . import cache as catalog_cache
+from .serializers import serialize_service, serialize_vendor, service_queryset, vendor_queryset
 from events.models import VendorBooking
+from events.serializers import booking_queryset, serialize_booking
+from evently.conditional import make_etag
+from evently.pagination import InvalidCursor, paginate
+from evently.exports import csv_response
+from evently.streaming import stream_response, wants_stream
+import datetime
 import json
 
-# Create your views here.
-def vendors_page(request):
-    # Fetch all categories for filter buttons
+def _category_chips():
     categories = ServiceCategory.objects.all()
-    category_list = [
+    vendor_counts = {row['id']: row['count'] for row in facets.category_counts({})}
+    return [
         {
             'id': cat.id,
             'name': cat.name,
-            'description': cat.description
+            'description': cat.description,
+            'vendor_count': vendor_counts.get(cat.id, 0),
         } for cat in categories
     ]
+
+# Create your views here.
+def vendors_page(request):
+    # Fetch all categories for filter buttons
+    category_list = get_or_set('vendors-page', '', ['categories', 'vendors'], _category_chips)
     
     return render(request, 'vendors/vendors.html', {
         'page': 'vendors',
@@ -42,6 +61,7 @@ def vendor_dashboard(request):
         'vendor': vendor_profile
     })
 
+@vary_on_headers('Accept')
 @require_GET
 @login_required
 def vendor_bookings(request):
@@ -49,17 +69,58 @@ def vendor_bookings(request):
     if not request.user.is_vendor:
         return JsonResponse({'error': 'Access denied. Vendor account required.'}, status=403)
     
-    try:
-        vendor_profile = request.user.vendor_profile
-    except VendorProfile.DoesNotExist:
+    vendor_id = request.user.vendor_profile_id
+    if vendor_id is None:
         return JsonResponse({'error': 'Vendor profile not found.'}, status=404)
     
-    bookings = VendorBooking.objects.filter(vendor=vendor_profile).order_by('-created_at')
-    booking_list = [booking.serialize() for booking in bookings]
-    
-    return JsonResponse({'bookings': booking_list}, status=200)
+    bookings = booking_queryset(VendorBooking.objects.filter(vendor_id=vendor_id).order_by('-created_at'))
+    if wants_stream(request):
+        return stream_response(request, bookings, serialize_booking, key='bookings')
+    try:
+        page = paginate(request, bookings, descending=True)
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    if page is not None:
+        bookings = page.items
+
+    data = {'bookings': [serialize_booking(booking) for booking in bookings]}
+    if page is not None:
+        data['next'] = page.next_cursor
+    return JsonResponse(data, status=200)
+
+BOOKING_EXPORT_HEADER = [
+    'Booking ID', 'Event', 'Event date', 'Event location', 'Planner',
+    'Service', 'Price', 'Status', 'Notes', 'Booked at',
+]
 
 @require_GET
+@login_required
+def vendor_bookings_export(request):
+    if not request.user.is_vendor:
+        return JsonResponse({'error': 'Access denied. Vendor account required.'}, status=403)
+
+    vendor_id = request.user.vendor_profile_id
+    if vendor_id is None:
+        return JsonResponse({'error': 'Vendor profile not found.'}, status=404)
+
+    statuses = dict(VendorBooking.STATUS_CHOICES)
+    rows = (
+        VendorBooking.objects.filter(vendor_id=vendor_id)
+        .order_by('-created_at', '-id')
+        .values_list(
+            'id', 'event__title', 'event__date', 'event__location', 'event__planner__username',
+            'service__title', 'service__price', 'status', 'notes', 'created_at',
+        )
+    )
+    return csv_response(
+        f'vendor-{vendor_id}-bookings.csv',
+        BOOKING_EXPORT_HEADER,
+        rows,
+        convert=lambda row: row[:7] + (statuses.get(row[7], row[7]),) + row[8:],
+    )
+
+@require_GET
+@cache_response('categories', ['categories'])
 def categories(request):
     cats = ServiceCategory.objects.all()
     data = [
@@ -72,42 +133,86 @@ def categories(request):
     return JsonResponse(data, safe=False, status=200)
 
 @require_GET
+@cache_response('vendors', ['vendors', 'categories'])
 def vendors(request):
-    category = request.GET.get('category')
-    location = request.GET.get('location')
-    price_min = request.GET.get('price_min')
-    price_max = request.GET.get('price_max')
-    vendors = VendorProfile.objects.all()
-    if category:
-        # Try filtering by category ID first, then by name for backward compatibility
-        try:
-            category_id = int(category)
-            vendors = vendors.filter(services__category__id=category_id).distinct()
-        except (ValueError, TypeError):
-            # If category is not a number, filter by name
-            vendors = vendors.filter(services__category__name__icontains=category).distinct()
-    if location:
-        vendors = vendors.filter(location__icontains=location)
-    if price_min:
-        vendors = vendors.filter(services__price__gte=price_min).distinct()
-    if price_max:
-        vendors = vendors.filter(services__price__lte=price_max).distinct() 
-    vendor_list = []
-    for vendor in vendors:
-        data = vendor.serialize()
-        avg_rating = vendor.reviews.aggregate(Avg('rating'))['rating__avg'] or 0
-        data['average_rating'] = round(avg_rating, 2)
-        vendor_list.append(data)
-    return JsonResponse({'vendors': vendor_list}, status=200)
+    try:
+        vendors = facets.filter_vendors(vendor_queryset(), request.GET)
+        vendors, keys, descending = ranking.sort_vendors(vendors, request.GET.get('sort'))
+        page = paginate(request, vendors, keys=keys, descending=descending)
+    except (InvalidCursor, availability.InvalidRange, ranking.InvalidSort) as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    if page is not None:
+        vendors = page.items
+
+    data = {
+        'vendors': [serialize_vendor(vendor) for vendor in vendors],
+        'facets': {'categories': facets.category_counts(request.GET)},
+    }
+    if page is not None:
+        data['next'] = page.next_cursor
+    return JsonResponse(data, status=200)
 
 @require_GET
+@cache_response('vendors-top', ['vendors', 'categories'])
+def top_vendors(request):
+    try:
+        limit = min(int(request.GET.get('limit', ranking.DEFAULT_TOP)), ranking.MAX_TOP)
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer.'}, status=400)
+    if limit < 1:
+        return JsonResponse({'error': 'limit must be at least 1.'}, status=400)
+    vendors = ranking.top_vendors(request.GET.get('category'), limit)
+    return JsonResponse({'vendors': [serialize_vendor(vendor) for vendor in vendors]}, status=200)
+
+@require_GET
+def vendor_search(request):
+    query = request.GET.get('q', '').strip()
+    if not search.tokenize(query):
+        return JsonResponse({'error': 'A search query (q) is required.'}, status=400)
+    try:
+        limit = min(int(request.GET.get('limit', 20)), 100)
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer.'}, status=400)
+    if limit < 1:
+        return JsonResponse({'error': 'limit must be at least 1.'}, status=400)
+
+    ranked_ids = search.get_backend().search(query)
+    rank = {vendor_id: position for position, vendor_id in enumerate(ranked_ids)}
+    try:
+        vendors = facets.filter_vendors(vendor_queryset(VendorProfile.objects.filter(id__in=ranked_ids)), request.GET)
+    except availability.InvalidRange as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    results = sorted(vendors, key=lambda vendor: rank[vendor.id])[:limit]
+    return JsonResponse({'vendors': [serialize_vendor(vendor) for vendor in results]}, status=200)
+
+def _vendor_detail_etag(request, id):
+    row = (
+        VendorProfile.objects.filter(id=id)
+        .values('updated_at', *VendorProfile.STAT_FIELDS, *VendorProfile.IMAGE_FIELDS, *VendorProfile.RANKING_FIELDS)
+        .annotate(services_updated=Max('services__updated_at'))
+        .order_by('id')
+        .first()
+    )
+    if row is None:
+        return None
+    return make_etag(request, *row.values())
+
+@require_GET
+@condition(etag_func=_vendor_detail_etag)
+@cache_response('vendor-detail', lambda request, id: ['categories', f'vendor:{id}'])
 def vendor_detail(request, id):
-    vendor = get_object_or_404(VendorProfile, id=id)
-    data = vendor.serialize()
+    vendor = get_object_or_404(vendor_queryset(), id=id)
+    data = serialize_vendor(vendor)
+    data['rating_histogram'] = vendor.rating_histogram
     # Add services list
-    data['services'] = [service.serialize() for service in vendor.services.all()]
+    data['services'] = [serialize_service(service) for service in service_queryset(vendor.services.all())]
     return JsonResponse({'vendor': data}, status=200)
 
+@staff_member_required
+@require_GET
+def cache_stats(request):
+    return JsonResponse(catalog_cache.stats(), status=200)
+
 @login_required
 @require_http_methods(["GET", "PATCH"])
 def vendor_profile(request):
@@ -139,15 +244,99 @@ def vendor_profile(request):
         vendor.save()
         return JsonResponse({'message': 'Vendor profile updated successfully.'}, status=200)
 
+AVAILABILITY_WINDOW_DAYS = 90
+
+def _availability_range(params):
+    """The ?start=&end= window (inclusive), defaulting to the next AVAILABILITY_WINDOW_DAYS days."""
+    start = availability.parse_day(params['start'], 'start') if params.get('start') else timezone.localdate()
+    if params.get('end'):
+        end = availability.parse_day(params['end'], 'end')
+    else:
+        end = start + datetime.timedelta(days=AVAILABILITY_WINDOW_DAYS - 1)
+    availability.validate_range(start, end)
+    return start, end
+
+def _list_blocks(request, vendor):
+    try:
+        start, end = _availability_range(request.GET)
+    except availability.InvalidRange as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    blocks = availability.overlapping(vendor.availability_blocks.all(), start, end).order_by('start_date', 'id')
+    return JsonResponse({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'blocks': [block.serialize() for block in blocks],
+    }, status=200)
+
+@require_GET
+def vendor_availability(request, id):
+    vendor = get_object_or_404(VendorProfile, id=id)
+    return _list_blocks(request, vendor)
+
+@login_required
+@require_http_methods(["GET", "POST"])
+def my_availability(request):
+    try:
+        vendor = request.user.vendor_profile
+    except VendorProfile.DoesNotExist:
+        return JsonResponse({'error': 'Vendor profile not found.'}, status=404)
+
+    if request.method == "GET":
+        return _list_blocks(request, vendor)
+
+    elif request.method == "POST":
+        try:
+            data = json.loads(request.body)
+            start = availability.parse_day(data.get('start_date'), 'start_date')
+            end = availability.parse_day(data.get('end_date'), 'end_date') if data.get('end_date') else start
+            availability.validate_range(start, end)
+        except ValueError as e:
+            # InvalidRange, or malformed JSON.
+            return JsonResponse({'error': str(e)}, status=400)
+        service = None
+        if data.get('service_id'):
+            service = get_object_or_404(Service, id=data['service_id'], vendor=vendor)
+        block = AvailabilityBlock.objects.create(
+            vendor=vendor,
+            service=service,
+            kind=AvailabilityBlock.BLACKOUT,
+            start_date=start,
+            end_date=end,
+            note=data.get('note') or '',
+        )
+        return JsonResponse({'block': block.serialize()}, status=201)
+
+@login_required
+@require_http_methods(["DELETE"])
+def my_availability_block(request, block_id):
+    try:
+        vendor = request.user.vendor_profile
+    except VendorProfile.DoesNotExist:
+        return JsonResponse({'error': 'Vendor profile not found.'}, status=404)
+    block = get_object_or_404(AvailabilityBlock, id=block_id, vendor=vendor)
+    if block.kind != AvailabilityBlock.BLACKOUT:
+        return JsonResponse({'error': 'Booking blocks are removed by cancelling the booking.'}, status=400)
+    block.delete()
+    return JsonResponse({'message': 'Availability block deleted successfully.'}, status=200)
+
 @login_required
 @require_http_methods(["GET", "POST"])
 def services(request, id):
     vendor = get_object_or_404(VendorProfile, id=id)
     
     if request.method == "GET":
-        services = vendor.services.all()
-        service_list = [service.serialize() for service in services]
-        return JsonResponse({'services': service_list}, status=200)
+        services = service_queryset(vendor.services.all())
+        try:
+            page = paginate(request, services)
+        except InvalidCursor as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        if page is not None:
+            services = page.items
+
+        data = {'services': [serialize_service(service) for service in services]}
+        if page is not None:
+            data['next'] = page.next_cursor
+        return JsonResponse(data, status=200)
     
     elif request.method == "POST":
         if request.user != vendor.user:
@@ -173,8 +362,19 @@ def services(request, id):
         )
         return JsonResponse({'service': service.serialize()}, status=201)
 
+def _service_etag(request, id, service_id):
+    row = (
+        Service.objects.filter(id=service_id, vendor_id=id)
+        .values('updated_at', 'vendor__business_name', 'category__name')
+        .first()
+    )
+    if row is None:
+        return None
+    return make_etag(request, *row.values())
+
 @login_required
 @require_http_methods(["GET", "PATCH", "DELETE"])
+@condition(etag_func=_service_etag)
 def service_detail(request, id, service_id):
     vendor = get_object_or_404(VendorProfile, id=id)
     service = get_object_or_404(Service, id=service_id, vendor=vendor)
@@ -218,9 +418,18 @@ def portfolio(request, id):
     vendor = get_object_or_404(VendorProfile, id=id)
     
     if request.method == "GET":
-        items = vendor.portfolio_items.all()
-        item_list = [item.serialize() for item in items]
-        return JsonResponse({'portfolio_items': item_list}, status=200)
+        items = vendor.portfolio_items.all().select_related('vendor')
+        try:
+            page = paginate(request, items)
+        except InvalidCursor as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        if page is not None:
+            items = page.items
+
+        data = {'portfolio_items': [item.serialize() for item in items]}
+        if page is not None:
+            data['next'] = page.next_cursor
+        return JsonResponse(data, status=200)
     elif request.method == "POST":
         if request.user != vendor.user:
             return JsonResponse({'error': 'Unauthorized'}, status=403)
@@ -253,15 +462,43 @@ def portfolio_detail(request, id, item_id):
         item.delete()
         return JsonResponse({'message': 'Portfolio item deleted successfully.'}, status=200)  
 
+def _reviews_etag(request, id):
+    if request.method != "GET":
+        return None
+    row = (
+        VendorProfile.objects.filter(id=id)
+        .values('business_name')
+        .annotate(
+            review_count=Count('reviews'),
+            latest=Max('reviews__updated_at'),
+            reviewers_updated=Max('reviews__user__updated_at'),
+        )
+        .order_by('id')
+        .first()
+    )
+    if row is None:
+        return None
+    return make_etag(request, *row.values())
+
 @login_required
 @require_http_methods(["GET", "POST"])
+@condition(etag_func=_reviews_etag)
 def reviews(request, id):
     vendor = get_object_or_404(VendorProfile, id=id)
     
     if request.method == "GET":
-        reviews = vendor.reviews.all().select_related('user')
-        review_list = [review.serialize() for review in reviews]
-        return JsonResponse({'reviews': review_list}, status=200)
+        reviews = vendor.reviews.all().select_related('vendor', 'user')
+        try:
+            page = paginate(request, reviews)
+        except InvalidCursor as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        if page is not None:
+            reviews = page.items
+
+        data = {'reviews': [review.serialize() for review in reviews]}
+        if page is not None:
+            data['next'] = page.next_cursor
+        return JsonResponse(data, status=200)
     
     elif request.method == "POST":
         data = json.loads(request.body)
@@ -269,15 +506,17 @@ def reviews(request, id):
         comment = data.get('comment', '')
         if rating is None or not (1 <= rating <= 5):
             return JsonResponse({'error': 'Rating must be between 1 and 5.'}, status=400)
-        existing_review = Review.objects.filter(vendor=vendor, user=request.user).first()
-        if existing_review:
+        # One review per user and vendor is enforced by a unique constraint.
+        try:
+            with transaction.atomic():
+                review = Review.objects.create(
+                    vendor=vendor,
+                    user=request.user,
+                    rating=rating,
+                    comment=comment
+                )
+        except IntegrityError:
             return JsonResponse({'error': 'You have already reviewed this vendor.'}, status=400)
-        review = Review.objects.create(
-            vendor=vendor,
-            user=request.user,
-            rating=rating,
-            comment=comment
-        )    
         return JsonResponse({'review': review.serialize()}, status=201)
 
 @login_required